@@ -0,0 +1,234 @@
+"""
+Аналитика загрузки аудиторий на NumPy
+
+Занятия и бронирования за период загружаются одним запросом в массивы (аудитория,
+начало, конец в минутах от начала периода). Все агрегаты считаются векторно:
+    - пересекающиеся интервалы одной аудитории (лекция у нескольких групп - несколько строк
+      schedules) сливаются merge_intervals, чтобы минута аудитории считалась один раз;
+    - часы по аудиториям - np.bincount с весами-длительностями;
+    - загрузка по корпусам во времени - массив разностей на минутной сетке
+      (+1 в начале интервала, -1 в конце, np.add.at), cumsum дает число занятых
+      аудиторий в каждую минуту, reshape на (дни, часы, минуты) - суммы по дням
+      недели, неделям и часам суток.
+Отчет кэшируется по (период, версия данных занятости) - версия общая для всех процессов,
+см. occupancy.data_version.
+
+Загрузка (utilization) - доля занятого времени от OPEN_HOURS_PER_DAY часов в день.
+В базе время хранится в UTC (импорт переводит TZID, iCal отдает время с Z), а сутки,
+недели и часы суток отчета - местные, в часовом поясе app.config['TIMEZONE']: начала
+и концы интервалов переводятся в местное время в запросе (AT TIME ZONE, с учетом
+перехода на летнее время), минутная сетка строится от местной полуночи.
+"""
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import text
+
+from config import DEFAULT_TIMEZONE
+from models import db
+from occupancy import data_version
+
+OPEN_HOURS_PER_DAY = 12
+# Отчетов за разные периоды в кэше
+REPORT_CACHE_SIZE = 32
+MAX_REPORT_DAYS = 366
+
+MINUTES_PER_DAY = 24 * 60
+_EPOCH = datetime(1970, 1, 1)
+
+# Границы периода - в UTC, как в базе; начала и концы - секунды местного времени зоны :zone
+INTERVALS_SQL = text("""
+SELECT classroom_number, 0 AS source,
+       extract(epoch FROM lower(period) AT TIME ZONE 'UTC' AT TIME ZONE :zone)::bigint,
+       extract(epoch FROM upper(period) AT TIME ZONE 'UTC' AT TIME ZONE :zone)::bigint
+FROM schedules WHERE period && tsrange(:start, :end)
+UNION ALL
+SELECT classroom_number, 1 AS source,
+       extract(epoch FROM lower(period) AT TIME ZONE 'UTC' AT TIME ZONE :zone)::bigint,
+       extract(epoch FROM upper(period) AT TIME ZONE 'UTC' AT TIME ZONE :zone)::bigint
+FROM bookings WHERE period && tsrange(:start, :end)
+""")
+
+BUILDING_RE = re.compile(r'^\D+')
+
+
+def building_of(number):
+    """Корпус аудитории: часть номера до дефиса ('Б-233' -> 'Б') или буквенный префикс"""
+    if '-' in number:
+        return number.split('-', 1)[0]
+    match = BUILDING_RE.match(number)
+    return match.group() if match else ''
+
+
+def _epoch_seconds(moment):
+    return int((moment - _EPOCH).total_seconds())
+
+
+def local_zone():
+    """Часовой пояс университета из app.config['TIMEZONE']"""
+    return ZoneInfo(current_app.config.get('TIMEZONE') or DEFAULT_TIMEZONE)
+
+
+def to_utc(moment, zone):
+    """Местное время зоны zone без пояса -> UTC без пояса"""
+    return moment.replace(tzinfo=zone).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def load_intervals(start, end, zone):
+    """
+    Интервалы занятости за [start, end) местного времени зоны zone: (номера аудиторий,
+    индексы аудиторий, источник 0 - занятие / 1 - бронирование, начало и конец в минутах
+    местного времени от start, обрезанные по периоду)
+    """
+    rows = db.session.execute(INTERVALS_SQL, {
+        'start': to_utc(start, zone), 'end': to_utc(end, zone), 'zone': zone.key,
+    }).all()
+    base = _epoch_seconds(start)
+    total = (_epoch_seconds(end) - base) // 60
+    if not rows:
+        empty = np.zeros(0, dtype=np.int64)
+        return np.zeros(0, dtype=object), empty, empty, empty, empty
+
+    numbers, source, begin, finish = zip(*rows)
+    numbers, room = np.unique(np.array(numbers, dtype=object), return_inverse=True)
+    begin = np.clip((np.array(begin, dtype=np.int64) - base) // 60, 0, total)
+    finish = np.clip((np.array(finish, dtype=np.int64) - base) // 60, 0, total)
+    return numbers, room, np.array(source, dtype=np.int8), begin, finish
+
+
+def merge_intervals(key, begin, finish):
+    """
+    Слияние пересекающихся и соприкасающихся интервалов с одинаковым key (например, индексом аудитории).
+    Возвращает (key, begin, finish) непересекающихся интервалов, отсортированных по key и началу.
+    """
+    if not len(key):
+        return key, begin, finish
+    order = np.lexsort((begin, key))
+    key, begin, finish = key[order], begin[order], finish[order]
+    # Сдвиг на key * span делает накопленный максимум концов независимым для каждого key
+    span = int(max(finish.max(), begin.max())) + 1
+    reach = np.maximum.accumulate(key * span + finish)
+    starts = np.ones(len(key), dtype=bool)
+    starts[1:] = (key[1:] != key[:-1]) | (key[1:] * span + begin[1:] > reach[:-1])
+    first = np.flatnonzero(starts)
+    return key[first], begin[first], np.maximum.reduceat(finish, first)
+
+
+def _report(start, end, zone):
+    started = time.perf_counter()
+    days = (end - start).days
+    total_minutes = days * MINUTES_PER_DAY
+
+    # Все аудитории, включая свободные весь период
+    classrooms = db.session.execute(text("SELECT number, capacity FROM classrooms ORDER BY number")).all()
+    numbers, room, source, begin, finish = load_intervals(start, end, zone)
+    known = {number: i for i, (number, _) in enumerate(classrooms)}
+    for number in numbers:
+        if number not in known:
+            known[number] = len(classrooms)
+            classrooms.append((number, None))
+    # Индексы из load_intervals -> индексы в списке classrooms
+    room = np.array([known[number] for number in numbers], dtype=np.int64)[room] if len(numbers) else room
+
+    room_count = len(classrooms)
+    capacity = np.array([c or 0 for _, c in classrooms], dtype=np.int64)
+    buildings, building_of_room = np.unique(
+        np.array([building_of(number) for number, _ in classrooms], dtype=object), return_inverse=True
+    )
+    rooms_per_building = np.bincount(building_of_room, minlength=len(buildings))
+
+    # Часы по аудиториям отдельно для занятий и бронирований; занятое время - по объединению интервалов
+    pair, pair_begin, pair_finish = merge_intervals(room * 2 + source, begin, finish)
+    duration = (pair_finish - pair_begin).astype(np.float64)
+    schedule_hours = np.bincount(pair // 2, weights=duration * (pair % 2 == 0), minlength=room_count) / 60
+    booking_hours = np.bincount(pair // 2, weights=duration * (pair % 2 == 1), minlength=room_count) / 60
+    room, begin, finish = merge_intervals(room, begin, finish)
+    booked_hours = np.bincount(room, weights=(finish - begin).astype(np.float64), minlength=room_count) / 60
+    open_hours = days * OPEN_HOURS_PER_DAY
+
+    # Минутная сетка занятости по корпусам
+    building = building_of_room[room]
+    diff = np.zeros((len(buildings), total_minutes + 1), dtype=np.int32)
+    np.add.at(diff, (building, begin), 1)
+    np.add.at(diff, (building, finish), -1)
+    busy = np.cumsum(diff[:, :-1], axis=1, dtype=np.int32)
+    # занятые аудиторо-минуты: (корпус, день, час)
+    per_hour = busy.reshape(len(buildings), days, 24, 60).sum(axis=3, dtype=np.int64)
+    per_day = per_hour.sum(axis=2)
+    week_starts = np.arange(0, days, 7)
+    per_week = np.add.reduceat(per_day, week_starts, axis=1) if days else per_day
+    week_days = np.diff(np.append(week_starts, days))
+    by_hour = per_hour.sum(axis=1)
+
+    def ratio(used, available):
+        # Занятия вне OPEN_HOURS_PER_DAY часов не поднимают загрузку выше полной
+        return round(min(float(used / available), 1.0), 4) if available else 0.0
+
+    return {
+        'range': {'from': start.isoformat(), 'to': end.isoformat(), 'days': days, 'timezone': zone.key,
+                  'open_hours_per_day': OPEN_HOURS_PER_DAY},
+        'totals': {
+            'classrooms': room_count,
+            'booked_hours': round(float(booked_hours.sum()), 2),
+            'utilization': ratio(booked_hours.sum(), open_hours * room_count),
+        },
+        'classrooms': [
+            {
+                'number': number,
+                'building': str(buildings[building_of_room[i]]),
+                'capacity': cap,
+                'schedule_hours': round(float(schedule_hours[i]), 2),
+                'booking_hours': round(float(booking_hours[i]), 2),
+                'booked_hours': round(float(booked_hours[i]), 2),
+                'seat_hours': round(float(booked_hours[i] * capacity[i]), 2),
+                'utilization': ratio(booked_hours[i], open_hours),
+            } for i, (number, cap) in enumerate(classrooms)
+        ],
+        'buildings': [
+            {
+                'building': str(name),
+                'classrooms': int(rooms_per_building[b]),
+                'booked_hours': round(float(per_day[b].sum() / 60), 2),
+                'utilization': ratio(per_day[b].sum() / 60, open_hours * rooms_per_building[b]),
+                'by_week': [
+                    {
+                        'week_start': (start + timedelta(days=int(first))).date().isoformat(),
+                        'booked_hours': round(float(per_week[b, w] / 60), 2),
+                        'utilization': ratio(per_week[b, w] / 60,
+                                             week_days[w] * OPEN_HOURS_PER_DAY * rooms_per_building[b]),
+                    } for w, first in enumerate(week_starts)
+                ],
+                # Доля аудиторий корпуса, занятых в этот час суток, в среднем по дням периода
+                'by_hour': [
+                    {
+                        'hour': hour,
+                        'booked_hours': round(float(by_hour[b, hour] / 60), 2),
+                        'utilization': ratio(by_hour[b, hour], days * 60 * rooms_per_building[b]),
+                    } for hour in range(24)
+                ],
+            } for b, name in enumerate(buildings)
+        ],
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+@lru_cache(maxsize=REPORT_CACHE_SIZE)
+def _cached_report(start, end, zone, version):
+    return _report(start, end, zone)
+
+
+def utilization_report(start, end):
+    """
+    Отчет о загрузке аудиторий за [start, end) - местное время без пояса (границы округляются до суток).
+    Кэшируется, пока не изменится версия данных занятости (бронирование, импорт расписания
+    или изменение аудиторий в любом процессе).
+    """
+    start = datetime.combine(start.date(), datetime.min.time())
+    midnight = datetime.combine(end.date(), datetime.min.time())
+    end = midnight if end == midnight else midnight + timedelta(days=1)
+    return _cached_report(start, end, local_zone(), data_version(db.session))
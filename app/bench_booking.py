@@ -0,0 +1,134 @@
+"""
+Нагрузочный тест POST /bookings: много потоков бронируют одну аудиторию пересекающимися интервалами.
+
+После прогона все бронирования и занятия аудитории за выбранный день читаются через API
+и проверяются на пересечения - двойных бронирований быть не должно. Выводятся число
+созданных (201) и отклоненных (409) запросов, задержки и пропускная способность по секундам.
+
+Запуск (сервер должен быть запущен, аудитория - существовать):
+    python bench_booking.py --url http://localhost:5000 --classroom 101 --day 2030-01-15
+"""
+import argparse
+import random
+import statistics
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import requests
+
+WORKDAY_START = 8 * 60
+WORKDAY_END = 20 * 60
+
+
+def make_requests(count, classroom, day, seed=0):
+    """Случайные интервалы по 30-120 минут с шагом 10 минут в пределах рабочего дня"""
+    rnd = random.Random(seed)
+    payloads = []
+    for i in range(count):
+        duration = rnd.choice([30, 45, 60, 90, 120])
+        start = rnd.randrange(WORKDAY_START, WORKDAY_END - duration, 10)
+        payloads.append({
+            'classroom': classroom,
+            'date': (day + timedelta(minutes=start)).isoformat(),
+            'duration': duration,
+            'description': f'bench_booking #{i}',
+        })
+    return payloads
+
+
+def fetch_all(session, url, key, params):
+    """Все страницы списка /schedules или /bookings"""
+    items, cursor = [], None
+    while True:
+        page = session.get(url, params={**params, 'limit': 500, **({'cursor': cursor} if cursor else {})}).json()
+        items += page[key]
+        cursor = page.get('next_cursor')
+        if not cursor:
+            return items
+
+
+def find_overlaps(intervals):
+    """Пары пересекающихся интервалов (start, end, метка); пересечения занятий между собой не считаются"""
+    overlaps = []
+    intervals = sorted(intervals)
+    latest_end, latest = None, None
+    for interval in intervals:
+        if latest_end is not None and interval[0] < latest_end \
+                and not (latest[2].startswith('schedule') and interval[2].startswith('schedule')):
+            overlaps.append((latest, interval))
+        if latest_end is None or interval[1] > latest_end:
+            latest_end, latest = interval[1], interval
+    return overlaps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--classroom', default='101')
+    parser.add_argument('--day', type=datetime.fromisoformat, default=datetime(2030, 1, 15),
+                        help='день бронирований; лучше брать день без существующих бронирований')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=32)
+    args = parser.parse_args()
+
+    day = args.day.replace(hour=0, minute=0, second=0, microsecond=0)
+    payloads = make_requests(args.requests, args.classroom, day)
+    local = threading.local()
+
+    def book(payload):
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        started = time.perf_counter()
+        status = local.session.post(f'{args.url}/bookings', json=payload).status_code
+        finished = time.perf_counter()
+        return status, finished - started, finished
+
+    began = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(book, payloads))
+    elapsed = time.perf_counter() - began
+
+    statuses = Counter(status for status, _, _ in results)
+    latencies = sorted(latency for _, latency, _ in results)
+    per_second = Counter(int(finished - began) for _, _, finished in results)
+    # Последняя неполная секунда искажает картину
+    full_seconds = [per_second[s] for s in range(int(elapsed))] or [len(results)]
+
+    print(f"requests: {len(results)}, workers: {args.workers}, seconds: {elapsed:.2f}, "
+          f"rps: {len(results) / elapsed:.0f}")
+    print(f"statuses: {dict(sorted(statuses.items()))}")
+    print(f"latency ms: p50={latencies[len(latencies) // 2] * 1000:.1f} "
+          f"p99={latencies[int(len(latencies) * 0.99)] * 1000:.1f} max={latencies[-1] * 1000:.1f}")
+    print(f"rps by second: min={min(full_seconds)} median={statistics.median(full_seconds):.0f} "
+          f"max={max(full_seconds)}")
+
+    with requests.Session() as session:
+        params = {'classroom': args.classroom,
+                  'date_from': day.isoformat(), 'date_to': (day + timedelta(days=1)).isoformat()}
+        bookings = fetch_all(session, f'{args.url}/bookings', 'bookings', params)
+        schedules = fetch_all(session, f'{args.url}/schedules', 'schedules', params)
+
+    intervals = [
+        (datetime.fromisoformat(b['date']), datetime.fromisoformat(b['date']) + timedelta(minutes=b['duration']),
+         f"booking {b['id']}")
+        for b in bookings
+    ]
+    intervals += [
+        (datetime.fromisoformat(s['date']),
+         datetime.fromisoformat(s['end_date']) if s['end_date']
+         else datetime.fromisoformat(s['date']) + timedelta(minutes=90),
+         f"schedule {s['id']}")
+        for s in schedules
+    ]
+    overlaps = find_overlaps(intervals)
+    print(f"bookings in room: {len(bookings)}, schedules in room: {len(schedules)}, overlaps: {len(overlaps)}")
+    for first, second in overlaps[:10]:
+        print(f"⚠️ {first[2]} [{first[0]:%H:%M}-{first[1]:%H:%M}] пересекается с "
+              f"{second[2]} [{second[0]:%H:%M}-{second[1]:%H:%M}]")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,360 @@
+"""
+Сквозной бенчмарк конвейера расписания на синтетическом университете (csv_parser/synthetic.py).
+
+Этапы и что измеряется:
+    generate  - построение синтетического университета (аудитории, группы, семестр пар)
+    fetch     - загрузка .ics всех групп с локальной заглушки eios.kosgos.ru (fetcher.run_fetch)
+    parse     - разбор каждого файла parse_ics_file
+    csv       - конвертация каталога в CSV (parser_to_csv.main)
+    load      - полная загрузка CSV в базу (import_schedule, full=True)
+    load_diff - повторная загрузка тех же данных: сравнение без изменений
+    endpoints - запросы к эндпоинтам routes.py через тестовый клиент Flask: время первого запроса
+                и p50/p95/p99 по --requests запросам с параметрами по кругу
+
+Бенчмарк очищает аудитории, расписание, бронирования и iCal-фиды, поэтому база задается
+только явно (--database-url или BENCH_DATABASE_URL) и должна быть отдельной от рабочей.
+Результат пишется в JSON (--output); с --baseline сравнивается с прошлым прогоном, и при
+замедлении больше --tolerance код возврата 1 - удобно для проверки релизов.
+
+Запуск:
+    python bench_e2e.py --database-url postgresql://localhost/timetable_bench \\
+        --groups 300 --classrooms 2000 --output bench.json --baseline bench_prev.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from urllib.parse import quote, urlencode
+
+from sqlalchemy import text
+
+from importer import CSV_PARSER_DIR, import_schedule
+from loadtest import percentile
+from main import create_app
+from models import db
+
+if CSV_PARSER_DIR not in sys.path:
+    sys.path.append(CSV_PARSER_DIR)
+
+import parser_to_csv
+from fetch_manifest import FetchManifest, store_result
+from fetcher import run_fetch
+from stub_server import start_stub_server
+from synthetic import SEMESTER_WEEKS, SyntheticUniversity
+
+RESULT_FORMAT = 1
+# Замедление меньше этого не считается регрессией, как бы ни было велико в процентах
+MIN_DELTA_MS = 2.0
+COMPARED_ENDPOINT_METRICS = ('p50_ms', 'p95_ms')
+
+
+class Stage:
+    """Замер одного этапа: секунды и счетчики, которые этап добавит сам"""
+
+    def __init__(self, results, name):
+        self.results = results
+        self.name = name
+        self.counts = {}
+
+    def __enter__(self):
+        print(f"⏳ {self.name}...", flush=True)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            seconds = time.perf_counter() - self.started
+            self.results['stages'][self.name] = {'seconds': round(seconds, 4), **self.counts}
+            print(f"✅ {self.name}: {seconds:.2f} с {self.counts}")
+
+
+def reset_database():
+    """Очистить данные, которые загружает бенчмарк; справочники остаются"""
+    db.session.execute(text(
+        "TRUNCATE schedules, bookings, calendar_feeds, classrooms RESTART IDENTITY CASCADE"
+    ))
+    db.session.commit()
+
+
+def load_classrooms(university):
+    """Аудитории с вместимостью и оборудованием - их import_schedule из .ics не знает"""
+    db.session.execute(text(
+        "INSERT INTO classrooms (number, capacity, equipment, description) "
+        "VALUES (:number, :capacity, :equipment, :description) "
+        "ON CONFLICT (number) DO UPDATE SET capacity = excluded.capacity, "
+        "equipment = excluded.equipment, description = excluded.description"
+    ), [
+        {'number': number, 'capacity': capacity, 'equipment': equipment, 'description': description}
+        for number, capacity, equipment, description in university.classrooms
+    ])
+    db.session.commit()
+
+
+def fetch_calendars(base_url, group_ids, ical_dir, concurrency, rate):
+    """Загрузка как в rasp_parser: условные запросы, файлы calendar_<id>.ics и манифест"""
+    manifest = FetchManifest.load(ical_dir)
+    jobs = [
+        (group_id, f"{base_url}?idGroup={group_id}&iCal=true", manifest.conditional_headers(f"group:{group_id}"))
+        for group_id in group_ids
+    ]
+    statuses = {}
+    size = 0
+
+    def save_result(result):
+        nonlocal size
+        status = store_result(manifest, ical_dir, f"group:{result.key}", f"calendar_{result.key}.ics", result)
+        statuses[status] = statuses.get(status, 0) + 1
+        size += len(result.content or b'')
+
+    try:
+        run_fetch(jobs, save_result, concurrency=concurrency, rate=rate, retries=3, backoff=0.05)
+    finally:
+        manifest.save()
+    return statuses, size
+
+
+def endpoint_requests(university, rnd, count):
+    """Для каждого эндпоинта - список (метод, путь, JSON) с разными параметрами"""
+    start = university.semester_start
+    groups = [name for _, name in university.groups]
+    teachers = university.teachers
+    rooms = [room[0] for room in university.classrooms]
+
+    def moment():
+        day = start + timedelta(days=rnd.randrange(university.weeks * 7))
+        return day.replace(hour=rnd.choice((8, 10, 12, 14)), minute=rnd.choice((0, 20, 40)))
+
+    def query(path, **params):
+        return 'GET', f"{path}?{urlencode(params)}", None
+
+    def free():
+        begin = moment()
+        return query('/classrooms/free', start=begin.isoformat(), end=(begin + timedelta(minutes=90)).isoformat(),
+                     min_capacity=rnd.choice((20, 30, 60)))
+
+    def utilization():
+        begin = start + timedelta(weeks=rnd.randrange(max(1, university.weeks - 4)))
+        return query('/analytics/utilization', date_from=begin.date().isoformat(),
+                     date_to=(begin + timedelta(weeks=4)).date().isoformat())
+
+    def booking():
+        # Воскресенье: занятий нет, конфликты (409) - только с бронированиями этого же прогона
+        sunday = start + timedelta(days=7 * rnd.randrange(university.weeks) + 6)
+        begin = sunday.replace(hour=rnd.randrange(8, 20), minute=rnd.choice((0, 30)))
+        return 'POST', '/bookings', {'classroom': rnd.choice(rooms), 'date': begin.isoformat(),
+                                     'duration': 90, 'description': 'bench_e2e'}
+
+    def search_prefix(values):
+        value = rnd.choice(values)
+        return query('/search', q=value[:rnd.randrange(3, max(4, len(value)))])
+
+    makers = {
+        'classrooms': lambda: ('GET', '/classrooms', None),
+        'classrooms_free': free,
+        'schedules_group': lambda: query('/schedules', group=rnd.choice(groups), limit=100),
+        'schedules_teacher': lambda: query('/schedules', teacher=rnd.choice(teachers), limit=100),
+        'schedules_classroom': lambda: query('/schedules', classroom=rnd.choice(rooms), limit=100),
+        'schedules_export': lambda: query('/schedules/export', group=rnd.choice(groups)),
+        'bookings': lambda: query('/bookings', limit=100, date_from=moment().date().isoformat()),
+        'bookings_post': booking,
+        'utilization': utilization,
+        'search': lambda: search_prefix(groups + teachers + rooms),
+        'group_calendar': lambda: ('GET', f"/groups/{quote(rnd.choice(groups), safe='')}/calendar.ics", None),
+        'teacher_calendar': lambda: ('GET', f"/teachers/{quote(rnd.choice(teachers), safe='')}/calendar.ics", None),
+        'health': lambda: ('GET', '/health', None),
+    }
+    return {name: [make() for _ in range(count)] for name, make in makers.items()}
+
+
+def bench_endpoints(app, plan, only=None):
+    """Первый запрос (холодные кэши и индексы) отдельно, остальные - в перцентили"""
+    results = {}
+    client = app.test_client()
+    for name, calls in plan.items():
+        if only and name not in only:
+            continue
+        timings = []
+        statuses = {}
+        size = 0
+        for method, path, body in calls:
+            started = time.perf_counter()
+            response = client.open(path, method=method, json=body)
+            data = response.get_data()
+            timings.append((time.perf_counter() - started) * 1000)
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+            size += len(data)
+        cold, warm = timings[0], sorted(timings[1:] or timings)
+        results[name] = {
+            'requests': len(timings),
+            'cold_ms': round(cold, 3),
+            'p50_ms': round(percentile(warm, 0.50), 3),
+            'p95_ms': round(percentile(warm, 0.95), 3),
+            'p99_ms': round(percentile(warm, 0.99), 3),
+            'mean_ms': round(sum(warm) / len(warm), 3),
+            'bytes': size,
+            'statuses': statuses,
+        }
+        print(f"{name:>20} {cold:>9.1f} {results[name]['p50_ms']:>9.2f} {results[name]['p95_ms']:>9.2f} "
+              f"{results[name]['p99_ms']:>9.2f}  {statuses}")
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, tolerance, min_delta_ms=MIN_DELTA_MS):
+    """Регрессии относительно baseline: [(метрика, было, стало)]"""
+    regressions = []
+
+    def check(metric, old, new, unit_ms):
+        if old is None or new is None:
+            return
+        delta_ms = (new - old) * (1 if unit_ms else 1000)
+        if new > old * (1 + tolerance) and delta_ms > min_delta_ms:
+            regressions.append((metric, old, new))
+
+    for name, stage in results['stages'].items():
+        check(f"stages.{name}.seconds", baseline.get('stages', {}).get(name, {}).get('seconds'),
+              stage['seconds'], False)
+    for name, endpoint in results['endpoints'].items():
+        for metric in COMPARED_ENDPOINT_METRICS:
+            check(f"endpoints.{name}.{metric}", baseline.get('endpoints', {}).get(name, {}).get(metric),
+                  endpoint[metric], True)
+    return regressions
+
+
+def describe_regression(metric, old, new):
+    """Строка отчета о регрессии: абсолютный прирост и, если базовое значение не нулевое, проценты"""
+    unit = 's' if metric.endswith('.seconds') else 'ms'
+    percent = f", +{(new / old - 1) * 100:.0f}%" if old else ""
+    return f"{metric}: {old} -> {new} (+{new - old:.3f} {unit}{percent})"
+
+
+def run(args, results):
+    with Stage(results, 'generate') as stage:
+        university = SyntheticUniversity(args.groups, args.classrooms, args.teachers,
+                                         pairs_per_week=args.pairs_per_week, weeks=args.weeks, seed=args.seed)
+        stage.counts = {'groups': len(university.groups), 'classrooms': len(university.classrooms),
+                        'teachers': len(university.teachers), 'subjects': len(university.subjects)}
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='bench_e2e_')
+    try:
+        run_pipeline(args, results, university, workdir)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def run_pipeline(args, results, university, workdir):
+    ical_dir = os.path.join(workdir, 'ical_files')
+    csv_path = os.path.join(workdir, 'university_schedule.csv')
+    os.makedirs(ical_dir, exist_ok=True)
+
+    server, base_url = start_stub_server(latency=args.latency, university=university)
+    try:
+        with Stage(results, 'fetch') as stage:
+            statuses, size = fetch_calendars(base_url, university.group_ids(), ical_dir, args.concurrency, args.rate)
+            stage.counts = {'files': len(university.groups), 'bytes': size, 'statuses': statuses}
+    finally:
+        server.shutdown()
+
+    files = sorted(os.path.join(ical_dir, name) for name in os.listdir(ical_dir) if name.endswith('.ics'))
+    with Stage(results, 'parse') as stage:
+        events = sum(len(parser_to_csv.parse_ics_file(path)) for path in files)
+        stage.counts = {'files': len(files), 'events': events}
+
+    parser_to_csv.ICAL_DIR, parser_to_csv.OUTPUT_CSV = ical_dir, csv_path
+    with Stage(results, 'csv') as stage:
+        parser_to_csv.main(force=True, parallel=args.parallel)
+        stage.counts = {'bytes': os.path.getsize(csv_path)}
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': args.database_url})
+    with app.app_context():
+        reset_database()
+        load_classrooms(university)
+        with Stage(results, 'load') as stage:
+            stage.counts = import_schedule(csv_path, notify=False, full=True)
+        with Stage(results, 'load_diff') as stage:
+            stage.counts = import_schedule(csv_path, notify=False)
+
+        print(f"{'endpoint':>20} {'cold ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  statuses")
+        plan = endpoint_requests(university, random.Random(args.seed), args.requests)
+        started = time.perf_counter()
+        results['endpoints'] = bench_endpoints(app, plan, args.endpoints)
+        results['stages']['endpoints'] = {'seconds': round(time.perf_counter() - started, 4),
+                                          'requests': sum(e['requests'] for e in results['endpoints'].values())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', default=os.environ.get('BENCH_DATABASE_URL'),
+                        help='Отдельная база для бенчмарка (данные в ней очищаются)')
+    parser.add_argument('--groups', type=int, default=300)
+    parser.add_argument('--classrooms', type=int, default=2000)
+    parser.add_argument('--teachers', type=int, default=None)
+    parser.add_argument('--pairs-per-week', type=int, default=16)
+    parser.add_argument('--weeks', type=int, default=SEMESTER_WEEKS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0.0, help='Задержка ответа заглушки, секунды')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--rate', type=float, default=None, help='Лимит запросов в секунду (по умолчанию без лимита)')
+    parser.add_argument('--parallel', action='store_true', help='Разбор в CSV пулом процессов')
+    parser.add_argument('--requests', type=int, default=200, help='Запросов к каждому эндпоинту')
+    parser.add_argument('--endpoints', nargs='+', default=None, help='Только эти эндпоинты')
+    parser.add_argument('--workdir', default=None, help='Каталог для .ics и CSV (по умолчанию временный)')
+    parser.add_argument('--output', default=None, help='Файл для результатов в JSON')
+    parser.add_argument('--baseline', default=None, help='JSON прошлого прогона для сравнения')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Допустимое замедление, доля')
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error('нужна отдельная база: --database-url или BENCH_DATABASE_URL')
+
+    # Повторы загрузки логируются как WARNING - в бенчмарке они не нужны
+    logging.getLogger().setLevel(logging.ERROR)
+
+    results = {
+        'format': RESULT_FORMAT,
+        'started_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': {key: value for key, value in vars(args).items()
+                   if key not in ('database_url', 'output', 'baseline', 'tolerance', 'workdir')},
+        'stages': {},
+        'endpoints': {},
+    }
+    run(args, results)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"✅ Результаты записаны в {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('params') != results['params']:
+            print("⚠️ Параметры прогона отличаются от baseline, сравнение может быть некорректным")
+        regressions = compare(results, baseline, args.tolerance)
+        for metric, old, new in regressions:
+            print(f"❌ {describe_regression(metric, old, new)}")
+        if regressions:
+            sys.exit(1)
+        print(f"✅ Регрессий больше {args.tolerance * 100:.0f}% относительно {args.baseline} нет")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Бенчмарк выгрузки расписания в JSON: ORM-объекты + jsonify против кортежей колонок + потоковой сериализации.
+
+В отдельной транзакции в schedules добавляется --rows синтетических занятий, обе реализации
+выгружают их целиком, после чего транзакция откатывается. Для каждой выводятся время до первого
+байта, полное время и пиковая память Python (tracemalloc).
+
+Запуск: python bench_json.py --rows 100000
+"""
+import argparse
+import time
+import tracemalloc
+
+from flask import jsonify
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from main import create_app
+from models import db, Schedule
+from routes import SCHEDULE_KEYS, schedule_query
+from serialization import STREAM_CHUNK_ROWS, iter_json_array, orjson
+
+BENCH_CLASSROOM = 'BENCH-JSON'
+
+
+def fill(connection, rows):
+    """Синтетические занятия: пары по 90 минут, 6 в день, начиная с 2040 года"""
+    connection.execute(text(
+        "INSERT INTO classrooms (number) VALUES (:number) ON CONFLICT (number) DO NOTHING"
+    ), {'number': BENCH_CLASSROOM})
+    connection.execute(text(
+        "INSERT INTO groups (name) SELECT '24-ДИбо-' || n FROM generate_series(0, 49) AS n "
+        "ON CONFLICT (name) DO NOTHING"
+    ))
+    connection.execute(text(
+        "INSERT INTO teachers (name) SELECT 'Преподаватель' || n || ' А.Б.' FROM generate_series(0, 299) AS n "
+        "ON CONFLICT (name) DO NOTHING"
+    ))
+    connection.execute(text(
+        "INSERT INTO schedules (classroom_number, lesson, date, end_date, group_id, teacher_id) "
+        "SELECT :number, 'лек Дисциплина ' || (n % 200), "
+        "       timestamp '2040-01-01 08:00' + (n / 6) * interval '1 day' + (n % 6) * interval '100 minutes', "
+        "       timestamp '2040-01-01 09:30' + (n / 6) * interval '1 day' + (n % 6) * interval '100 minutes', "
+        "       g.id, t.id "
+        "FROM generate_series(1, :rows) AS n "
+        "JOIN groups g ON g.name = '24-ДИбо-' || (n % 50) "
+        "JOIN teachers t ON t.name = 'Преподаватель' || (n % 300) || ' А.Б.'"
+    ), {'number': BENCH_CLASSROOM, 'rows': rows})
+
+
+def legacy_export(session):
+    """Исходный путь routes.py: ORM-объекты, словари с isoformat и jsonify"""
+    schedules = session.query(Schedule).filter(Schedule.classroom_number == BENCH_CLASSROOM) \
+        .order_by(Schedule.date, Schedule.id).all()
+    response = jsonify({
+        'schedules': [
+            {
+                'id': s.id,
+                'classroom': s.classroom_number,
+                'lesson': s.lesson,
+                'date': s.date.isoformat() if s.date else None,
+                'end_date': s.end_date.isoformat() if s.end_date else None,
+                'group': s.group.name if s.group else None,
+                'teacher': s.teacher.name if s.teacher else None
+            } for s in schedules
+        ]
+    })
+    yield response.get_data()
+
+
+def fast_export(session):
+    """Путь /schedules/export: кортежи колонок, курсор пачками, потоковая сериализация"""
+    statement = schedule_query(session).filter(Schedule.classroom_number == BENCH_CLASSROOM) \
+        .order_by(Schedule.date, Schedule.id).statement
+    result = session.execute(statement.execution_options(yield_per=STREAM_CHUNK_ROWS))
+    yield from iter_json_array('schedules', SCHEDULE_KEYS, result.partitions())
+
+
+def measure(name, export, session):
+    session.expunge_all()
+    tracemalloc.start()
+    started = time.perf_counter()
+    first_byte = None
+    size = 0
+    for chunk in export(session):
+        if first_byte is None:
+            first_byte = time.perf_counter() - started
+        size += len(chunk)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:>8} {first_byte * 1000:>10.0f} {elapsed * 1000:>10.0f} {peak / 2 ** 20:>10.1f} {size / 2 ** 20:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        with db.engine.connect() as connection:
+            transaction = connection.begin()
+            try:
+                fill(connection, args.rows)
+                session = Session(bind=connection, join_transaction_mode='create_savepoint')
+                print(f"rows: {args.rows}, encoder: {'orjson' if orjson else 'json'}")
+                print(f"{'path':>8} {'ttfb ms':>10} {'total ms':>10} {'peak MiB':>10} {'body MiB':>9}")
+                measure('legacy', legacy_export, session)
+                measure('fast', fast_export, session)
+                session.close()
+            finally:
+                transaction.rollback()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Бенчмарк холодного запуска: сколько проходит от старта нового процесса Python до ответа на первый запрос.
+
+Каждый прогон - отдельный процесс (как новый воркер gunicorn после рестарта или масштабирования),
+внутри которого замеряются импорт main, create_app и первый запрос GET /health (первое соединение
+с базой). Режимы: eager - проверка схемы и миграции при запуске (DB_INIT_ON_STARTUP=1),
+lazy - без обращения к базе до первого запроса (DB_INIT_ON_STARTUP=0). Для каждого режима
+выводятся медиана и p95 по --runs прогонам; --output сохраняет результат в JSON.
+
+Запуск: python bench_startup.py --runs 10 --output startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from loadtest import percentile
+
+MODES = {'eager': '1', 'lazy': '0'}
+STAGES = ('import_ms', 'create_app_ms', 'first_request_ms', 'total_ms')
+
+# Выполняется в дочернем процессе; модули, которые запуск не должен импортировать, проверяются в конце
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+from main import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+status = app.test_client().get('/health').status_code
+answered = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'first_request_ms': (answered - created) * 1000,
+    'status': status,
+    'numpy_loaded': 'numpy' in sys.modules,
+}))
+"""
+
+
+def run_once(mode, database_url):
+    env = dict(os.environ, DB_INIT_ON_STARTUP=MODES[mode])
+    if database_url:
+        env['DATABASE_URL'] = database_url
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', CHILD], env=env, capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+    total = (time.perf_counter() - started) * 1000
+    # create_app печатает сообщения init_db - результат в последней строке
+    result = json.loads(output.strip().splitlines()[-1])
+    result['total_ms'] = total
+    return result
+
+
+def summarize(runs):
+    summary = {}
+    for stage in STAGES:
+        values = sorted(run[stage] for run in runs)
+        summary[stage] = {'median': round(statistics.median(values), 2), 'p95': round(percentile(values, 0.95), 2)}
+    summary['statuses'] = sorted({run['status'] for run in runs})
+    summary['numpy_loaded'] = any(run['numpy_loaded'] for run in runs)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+    parser.add_argument('--database-url', default=None, help='По умолчанию - DATABASE_URL из окружения')
+    parser.add_argument('--output', default=None, help='Файл для результатов в JSON')
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'mode':>6} {'import ms':>10} {'create ms':>10} {'first ms':>10} {'total ms':>10} {'total p95':>10}")
+    for mode in args.modes:
+        # Первый прогон прогревает кэш байткода и файловой системы и не учитывается
+        run_once(mode, args.database_url)
+        summary = summarize([run_once(mode, args.database_url) for _ in range(args.runs)])
+        results[mode] = summary
+        print(f"{mode:>6} {summary['import_ms']['median']:>10.1f} {summary['create_app_ms']['median']:>10.1f} "
+              f"{summary['first_request_ms']['median']:>10.1f} {summary['total_ms']['median']:>10.1f} "
+              f"{summary['total_ms']['p95']:>10.1f}")
+        if summary['numpy_loaded']:
+            print(f"⚠️ {mode}: NumPy импортирован при запуске")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'python': sys.version.split()[0], 'runs': args.runs, 'modes': results}, f, indent=2)
+        print(f"✅ Результаты записаны в {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Создание бронирований аудиторий с проверкой пересечений
+
+Проверка и вставка выполняются в одной транзакции под транзакционной advisory-блокировкой
+по номеру аудитории: конкурентные запросы на одну аудиторию выстраиваются в очередь,
+и каждый следующий видит бронирования, закоммиченные предыдущими. Запросы на разные
+аудитории друг друга не блокируют. Если на сервере есть btree_gist, пересечение
+бронирований дополнительно запрещено ограничением-исключением bookings_no_overlap.
+"""
+from datetime import timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Classroom, Schedule, Booking
+
+# Максимальная длительность одного бронирования, минут
+MAX_DURATION = 12 * 60
+
+# SQLSTATE exclusion_violation
+EXCLUSION_VIOLATION = '23P01'
+
+
+class BookingConflict(Exception):
+    """Интервал бронирования пересекается с занятиями или другими бронированиями"""
+
+    def __init__(self, conflicts):
+        super().__init__('Аудитория занята в указанное время')
+        self.conflicts = conflicts
+
+
+def _lock_classroom(number):
+    """Транзакционная блокировка аудитории; снимается при commit/rollback"""
+    db.session.execute(select(func.pg_advisory_xact_lock(func.hashtext('booking:' + number))))
+
+
+def find_conflicts(number, start, end):
+    """Занятия и бронирования аудитории, пересекающиеся с [start, end)"""
+    conflicts = [
+        {'type': 'schedule', 'id': s.id, 'lesson': s.lesson,
+         'start': s.period.lower.isoformat(), 'end': s.period.upper.isoformat()}
+        for s in Schedule.overlapping(start, end, number).order_by(Schedule.date)
+    ]
+    conflicts += [
+        {'type': 'booking', 'id': b.id, 'description': b.description,
+         'start': b.period.lower.isoformat(), 'end': b.period.upper.isoformat()}
+        for b in Booking.overlapping(start, end, number).order_by(Booking.date)
+    ]
+    return conflicts
+
+
+def _is_exclusion_violation(error):
+    orig = error.orig
+    return (getattr(orig, 'pgcode', None) or getattr(orig, 'sqlstate', None)) == EXCLUSION_VIOLATION
+
+
+def create_booking(number, start, duration, description=None):
+    """
+    Создает бронирование аудитории number на duration минут начиная со start.
+    Возвращает Booking или бросает BookingConflict; LookupError - если аудитории нет.
+    """
+    end = start + timedelta(minutes=duration)
+    try:
+        _lock_classroom(number)
+        if db.session.get(Classroom, number) is None:
+            raise LookupError(number)
+
+        conflicts = find_conflicts(number, start, end)
+        if conflicts:
+            raise BookingConflict(conflicts)
+
+        booking = Booking(classroom_number=number, date=start, duration=duration, description=description)
+        db.session.add(booking)
+        db.session.commit()
+        return booking
+    except IntegrityError as error:
+        db.session.rollback()
+        if _is_exclusion_violation(error):
+            raise BookingConflict(find_conflicts(number, start, end)) from error
+        raise
+    except Exception:
+        db.session.rollback()
+        raise
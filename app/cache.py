@@ -0,0 +1,146 @@
+"""
+Кэш ответов GET-эндпоинтов с инвалидацией по версии данных
+
+Ключ записи включает версию данных из таблицы data_versions (occupancy.data_version):
+ее увеличивают триггеры на любой коммит, меняющий аудитории, занятия, бронирования,
+пользователей или справочники, в любом процессе - воркере gunicorn, flask import-schedule
+или прямом SQL. Поэтому старые записи становятся недостижимыми сразу после коммита;
+они вытесняются по LRU или истекают по TTL. Ответы несут ETag,
+и при совпадении If-None-Match клиент получает 304 Not Modified без тела.
+
+Хранилище подключаемое: любой объект с методами get/set/clear и version/bump_version
+(например, поверх Redis для нескольких процессов) передается в init_cache или через
+app.config['RESPONSE_CACHE_BACKEND']. По умолчанию используется MemoryCache - свой
+в каждом процессе; версия хранилища увеличивается коммитами этого процесса и только
+освобождает память от записей, которые по версии из базы уже не будут запрошены.
+"""
+import functools
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from itertools import chain
+
+from flask import current_app, has_app_context, request
+from sqlalchemy import event
+
+from models import db, Classroom, Schedule, Booking, User
+from occupancy import data_version
+
+DEFAULT_TTL = 60
+DEFAULT_MAX_ENTRIES = 1024
+
+# Модели, изменение которых меняет ответы кэшируемых эндпоинтов
+CACHED_MODELS = (Classroom, Schedule, Booking, User)
+
+
+class MemoryCache:
+    """Потокобезопасный LRU-кэш с TTL в памяти процесса"""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()   # ключ -> (момент истечения, значение)
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + (ttl or self.ttl), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def version(self):
+        return self._version
+
+    def bump_version(self):
+        with self._lock:
+            self._version += 1
+            # Записи старой версии больше не будут запрошены
+            self._entries.clear()
+            return self._version
+
+
+def init_cache(app, backend=None):
+    """Подключает кэш ответов к приложению"""
+    backend = backend or app.config.get('RESPONSE_CACHE_BACKEND') or MemoryCache(
+        max_entries=app.config.get('RESPONSE_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES),
+        ttl=app.config.get('RESPONSE_CACHE_TTL', DEFAULT_TTL),
+    )
+    app.extensions['response_cache'] = backend
+    return backend
+
+
+def bump_data_version():
+    """Сбросить кэш ответов после изменения данных (безопасно вызывать вне приложения)"""
+    if has_app_context() and 'response_cache' in current_app.extensions:
+        current_app.extensions['response_cache'].bump_version()
+
+
+def cached_response(view):
+    """
+    Декоратор GET-эндпоинта: тело успешного ответа кэшируется по пути, параметрам запроса
+    и версии данных (общей для всех процессов); ETag - хэш тела, условные запросы получают 304.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        backend = current_app.extensions.get('response_cache')
+        if backend is None:
+            return view(*args, **kwargs)
+
+        key = (backend.version(), data_version(db.session), request.path, tuple(sorted(request.args.items(multi=True))))
+        entry = backend.get(key)
+        if entry is None:
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            body = response.get_data()
+            entry = (body, response.mimetype, hashlib.sha1(body).hexdigest()[:16])
+            backend.set(key, entry)
+            state = 'MISS'
+        else:
+            state = 'HIT'
+
+        body, mimetype, etag = entry
+        response = current_app.response_class(body, mimetype=mimetype)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Cache'] = state
+        return response.make_conditional(request)
+    return wrapper
+
+
+# Версия данных меняется только после успешного коммита, затронувшего кэшируемые модели
+@event.listens_for(db.session, 'after_flush')
+def _collect_data_changes(session, flush_context):
+    if not session.info.get('response_cache_dirty'):
+        changed = chain(session.new, session.dirty, session.deleted)
+        session.info['response_cache_dirty'] = any(isinstance(obj, CACHED_MODELS) for obj in changed)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _bump_after_commit(session):
+    if session.info.pop('response_cache_dirty', False):
+        bump_data_version()
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_data_changes(session):
+    session.info.pop('response_cache_dirty', None)
@@ -0,0 +1,47 @@
+"""
+CLI-команды University Management System (flask --app main:create_app <команда>)
+"""
+from datetime import datetime
+
+import click
+
+
+def init_commands(app):
+    """
+    Регистрация CLI-команд приложения
+    """
+
+    @app.cli.command('migrate')
+    def migrate_command():
+        """Создать таблицы и применить недостающие миграции (нужно при DB_INIT_ON_STARTUP=0)"""
+        from models import init_db
+
+        if not init_db():
+            click.echo("✅ Схема базы данных актуальна")
+
+    @app.cli.command('import-schedule')
+    @click.argument('source', type=click.Path(exists=True))
+    @click.option('--semester-start', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+                  help='Начало заменяемого периода (по умолчанию - первая дата в данных)')
+    @click.option('--semester-end', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+                  help='Конец заменяемого периода, не включительно (по умолчанию - день после последней даты)')
+    @click.option('--no-notify', is_flag=True, help='Не рассылать уведомления об изменениях')
+    @click.option('--full', is_flag=True, help='Заменить занятия периода целиком вместо применения разницы')
+    def import_schedule_command(source, semester_start, semester_end, no_notify, full):
+        """Загрузить расписание из CSV, колоночного снимка или каталога .ics файлов"""
+        from flask import current_app
+        from importer import import_schedule
+
+        started = datetime.now()
+        stats = import_schedule(source, semester_start, semester_end, notify=not no_notify, full=full)
+        elapsed = (datetime.now() - started).total_seconds()
+        click.echo(
+            f"✅ Загружено {stats['staged']} строк за {elapsed:.1f} с (отклонено {stats['rejected']}): "
+            f"новых аудиторий {stats['classrooms']}, удалено занятий {stats['deleted']}, "
+            f"добавлено {stats['inserted']}, обновлено {stats['updated']}, изменений {stats['changes']}, "
+            f"iCal-фидов {stats['feeds']}"
+        )
+        if stats['changes']:
+            # Поток рассылки фоновый - процесс команды не должен завершиться раньше него
+            current_app.extensions['notifications'].wait()
+            click.echo("✅ Уведомления разосланы")
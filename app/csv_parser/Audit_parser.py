@@ -1,13 +1,17 @@
 import os
-import time
 import logging
-import requests
+from collections import Counter
+
+from fetcher import run_fetch
+from fetch_manifest import FetchManifest, store_result
 
 # --- 1. Конфигурация ---
 INPUT_FILE = "auth_id.txt"   # Файл с нужными ID аудиторий
 ICAL_DIR = "ical_files"      # Куда сохранять .ics файлы
 BASE_URL_ICAL = "https://eios.kosgos.ru/api/Rasp"
-REQUEST_DELAY = 0.3
+CONCURRENCY = 8              # Одновременных запросов
+RATE_LIMIT = 10.0            # Запросов в секунду на весь процесс
+MAX_RETRIES = 3
 
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
@@ -45,37 +49,41 @@ def download_from_file():
         os.makedirs(ICAL_DIR)
 
     logging.info(f"Найдено {len(ids)} ID для скачивания.")
-    success_count = 0
-    fail_count = 0
-
-    # Основной цикл
-    for audit_id in ids:
-        url = f"{BASE_URL_ICAL}?idAudLine={audit_id}&iCal=true"
-        try:
-            response = requests.get(url, headers=HEADERS, timeout=15)
-            response.raise_for_status()
-
-            if not response.content:
-                logging.warning(f"Пустой ответ для ID: {audit_id}")
-                fail_count += 1
-                continue
-
-            # Сохраняем файл
-            file_path = os.path.join(ICAL_DIR, f"calendar_{audit_id}.ics")
-            with open(file_path, 'wb') as f:
-                f.write(response.content)
-
-            success_count += 1
+    manifest = FetchManifest.load(ICAL_DIR)
+    counts = Counter()
+
+    def save_result(result):
+        audit_id = result.key
+        status = store_result(manifest, ICAL_DIR, f"aud:{audit_id}", f"calendar_{audit_id}.ics", result)
+        counts[status] += 1
+
+        if status == "error":
+            logging.error(f"Ошибка при скачивании ID {audit_id}: {result.error}")
+        elif status == "empty":
+            logging.warning(f"Пустой ответ для ID: {audit_id}")
+        elif status == "updated":
             logging.info(f"Успешно скачан файл для ID {audit_id}")
 
-        except requests.exceptions.RequestException as e:
-            logging.error(f"Ошибка при скачивании ID {audit_id}: {e}")
-            fail_count += 1
-        finally:
-            time.sleep(REQUEST_DELAY)
+    # Основной цикл: все ID загружаются общим движком условными запросами
+    jobs = [
+        (audit_id,
+         f"{BASE_URL_ICAL}?idAudLine={audit_id}&iCal=true",
+         manifest.conditional_headers(f"aud:{audit_id}"))
+        for audit_id in ids
+    ]
+    try:
+        run_fetch(
+            jobs, save_result,
+            headers=HEADERS, concurrency=CONCURRENCY, rate=RATE_LIMIT, retries=MAX_RETRIES
+        )
+    finally:
+        manifest.save()
 
     logging.info(f"--- Скачивание завершено ---")
-    logging.info(f"Успешно: {success_count}, Ошибок: {fail_count}")
+    logging.info(
+        f"Обновлено: {counts['updated']}, без изменений: {counts['not_modified'] + counts['unchanged']}, "
+        f"пустых: {counts['empty']}, ошибок: {counts['error']}"
+    )
 
 
 # --- Точка входа ---
@@ -1,8 +1,16 @@
 import os
+import json
 import time
+import asyncio
 import logging
+import argparse
 import requests
 
+from functools import partial
+
+from fetcher import AsyncFetcher
+from location_filter import BUILDING_B, LocationFilter, classify_stream
+
 # --- 1. Конфигурация ---
 OUTPUT_FILE = "auth_id.txt"  # Файл для записи ID аудиторий с "Б"
 BASE_URL_ICAL = "https://eios.kosgos.ru/api/Rasp"
@@ -10,6 +18,18 @@ START_ID = 3115136
 END_ID = 3130000
 REQUEST_DELAY = 0.3
 
+# --- Параметры параллельного сканера ---
+CHECKPOINT_FILE = "auth_id_scan.json"  # Состояние сканирования для продолжения после сбоя
+SHARD_SIZE = 500          # Размер шарда диапазона ID; шарды сканируются параллельно
+CONCURRENCY = 8           # Одновременных запросов
+RATE_LIMIT = 10.0         # Запросов в секунду на весь процесс
+MAX_RETRIES = 3
+SPARSE_AFTER = 40         # После стольких пустых ID подряд шаг проверки удваивается
+# Максимальный шаг в пустых участках (1 - проверять каждый ID). При шаге больше 1 сканирование
+# с потерями: одиночный ID внутри пропущенного промежутка, соседи которого пусты, не найдется
+MAX_STRIDE = 16
+CHECKPOINT_EVERY = 100    # Сохранять контрольную точку каждые N проверок
+
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
                   'AppleWebKit/537.36 (KHTML, like Gecko) '
@@ -76,6 +96,174 @@ def download_schedule_ids():
     logging.info(f"Результаты сохранены в: {OUTPUT_FILE}")
 
 
+def load_checkpoint(path, start_id, end_id):
+    """Загружает контрольную точку, если она относится к тому же диапазону ID."""
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get("range") == [start_id, end_id]:
+            return state
+
+    shards = {}
+    for shard_start in range(start_id, end_id + 1, SHARD_SIZE):
+        shards[str(shard_start)] = {
+            "end": min(shard_start + SHARD_SIZE - 1, end_id),
+            "next": shard_start,
+            "last_probed": shard_start - 1,
+            "stride": 1,
+            "misses": 0,
+            "skipped": 0,
+        }
+    return {"range": [start_id, end_id], "shards": shards, "found": [], "failed": []}
+
+
+def save_checkpoint(path, state):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def write_ids(path, new_ids):
+    """Однократно записывает найденные ID вместе с уже известными: без дублей, по возрастанию."""
+    ids = set(new_ids)
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            ids.update(int(line) for line in f if line.strip().isdigit())
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.writelines(f"{audit_id}\n" for audit_id in sorted(ids))
+    os.replace(tmp_path, path)
+    return len(ids)
+
+
+async def _scan(state, checkpoint_path, fetcher, predicate, max_stride=MAX_STRIDE):
+    # Календарь читается потоково до первой строки LOCATION, тело целиком не загружается
+    consumer = partial(classify_stream, predicate=predicate)
+    found = set(state["found"])
+    failed = set(state["failed"])
+    probes = {"count": 0}
+    # Шаг из контрольной точки не должен превышать max_stride этого запуска (--dense после прерванного запуска)
+    for shard in state["shards"].values():
+        shard["stride"] = min(shard["stride"], max_stride)
+
+    async def probe(audit_id):
+        url = f"{BASE_URL_ICAL}?idAudLine={audit_id}&iCal=true"
+        result = await fetcher.fetch(audit_id, url, consumer=consumer)
+        probes["count"] += 1
+        if probes["count"] % CHECKPOINT_EVERY == 0:
+            state["found"], state["failed"] = sorted(found), sorted(failed)
+            save_checkpoint(checkpoint_path, state)
+
+        if not result.ok:
+            logging.error(f"Ошибка при запросе ID {audit_id}: {result.error}")
+            failed.add(audit_id)
+            return "error"
+        failed.discard(audit_id)
+        status = result.value
+        if status == "match":
+            found.add(audit_id)
+            logging.info(f"Добавлен ID {audit_id} — найдено 'Б', без 'Б1'")
+        return status
+
+    async def scan_shard(shard):
+        # Адаптивный шаг: в длинных пустых участках проверяется каждый stride-й ID,
+        # при попадании пропущенный промежуток досканируется подряд
+        while shard["next"] <= shard["end"]:
+            audit_id = shard["next"]
+            status = await probe(audit_id)
+
+            if status in ("match", "excluded") and shard["stride"] > 1:
+                # Промежуток после последней проверки больше не пропущен
+                shard["skipped"] = shard.get("skipped", 0) - (audit_id - shard["last_probed"] - 1)
+                shard["stride"], shard["misses"] = 1, 0
+                shard["next"] = shard["last_probed"] + 1
+                continue
+
+            if status == "empty":
+                shard["misses"] += 1
+                if shard["misses"] >= SPARSE_AFTER:
+                    shard["stride"] = min(shard["stride"] * 2, max_stride)
+                    shard["misses"] = 0
+            elif status != "error":
+                shard["misses"] = 0
+
+            shard["last_probed"] = audit_id
+            next_id = audit_id + shard["stride"]
+            if next_id > shard["end"] >= audit_id + 1:
+                # Шаг перешагнул конец шарда - хвост после последней проверки досканируется подряд
+                shard["stride"], next_id = 1, audit_id + 1
+            shard["skipped"] = shard.get("skipped", 0) + min(next_id, shard["end"] + 1) - audit_id - 1
+            shard["next"] = next_id
+
+    await asyncio.gather(*(scan_shard(shard) for shard in state["shards"].values()))
+
+    # ID, упавшие с ошибкой (в том числе в прошлых запусках), проверяем еще раз
+    retry_ids = sorted(failed)
+    await asyncio.gather(*(probe(audit_id) for audit_id in retry_ids))
+
+    state["found"], state["failed"] = sorted(found), sorted(failed)
+    state["done"] = True
+    save_checkpoint(checkpoint_path, state)
+    return probes["count"]
+
+
+def skipped_ids(state):
+    """Сколько ID диапазона не проверялось из-за прореживания (с учетом прошлых запусков)"""
+    return sum(shard.get("skipped", 0) for shard in state["shards"].values())
+
+
+def scan_schedule_ids(start_id=START_ID, end_id=END_ID, checkpoint_path=CHECKPOINT_FILE,
+                      predicate=BUILDING_B, max_stride=MAX_STRIDE):
+    """
+    Параллельный сканер диапазона ID: диапазон делится на шарды, которые проверяются
+    одновременно, длинные пустые участки прореживаются (шаг до max_stride). Прореживание
+    с потерями: одиночные ID посреди пустого участка могут быть пропущены, max_stride=1
+    проверяет каждый ID. Хвост каждого шарда проверяется подряд. Состояние сохраняется
+    в контрольную точку, повторный запуск продолжает с места сбоя.
+    Найденные ID записываются в OUTPUT_FILE одним пакетом.
+    predicate - фильтр по первой строке LOCATION (см. location_filter.LocationFilter).
+    """
+    state = load_checkpoint(checkpoint_path, start_id, end_id)
+    if state.get("done"):
+        logging.info(f"Диапазон {start_id}-{end_id} уже просканирован, контрольная точка: {checkpoint_path}")
+    else:
+        logging.info(f"Сканирование {start_id}-{end_id}: {len(state['shards'])} шардов, "
+                     f"уже найдено {len(state['found'])} ID")
+        with AsyncFetcher(concurrency=CONCURRENCY, rate=RATE_LIMIT, retries=MAX_RETRIES,
+                          headers=HEADERS) as fetcher:
+            probes = asyncio.run(_scan(state, checkpoint_path, fetcher, predicate, max_stride))
+        logging.info(f"Выполнено {probes} запросов на {end_id - start_id + 1} ID, "
+                     f"ошибок: {len(state['failed'])}")
+        skipped = skipped_ids(state)
+        if skipped:
+            logging.warning(f"В пустых участках не проверено {skipped} ID: одиночные аудитории среди них "
+                            f"могли быть пропущены (--dense проверяет каждый ID)")
+
+    total = write_ids(OUTPUT_FILE, state["found"])
+    logging.info("--- Сканирование завершено ---")
+    logging.info(f"Найдено {len(state['found'])} аудиторий с 'Б' (без 'Б1'), всего в {OUTPUT_FILE}: {total}")
+
+
 # --- Точка входа ---
 if __name__ == '__main__':
-    download_schedule_ids()
+    parser = argparse.ArgumentParser(
+        description="Поиск ID аудиторий корпуса 'Б'. По умолчанию длинные пустые участки проверяются "
+                    f"с шагом до {MAX_STRIDE}, поэтому одиночные ID в них могут быть пропущены")
+    parser.add_argument("--sequential", action="store_true",
+                        help="Старый последовательный режим с паузой после каждого запроса")
+    parser.add_argument("--start", type=int, default=START_ID)
+    parser.add_argument("--end", type=int, default=END_ID)
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE)
+    parser.add_argument("--dense", action="store_true",
+                        help="Проверять каждый ID без прореживания (без потерь, но больше запросов)")
+    parser.add_argument("--prefix", default="Б", help="Префикс корпуса в LOCATION")
+    parser.add_argument("--exclude", nargs="*", default=["Б1"], help="Исключаемые префиксы LOCATION")
+    args = parser.parse_args()
+
+    if args.sequential:
+        download_schedule_ids()
+    else:
+        scan_schedule_ids(args.start, args.end, args.checkpoint,
+                          LocationFilter(args.prefix, exclude=args.exclude), 1 if args.dense else MAX_STRIDE)
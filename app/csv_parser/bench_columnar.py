@@ -0,0 +1,81 @@
+"""
+Бенчмарк загрузки семестра: university_schedule.csv против колоночного снимка columnar.py.
+
+Синтетические строки пишутся в оба формата во временный каталог, затем измеряются
+размер на диске, время загрузки и пиковая память Python (tracemalloc) для:
+    csv      - csv.reader, все строки в памяти
+    columnar - load_snapshot (mmap) и подсчет занятий по группам через np.bincount
+
+Запуск: python bench_columnar.py --rows 1000000
+"""
+import argparse
+import csv
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from bench_extract import make_events
+from columnar import SnapshotWriter, load_snapshot
+from parser_to_csv import FIELDNAMES, event_to_row
+
+
+def dir_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def load_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))[1:]
+    groups = {}
+    for row in rows:
+        groups[row[8]] = groups.get(row[8], 0) + 1
+    return len(rows), len(groups)
+
+
+def load_columnar(path):
+    snapshot = load_snapshot(path)
+    per_group = np.bincount(snapshot["group"], minlength=len(snapshot.dictionaries["group"]))
+    return len(snapshot), int(np.count_nonzero(per_group))
+
+
+def measure(name, load, path):
+    tracemalloc.start()
+    started = time.perf_counter()
+    rows, groups = load(path)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:>9} {dir_size(path) / 2 ** 20:>9.1f} {elapsed * 1000:>10.1f} {peak / 2 ** 20:>10.1f} "
+          f"{rows:>9} {groups:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "university_schedule.csv")
+        snapshot_path = os.path.join(tmp, "university_schedule.cols")
+        writer = SnapshotWriter()
+        with open(csv_path, "w", newline="", encoding="utf-8") as f:
+            csv_writer = csv.writer(f)
+            csv_writer.writerow(FIELDNAMES)
+            for event in make_events(args.rows):
+                row = event_to_row(event)
+                csv_writer.writerow(row)
+                writer.add(row)
+        writer.save(snapshot_path)
+
+        print(f"{'format':>9} {'disk MiB':>9} {'load ms':>10} {'peak MiB':>10} {'rows':>9} {'groups':>7}")
+        measure("csv", load_csv, csv_path)
+        measure("columnar", load_columnar, snapshot_path)
+
+
+if __name__ == "__main__":
+    main()
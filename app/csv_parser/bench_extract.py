@@ -0,0 +1,111 @@
+"""
+Микробенчмарк преобразования события в строку CSV (строк в секунду).
+
+Сравнивает исходный код parser_to_csv (re.search без компиляции, strptime/strftime,
+словарь дней недели на каждую строку) с текущим event_to_row на одном и том же наборе событий.
+
+Запуск: python bench_extract.py --events 200000
+"""
+import argparse
+import random
+import re
+import time
+from datetime import datetime, timedelta
+
+from ics_stream import Event
+from parser_to_csv import event_to_row, format_datetime, day_of_week, split_summary, parse_description
+
+SEMESTER_START = datetime(2025, 9, 1, 5, 10)
+
+
+def make_events(count, seed=0):
+    """События с реалистичной повторяемостью преподавателей, групп и времен пар."""
+    rnd = random.Random(seed)
+    events = []
+    for _ in range(count):
+        start = SEMESTER_START + timedelta(days=rnd.randrange(120), hours=rnd.choice([0, 2, 3, 5, 7]))
+        end = start + timedelta(minutes=90)
+        events.append(Event(
+            summary=f"{rnd.choice(['лек', 'пр', 'лаб'])} Дисциплина {rnd.randrange(200)}",
+            start=f"{start:%Y%m%dT%H%M%SZ}",
+            end=f"{end:%Y%m%dT%H%M%SZ}",
+            location=f"Б-{rnd.randrange(100, 400)}",
+            description=f"Преподаватель Преподаватель{rnd.randrange(300)} А.Б., "
+                        f"группа: 2{rnd.randrange(5)}-ДИбо-{rnd.randrange(1, 6)}",
+        ))
+    return events
+
+
+def legacy_event_to_row(e):
+    """Исходный горячий путь parser_to_csv.main."""
+    def format_dt(dt_str):
+        try:
+            dt = datetime.strptime(dt_str, "%Y%m%dT%H%M%SZ")
+            return dt.strftime("%Y-%m-%d"), dt.strftime("%H:%M")
+        except Exception:
+            return None, None
+
+    start_date, start_time = format_dt(e.start)
+    _, end_time = format_dt(e.end)
+
+    parts = e.summary.split(" ", 1) if e.summary else []
+    if len(parts) == 2:
+        lesson_type, subject = parts
+    else:
+        lesson_type, subject = "", e.summary or ""
+
+    teacher, group = "", ""
+    if e.description:
+        teacher_match = re.search(r"Преподаватель\s([^,]+)", e.description)
+        group_match = re.search(r"группа:\s*([\w\-А-Яа-я]+)", e.description)
+        if teacher_match:
+            teacher = teacher_match.group(1).strip()
+        if group_match:
+            group = group_match.group(1).strip()
+
+    day_name = ""
+    if start_date:
+        day_name = datetime.strptime(start_date, "%Y-%m-%d").strftime("%A")
+        days_ru = {
+            "Monday": "Понедельник", "Tuesday": "Вторник", "Wednesday": "Среда",
+            "Thursday": "Четверг", "Friday": "Пятница", "Saturday": "Суббота", "Sunday": "Воскресенье"
+        }
+        day_name = days_ru.get(day_name, day_name)
+
+    return (start_date or "", day_name, start_time or "", end_time or "",
+            lesson_type, subject, teacher, e.location, group)
+
+
+def clear_caches():
+    for func in (format_datetime, day_of_week, split_summary, parse_description):
+        func.cache_clear()
+
+
+def run(name, convert, events):
+    started = time.perf_counter()
+    rows = [convert(e) for e in events]
+    elapsed = time.perf_counter() - started
+    print(f"{name:>8} {len(rows):>10} {elapsed:>8.3f} {len(rows) / elapsed:>12.0f}")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=200000)
+    args = parser.parse_args()
+
+    events = make_events(args.events)
+    clear_caches()
+
+    print(f"{'path':>8} {'rows':>10} {'seconds':>8} {'rows/sec':>12}")
+    before = run("legacy", legacy_event_to_row, events)
+    after = run("cached", event_to_row, events)
+    if before != after:
+        print("⚠️ Результаты старой и новой реализации различаются")
+
+    info = parse_description.cache_info()
+    print(f"parse_description: hits={info.hits} misses={info.misses}")
+
+
+if __name__ == '__main__':
+    main()
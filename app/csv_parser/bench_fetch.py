@@ -0,0 +1,50 @@
+"""
+Бенчмарк движка загрузки: файлов в секунду при разном уровне параллелизма.
+Запросы идут к локальной заглушке stub_server, настоящий сервер не используется.
+
+Запуск: python bench_fetch.py --files 200 --latency 0.05
+"""
+import argparse
+import logging
+import time
+
+from fetcher import run_fetch
+from stub_server import start_stub_server
+
+CONCURRENCY_LEVELS = [1, 2, 4, 8, 16, 32]
+
+
+def bench(base_url, files, concurrency, rate):
+    jobs = [(i, f"{base_url}?idGroup={8149 + i}&iCal=true") for i in range(files)]
+    started = time.perf_counter()
+    results = run_fetch(jobs, concurrency=concurrency, rate=rate, retries=3, backoff=0.05)
+    elapsed = time.perf_counter() - started
+    ok = sum(1 for r in results if r.ok)
+    retries = sum(r.attempts - 1 for r in results)
+    return ok, retries, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05, help="Задержка ответа заглушки, секунды")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Доля ответов 503 от заглушки")
+    parser.add_argument("--rate", type=float, default=None, help="Лимит запросов в секунду (по умолчанию без лимита)")
+    parser.add_argument("--levels", type=int, nargs="+", default=CONCURRENCY_LEVELS)
+    args = parser.parse_args()
+
+    # Повторы логируются движком как WARNING - в бенчмарке они не нужны
+    logging.getLogger().setLevel(logging.ERROR)
+
+    server, base_url = start_stub_server(latency=args.latency, error_rate=args.error_rate)
+    try:
+        print(f"{'concurrency':>11} {'ok':>6} {'retries':>8} {'seconds':>8} {'files/sec':>10}")
+        for level in args.levels:
+            ok, retries, elapsed = bench(base_url, args.files, level, args.rate)
+            print(f"{level:>11} {ok:>6} {retries:>8} {elapsed:>8.2f} {ok / elapsed:>10.1f}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
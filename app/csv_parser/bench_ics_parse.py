@@ -0,0 +1,154 @@
+"""
+Бенчмарк разбора .ics: старый парсер на readlines() против потокового ics_stream.
+
+Генерирует синтетический корпус заданного размера (с продолженными строками
+и свойствами DTSTART;TZID=...), измеряет скорость разбора всего корпуса
+и пиковую память на разборе одного файла.
+
+Запуск: python bench_ics_parse.py --size-mb 300 --files 30
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from ics_stream import iter_events
+
+SEMESTER_START = datetime(2025, 9, 1, 5, 10)
+
+
+def fold(line, limit=75):
+    """Сворачивает строку по RFC 5545 (продолжение начинается с пробела)."""
+    if len(line) <= limit:
+        return line
+    parts = [line[:limit]]
+    for pos in range(limit, len(line), limit - 1):
+        parts.append(" " + line[pos:pos + limit - 1])
+    return "\r\n".join(parts)
+
+
+def write_calendar(path, target_bytes, seed):
+    rnd = random.Random(seed)
+    written = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//bench//RU\r\n")
+        i = 0
+        while written < target_bytes:
+            start = SEMESTER_START + timedelta(days=rnd.randrange(120), hours=rnd.choice([0, 2, 3, 5, 7]))
+            end = start + timedelta(minutes=90)
+            if i % 2:
+                dtstart = f"DTSTART:{start:%Y%m%dT%H%M%SZ}"
+                dtend = f"DTEND:{end:%Y%m%dT%H%M%SZ}"
+            else:
+                dtstart = f"DTSTART;TZID=Europe/Moscow:{start:%Y%m%dT%H%M%S}"
+                dtend = f"DTEND;TZID=Europe/Moscow:{end:%Y%m%dT%H%M%S}"
+            description = (f"DESCRIPTION:Преподаватель Преподаватель{rnd.randrange(300)} А.Б.\\, "
+                           f"группа: 2{rnd.randrange(5)}-ДИбо-{rnd.randrange(1, 6)}\\nКомментарий к занятию")
+            event = "\r\n".join([
+                "BEGIN:VEVENT",
+                f"UID:{seed}-{i}@bench",
+                dtstart,
+                dtend,
+                f"SUMMARY:{rnd.choice(['лек', 'пр', 'лаб'])} Дисциплина {rnd.randrange(200)}",
+                f"LOCATION:Б-{rnd.randrange(100, 400)}",
+                fold(description),
+                "END:VEVENT",
+            ]) + "\r\n"
+            f.write(event)
+            written += len(event.encode("utf-8"))
+            i += 1
+        f.write("END:VCALENDAR\r\n")
+
+
+def legacy_parse_ics_file(file_path):
+    """Исходная реализация parser_to_csv.parse_ics_file (readlines + цепочка startswith)."""
+    with open(file_path, "r", encoding="utf-8") as f:
+        lines = f.readlines()
+
+    events = []
+    inside_event = False
+    buffer = []
+    for line in lines:
+        line = line.strip()
+        if line == "BEGIN:VEVENT":
+            inside_event = True
+            buffer = []
+        elif line == "END:VEVENT":
+            inside_event = False
+            event = {}
+            for item in buffer:
+                item = item.strip()
+                if item.startswith("SUMMARY:"):
+                    event["summary"] = item.replace("SUMMARY:", "").strip()
+                elif item.startswith("DTSTART:"):
+                    event["start"] = item.split(":")[1].strip()
+                elif item.startswith("DTEND:"):
+                    event["end"] = item.split(":")[1].strip()
+                elif item.startswith("LOCATION:"):
+                    event["location"] = item.replace("LOCATION:", "").strip()
+                elif item.startswith("DESCRIPTION:"):
+                    event["description"] = item.replace("DESCRIPTION:", "").strip()
+            if event:
+                events.append(event)
+        elif inside_event:
+            buffer.append(line)
+    return events
+
+
+def count_legacy(path):
+    return len(legacy_parse_ics_file(path))
+
+
+def count_stream(path):
+    return sum(1 for _ in iter_events(path))
+
+
+def run(name, counter, files, total_bytes):
+    started = time.perf_counter()
+    events = sum(counter(path) for path in files)
+    elapsed = time.perf_counter() - started
+
+    # Пиковая память - на одном файле, под tracemalloc (он сильно замедляет разбор)
+    tracemalloc.start()
+    counter(files[0])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{name:>8} {events:>10} {elapsed:>8.2f} {events / elapsed:>12.0f} "
+          f"{total_bytes / elapsed / 2 ** 20:>7.1f} {peak / 2 ** 20:>12.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=300, help="Общий размер корпуса, МБ")
+    parser.add_argument("--files", type=int, default=30, help="Число файлов в корпусе")
+    parser.add_argument("--dir", help="Каталог корпуса (по умолчанию временный, удаляется после запуска)")
+    args = parser.parse_args()
+
+    corpus_dir = args.dir or tempfile.mkdtemp(prefix="ics_bench_")
+    os.makedirs(corpus_dir, exist_ok=True)
+    try:
+        per_file = args.size_mb * 2 ** 20 // args.files
+        files = []
+        for n in range(args.files):
+            path = os.path.join(corpus_dir, f"calendar_{n}.ics")
+            if not os.path.exists(path):
+                write_calendar(path, per_file, seed=n)
+            files.append(path)
+        total_bytes = sum(os.path.getsize(path) for path in files)
+        print(f"Корпус: {len(files)} файлов, {total_bytes / 2 ** 20:.0f} МБ в {corpus_dir}")
+
+        print(f"{'parser':>8} {'events':>10} {'seconds':>8} {'events/sec':>12} {'MB/s':>7} {'peak MB/file':>12}")
+        run("legacy", count_legacy, files, total_bytes)
+        run("stream", count_stream, files, total_bytes)
+    finally:
+        if not args.dir:
+            shutil.rmtree(corpus_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""
+Колоночный снимок расписания на NumPy
+
+Каталог (по умолчанию university_schedule.cols) с файлом .npy на каждую колонку:
+    start, end                          int64, секунды от 1970-01-01 по времени из расписания
+                                        (без часового пояса); MISSING - значения нет
+    type, subject, teacher, location,   int32, коды в словарях dictionaries.json -
+    group                               каждая строка хранится один раз
+День недели не хранится - он вычисляется из start. Файлы .npy открываются через
+np.load(mmap_mode='r'): загрузка семестра - это отображение файлов в память без разбора строк.
+
+Запись идет потоково через SnapshotWriter, каталог подменяется атомарно.
+"""
+import json
+import os
+import shutil
+from array import array
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+META_FILE = "meta.json"
+DICTIONARIES_FILE = "dictionaries.json"
+FORMAT_VERSION = 1
+
+TIME_COLUMNS = ("start", "end")
+TEXT_COLUMNS = ("type", "subject", "teacher", "location", "group")
+MISSING = np.iinfo(np.int64).min
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+# 1970-01-01 - четверг (0 - понедельник)
+_EPOCH_WEEKDAY = 3
+DAYS_RU = ("Понедельник", "Вторник", "Среда", "Четверг", "Пятница", "Суббота", "Воскресенье")
+
+
+class SnapshotWriter:
+    """
+    Накопитель строк parser_to_csv.FIELDNAMES
+    (date, day, start_time, end_time, type, subject, teacher, location, group).
+    """
+
+    def __init__(self):
+        self.times = {name: array('q') for name in TIME_COLUMNS}
+        self.codes = {name: array('i') for name in TEXT_COLUMNS}
+        self.dictionaries = {name: {} for name in TEXT_COLUMNS}
+        self._days = {}
+        self._minutes = {}
+
+    def _seconds(self, day, clock):
+        """'2025-10-20', '07:10' -> секунды от эпохи; MISSING, если даты или времени нет"""
+        if not day or not clock:
+            return MISSING
+        days = self._days.get(day)
+        if days is None:
+            days = self._days[day] = date.fromisoformat(day).toordinal() - _EPOCH_ORDINAL
+        minutes = self._minutes.get(clock)
+        if minutes is None:
+            hours, _, mins = clock.partition(":")
+            minutes = self._minutes[clock] = int(hours) * 60 + int(mins)
+        return days * 86400 + minutes * 60
+
+    def add(self, row):
+        day, _, start_time, end_time = row[:4]
+        self.times["start"].append(self._seconds(day, start_time))
+        self.times["end"].append(self._seconds(day, end_time))
+        for name, value in zip(TEXT_COLUMNS, row[4:]):
+            dictionary = self.dictionaries[name]
+            code = dictionary.get(value)
+            if code is None:
+                code = dictionary[value] = len(dictionary)
+            self.codes[name].append(code)
+
+    def __len__(self):
+        return len(self.times["start"])
+
+    def save(self, path):
+        """Записывает снимок во временный каталог и подменяет им path"""
+        tmp_path = f"{path}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        for name, values in self.times.items():
+            np.save(os.path.join(tmp_path, f"{name}.npy"), np.frombuffer(values, dtype=np.int64))
+        for name, values in self.codes.items():
+            np.save(os.path.join(tmp_path, f"{name}.npy"), np.frombuffer(values, dtype=np.int32))
+        with open(os.path.join(tmp_path, DICTIONARIES_FILE), "w", encoding="utf-8") as f:
+            # Порядок вставки в dict совпадает с кодами
+            json.dump({name: list(values) for name, values in self.dictionaries.items()}, f, ensure_ascii=False)
+        with open(os.path.join(tmp_path, META_FILE), "w", encoding="utf-8") as f:
+            json.dump({"version": FORMAT_VERSION, "rows": len(self)}, f)
+
+        old_path = f"{path}.old"
+        shutil.rmtree(old_path, ignore_errors=True)
+        if os.path.exists(path):
+            os.replace(path, old_path)
+        os.replace(tmp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+
+class Snapshot:
+    """Загруженный снимок: колонки - массивы NumPy (по умолчанию отображенные в память)"""
+
+    def __init__(self, columns, dictionaries):
+        self.columns = columns
+        self.dictionaries = dictionaries
+        self._lookup = {}
+
+    def __len__(self):
+        return len(self.columns["start"])
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def dictionary(self, name):
+        """Словарь колонки как массив NumPy: dictionary(name)[codes] декодирует колонку"""
+        values = self._lookup.get(name)
+        if values is None:
+            values = self._lookup[name] = np.array(self.dictionaries[name], dtype=object)
+        return values
+
+    def code(self, name, value):
+        """Код строки в словаре колонки или -1 - для фильтров вида snapshot['group'] == code"""
+        try:
+            return self.dictionaries[name].index(value)
+        except ValueError:
+            return -1
+
+    def decode(self, name):
+        return self.dictionary(name)[self.columns[name]]
+
+    def weekday(self):
+        """День недели каждой строки (0 - понедельник, -1 - нет даты)"""
+        start = self.columns["start"]
+        return np.where(start == MISSING, -1, (start // 86400 + _EPOCH_WEEKDAY) % 7)
+
+    def iter_rows(self):
+        """Строки в формате parser_to_csv.FIELDNAMES"""
+        dictionaries = [self.dictionaries[name] for name in TEXT_COLUMNS]
+        codes = [self.columns[name].tolist() for name in TEXT_COLUMNS]
+        for i, (start, end) in enumerate(zip(self.columns["start"].tolist(), self.columns["end"].tolist())):
+            text = [dictionary[column[i]] for dictionary, column in zip(dictionaries, codes)]
+            if start == MISSING:
+                yield ("", "", "", "", *text)
+                continue
+            moment = _EPOCH + timedelta(seconds=start)
+            end_time = "" if end == MISSING else f"{_EPOCH + timedelta(seconds=end):%H:%M}"
+            yield (f"{moment:%Y-%m-%d}", DAYS_RU[moment.weekday()], f"{moment:%H:%M}", end_time, *text)
+
+
+def load_snapshot(path, mmap=True):
+    """Открывает снимок; mmap=False читает колонки в память целиком"""
+    with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("version") != FORMAT_VERSION:
+        raise ValueError(f"Неподдерживаемая версия снимка {path}: {meta.get('version')}")
+    with open(os.path.join(path, DICTIONARIES_FILE), encoding="utf-8") as f:
+        dictionaries = json.load(f)
+    mode = "r" if mmap else None
+    columns = {
+        name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode)
+        for name in TIME_COLUMNS + TEXT_COLUMNS
+    }
+    return Snapshot(columns, dictionaries)
+
+
+def is_snapshot(path):
+    return os.path.isfile(os.path.join(path, META_FILE))
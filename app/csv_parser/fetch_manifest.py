@@ -0,0 +1,114 @@
+"""
+Манифест скачанных .ics файлов.
+
+Для каждого ID группы или аудитории хранит ETag, Last-Modified и sha256 содержимого,
+чтобы повторная загрузка отправляла условные запросы, а неизменившиеся
+файлы не перезаписывались и не разбирались заново.
+"""
+import hashlib
+import json
+import os
+
+MANIFEST_NAME = "manifest.json"
+
+
+def content_hash(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+class FetchManifest:
+    """
+    Записи манифеста хранятся по ключу вида "group:8149" или "aud:3114959":
+    {"file": ..., "etag": ..., "last_modified": ..., "sha256": ..., "parsed_sha256": ...}
+    """
+
+    def __init__(self, path, entries=None):
+        self.path = path
+        self.entries = entries or {}
+
+    @classmethod
+    def load(cls, ical_dir):
+        path = os.path.join(ical_dir, MANIFEST_NAME)
+        if not os.path.exists(path):
+            return cls(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(path, json.load(f).get("entries", {}))
+
+    def save(self):
+        """Атомарно записывает манифест, чтобы сбой не оставил его наполовину записанным."""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"entries": self.entries}, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def conditional_headers(self, key, headers=None):
+        """Заголовки If-None-Match / If-Modified-Since для условного запроса."""
+        headers = dict(headers or {})
+        entry = self.entries.get(key)
+        if entry and os.path.exists(os.path.join(os.path.dirname(self.path), entry["file"])):
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def record(self, key, file_name, content, response_headers):
+        """
+        Запоминает результат загрузки.
+        Возвращает True, если содержимое изменилось и файл нужно перезаписать.
+        """
+        digest = content_hash(content)
+        entry = self.entries.setdefault(key, {"file": file_name})
+        changed = entry.get("sha256") != digest or entry.get("file") != file_name
+        entry.update(
+            file=file_name,
+            sha256=digest,
+            etag=response_headers.get("ETag"),
+            last_modified=response_headers.get("Last-Modified"),
+        )
+        return changed
+
+    def forget(self, key):
+        """Удаляет запись; возвращает имя файла, который больше не актуален."""
+        entry = self.entries.pop(key, None)
+        return entry["file"] if entry else None
+
+    def pending_parse(self, file_names):
+        """Имена файлов, которые изменились с последнего разбора или не отслеживаются манифестом."""
+        parsed = {
+            entry["file"] for entry in self.entries.values()
+            if entry.get("sha256") and entry.get("parsed_sha256") == entry["sha256"]
+        }
+        return [name for name in file_names if name not in parsed]
+
+    def mark_parsed(self):
+        for entry in self.entries.values():
+            entry["parsed_sha256"] = entry.get("sha256")
+
+
+def store_result(manifest, ical_dir, key, file_name, result):
+    """
+    Сохраняет результат загрузки (FetchResult) с учетом манифеста.
+    Возвращает одно из: 'error', 'not_modified', 'empty', 'unchanged', 'updated'.
+    """
+    if result.status == 304:
+        return "not_modified"
+    if not result.ok:
+        return "error"
+
+    file_path = os.path.join(ical_dir, file_name)
+    if not result.content:
+        # Расписание пропало - удаляем устаревший файл, чтобы он не попал в CSV
+        manifest.forget(key)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        return "empty"
+
+    if not manifest.record(key, file_name, result.content, result.headers) and os.path.exists(file_path):
+        return "unchanged"
+
+    tmp_path = file_path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(result.content)
+    os.replace(tmp_path, file_path)
+    return "updated"
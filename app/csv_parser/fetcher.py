@@ -0,0 +1,210 @@
+"""
+Общий асинхронный движок загрузки .ics файлов.
+
+Используется rasp_parser и Audit_parser: пул keep-alive соединений,
+ограничение числа одновременных запросов, глобальный token bucket
+вместо фиксированной паузы между запросами и повтор с экспоненциальной задержкой.
+"""
+import asyncio
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# --- Конфигурация по умолчанию ---
+DEFAULT_CONCURRENCY = 8        # Одновременных запросов
+DEFAULT_RATE = 10.0            # Запросов в секунду на весь процесс (None - без ограничения)
+DEFAULT_RETRIES = 3            # Повторов после первой неудачной попытки
+DEFAULT_BACKOFF = 0.5          # Базовая задержка перед повтором, секунды
+DEFAULT_TIMEOUT = 15
+# Коды ответа, при которых имеет смысл повторить запрос
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Потоковое чтение: размер блока и остаток тела, который дешевле дочитать,
+# чем терять keep-alive соединение
+STREAM_CHUNK_SIZE = 4096
+DRAIN_LIMIT = 16 * 1024
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
+                  'AppleWebKit/537.36 (KHTML, like Gecko) '
+                  'Chrome/108.0.0.0 Safari/537.36',
+    'Accept': 'application/json'
+}
+
+
+class TokenBucket:
+    """
+    Глобальный ограничитель частоты запросов.
+    Пополняется со скоростью rate токенов в секунду, вмещает не более capacity.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate or 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Ждет, пока в ведре появится токен, и забирает его."""
+        if not self.rate:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+@dataclass
+class FetchResult:
+    """Результат загрузки одного ID."""
+    key: object
+    url: str
+    status: int = None
+    content: bytes = None
+    headers: dict = field(default_factory=dict)
+    error: str = None
+    value: object = None          # Результат consumer при потоковом чтении
+    attempts: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def ok(self):
+        return self.error is None and self.status is not None and self.status < 400
+
+
+class AsyncFetcher:
+    """
+    Асинхронный загрузчик поверх пула keep-alive соединений requests.
+
+    Сетевые вызовы выполняются в пуле потоков размером concurrency,
+    планирование, ограничение частоты и повторы - в цикле событий asyncio.
+    """
+
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE,
+                 retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF,
+                 timeout=DEFAULT_TIMEOUT, headers=None):
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.bucket = TokenBucket(rate)
+
+        # Один Session на все потоки: пул urllib3 потокобезопасен и держит соединения открытыми
+        self.session = requests.Session()
+        self.session.headers.update(headers or DEFAULT_HEADERS)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency, pool_block=True)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='fetch')
+        self._semaphore = None
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _get(self, url, headers, consumer=None):
+        """
+        Блокирующий GET, выполняется в пуле потоков.
+        Если задан consumer, тело не загружается целиком: consumer получает итератор
+        блоков и может прекратить чтение, вернув результат раньше.
+        """
+        if consumer is None:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+            return response.status_code, response.content, dict(response.headers), None
+
+        response = self.session.get(url, headers=headers, timeout=self.timeout, stream=True)
+        try:
+            value = consumer(response.iter_content(STREAM_CHUNK_SIZE)) if response.status_code < 400 else None
+        except BaseException:
+            response.close()
+            raise
+
+        # Небольшой остаток дочитываем, чтобы вернуть соединение в пул; иначе рвем соединение
+        length = response.headers.get('Content-Length', '')
+        if length.isdigit() and int(length) - response.raw.tell() <= DRAIN_LIMIT:
+            response.raw.drain_conn()
+            response.raw.release_conn()
+        else:
+            response.close()
+        return response.status_code, None, dict(response.headers), value
+
+    def _retry_delay(self, attempt, headers=None):
+        """Экспоненциальная задержка с джиттером; учитывает Retry-After."""
+        retry_after = (headers or {}).get('Retry-After')
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return self.backoff * (2 ** attempt) * (1 + random.random())
+
+    async def fetch(self, key, url, headers=None, consumer=None):
+        """
+        Загружает один URL с повторами при сетевых ошибках и кодах из RETRY_STATUSES.
+        consumer - см. _get; его результат попадает в FetchResult.value.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        loop = asyncio.get_running_loop()
+        result = FetchResult(key=key, url=url)
+        started = time.perf_counter()
+
+        for attempt in range(self.retries + 1):
+            result.attempts = attempt + 1
+            await self.bucket.acquire()
+            try:
+                async with self._semaphore:
+                    status, content, resp_headers, value = await loop.run_in_executor(
+                        self._executor, self._get, url, headers, consumer
+                    )
+            except requests.exceptions.RequestException as e:
+                result.error = str(e)
+                resp_headers = None
+            else:
+                result.status, result.content, result.headers = status, content, resp_headers
+                result.value = value
+                result.error = None if status < 400 else f"HTTP {status}"
+                if status not in RETRY_STATUSES:
+                    break
+
+            if attempt < self.retries:
+                delay = self._retry_delay(attempt, resp_headers)
+                logging.warning(f"Повтор {attempt + 1}/{self.retries} для {key} через {delay:.1f} с: {result.error}")
+                await asyncio.sleep(delay)
+
+        result.elapsed = time.perf_counter() - started
+        return result
+
+    async def fetch_all(self, jobs, on_result=None):
+        """
+        Загружает все задания (key, url[, headers]).
+        on_result вызывается для каждого результата по мере готовности.
+        """
+        tasks = [asyncio.create_task(self.fetch(*job)) for job in jobs]
+        results = []
+        for task in asyncio.as_completed(tasks):
+            result = await task
+            if on_result is not None:
+                on_result(result)
+            results.append(result)
+        return results
+
+
+def run_fetch(jobs, on_result=None, **options):
+    """Синхронная обертка: загружает задания и возвращает список FetchResult."""
+    with AsyncFetcher(**options) as fetcher:
+        return asyncio.run(fetcher.fetch_all(jobs, on_result))
@@ -0,0 +1,179 @@
+"""
+Потоковый однопроходный парсер .ics файлов (RFC 5545).
+
+Файл читается построчно без readlines(), продолженные строки (folding)
+склеиваются, свойства с параметрами (DTSTART;TZID=...) распознаются,
+события выдаются генератором в виде компактных кортежей Event.
+Память не зависит от размера файла.
+
+Время с TZID переводится в UTC (20251020T071000Z), как у остальных событий eios.kosgos.ru:
+дальше по конвейеру все времена считаются UTC. Событие с неизвестной зоной получает
+пустое время и отбрасывается при загрузке, а не сохраняется со сдвигом.
+"""
+from collections import namedtuple
+from datetime import datetime, timezone
+from functools import lru_cache
+from itertools import chain
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+# Компактная запись события; отсутствующие свойства - пустые строки
+Event = namedtuple("Event", ["summary", "start", "end", "location", "description"])
+
+# Диспетчеризация свойств через словарь: имя свойства -> позиция в Event
+PROPERTY_INDEX = {
+    "SUMMARY": 0,
+    "DTSTART": 1,
+    "DTEND": 2,
+    "LOCATION": 3,
+    "DESCRIPTION": 4,
+}
+# Свойства с текстовым значением, в которых нужно раскрыть экранирование (\n, \, \; \\)
+TEXT_PROPERTIES = {0, 3, 4}
+# Свойства-даты, у которых учитывается параметр TZID
+TIME_PROPERTIES = {1, 2}
+# Продолженная строка начинается с пробела или табуляции (RFC 5545, 3.1)
+FOLD_PREFIXES = (" ", "\t")
+
+
+def unescape_text(value):
+    """Раскрывает экранирование TEXT-значений RFC 5545 (\\n, \\, \\; \\\\)."""
+    if "\\" not in value:
+        return value
+    return (value.replace("\\\\", "\x00")
+            .replace("\\n", "\n").replace("\\N", "\n")
+            .replace("\\,", ",").replace("\\;", ";")
+            .replace("\x00", "\\"))
+
+
+def unfold_lines(lines):
+    """
+    Склеивает продолженные строки: строка, начинающаяся с пробела или табуляции,
+    продолжает предыдущую (RFC 5545, 3.1).
+    """
+    current = None
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t"):
+            if current is not None:
+                current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current is not None:
+        yield current
+
+
+def _value_colon(line, semicolon):
+    """Позиция двоеточия перед значением; двоеточия внутри кавычек в параметрах пропускаются"""
+    colon = line.find(":")
+    if '"' in line[semicolon:colon]:
+        in_quotes = False
+        for pos in range(semicolon, len(line)):
+            ch = line[pos]
+            if ch == '"':
+                in_quotes = not in_quotes
+            elif ch == ":" and not in_quotes:
+                return pos
+    return colon
+
+
+def split_property(line):
+    """
+    Разбирает строку свойства на (имя, значение), отбрасывая параметры:
+    'DTSTART;TZID=Europe/Moscow:20251020T101000' -> ('DTSTART', '20251020T101000').
+    Двоеточия внутри кавычек в параметрах не считаются разделителем.
+    """
+    colon = line.find(":")
+    if colon == -1:
+        return line, ""
+    semicolon = line.find(";", 0, colon)
+    if semicolon == -1:
+        return line[:colon], line[colon + 1:]
+    return line[:semicolon], line[_value_colon(line, semicolon) + 1:]
+
+
+def property_param(line, param):
+    """Значение параметра свойства: property_param('DTSTART;TZID=Europe/Moscow:...', 'TZID') -> 'Europe/Moscow'"""
+    semicolon = line.find(";")
+    if semicolon == -1:
+        return None
+    colon = _value_colon(line, semicolon)
+    if colon < semicolon:
+        return None
+    for part in line[semicolon + 1:colon].split(";"):
+        name, _, value = part.partition("=")
+        if name.strip().upper() == param:
+            return value.strip().strip('"')
+    return None
+
+
+@lru_cache(maxsize=256)
+def _header_tzid(header):
+    """TZID из заголовка свойства без кавычек ('DTSTART;TZID=Europe/Moscow'); заголовки повторяются"""
+    return property_param(header + ":", "TZID")
+
+
+@lru_cache(maxsize=4096)
+def to_utc(value, tzid):
+    """
+    Местное время зоны tzid в UTC: ('20251020T101000', 'Europe/Moscow') -> '20251020T071000Z'.
+    Значения в UTC и даты без времени не меняются; неизвестная зона или некорректное время - "".
+    """
+    if not tzid or value.endswith("Z") or len(value) < 15:
+        return value
+    try:
+        local = datetime.strptime(value[:15], "%Y%m%dT%H%M%S").replace(tzinfo=ZoneInfo(tzid))
+    except (ValueError, ZoneInfoNotFoundError):
+        return ""
+    return local.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def parse_lines(lines):
+    """Генератор событий Event из итерируемого набора строк .ics."""
+    # Склейка продолженных строк и разбор свойств встроены в один цикл:
+    # это горячий путь, лишние генераторы и вызовы функций заметно его замедляют
+    index_get = PROPERTY_INDEX.get
+    fields = None
+    current = None
+    for line in chain(lines, ("",)):
+        if line.startswith(FOLD_PREFIXES):
+            if current is not None:
+                current += line[1:].rstrip("\r\n")
+            continue
+
+        # Предыдущая логическая строка завершена - обрабатываем ее
+        if current is not None:
+            # Хвостовые пробелы и регистр маркеров и имен свойств не важны (как в исходном парсере)
+            current = current.rstrip()
+            marker = current.upper() if len(current) <= 12 else ""
+            if marker == "BEGIN:VEVENT":
+                fields = ["", "", "", "", ""]
+            elif marker == "END:VEVENT":
+                if fields is not None and any(fields):
+                    yield Event(*fields)
+                fields = None
+            elif fields is not None:
+                name, _, value = current.partition(":")
+                tzid = None
+                if ";" in name:
+                    header = name
+                    name, value = split_property(current)
+                    tzid = _header_tzid(header) if '"' not in header else property_param(current, "TZID")
+                index = index_get(name)
+                if index is None:
+                    index = index_get(name.upper())
+                if index is not None:
+                    value = value.strip()
+                    if index in TEXT_PROPERTIES and "\\" in value:
+                        value = unescape_text(value)
+                    elif tzid and index in TIME_PROPERTIES:
+                        value = to_utc(value, tzid)
+                    fields[index] = value
+        current = line.rstrip("\r\n")
+
+
+def iter_events(file_path):
+    """Читает .ics файл за один проход и выдает события по одному."""
+    with open(file_path, "r", encoding="utf-8") as f:
+        yield from parse_lines(f)
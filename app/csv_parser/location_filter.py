@@ -0,0 +1,83 @@
+"""
+Потоковая классификация календарей по полю LOCATION.
+
+Ответ читается блоками, байты сравниваются напрямую без декодирования всего тела,
+чтение прекращается на первой строке LOCATION.
+"""
+
+# Маркер начала строки LOCATION; перевод строки перед ним гарантирует, что это начало строки
+LOCATION_MARKER = b"\nLOCATION"
+# Ограничение на длину незавершенной строки LOCATION в буфере
+MAX_LINE = 4096
+
+
+class LocationFilter:
+    """
+    Предикат над значением LOCATION (байты).
+    Возвращает 'match', если значение начинается с префикса корпуса
+    и не начинается ни с одного из исключений, иначе 'excluded'.
+    """
+
+    def __init__(self, prefix="Б", exclude=("Б1",)):
+        self.prefix = prefix.encode('utf-8')
+        self.exclude = tuple(item.encode('utf-8') for item in exclude)
+
+    def __call__(self, location):
+        if self.exclude and location.startswith(self.exclude):
+            return "excluded"
+        if location.startswith(self.prefix):
+            return "match"
+        return "excluded"
+
+
+# Аудитории корпуса "Б", кроме "Б1"
+BUILDING_B = LocationFilter("Б", exclude=("Б1",))
+
+
+def first_location(chunks):
+    """
+    Возвращает значение первой строки LOCATION (байты) из итератора блоков
+    или None, если ее нет. Остаток потока не читается.
+    """
+    # Тело календаря начинается с BEGIN:VCALENDAR, поэтому искусственный
+    # перевод строки в начале не создает ложных совпадений
+    pending = b"\n"
+    for chunk in chunks:
+        data = pending + chunk
+        start = 0
+        while True:
+            idx = data.find(LOCATION_MARKER, start)
+            if idx == -1:
+                # Хвост может содержать начало маркера, разрезанного границей блока
+                pending = data[-(len(LOCATION_MARKER) - 1):]
+                break
+
+            eol = data.find(b"\n", idx + 1)
+            if eol == -1:
+                # Строка LOCATION не закончилась в этом блоке - ждем следующий
+                pending = data[idx:idx + MAX_LINE]
+                break
+
+            name, _, value = data[idx + 1:eol].rstrip(b"\r").partition(b":")
+            # LOCATION:... или параметризованное LOCATION;LANGUAGE=ru:...
+            if name == b"LOCATION" or name.startswith(b"LOCATION;"):
+                return value.strip()
+            start = idx + 1
+
+    if pending.startswith(LOCATION_MARKER):
+        # Последняя строка файла без перевода строки
+        name, _, value = pending[1:].rstrip(b"\r").partition(b":")
+        if name == b"LOCATION" or name.startswith(b"LOCATION;"):
+            return value.strip()
+    return None
+
+
+def classify_stream(chunks, predicate=BUILDING_B):
+    """
+    Классифицирует календарь по первой строке LOCATION:
+    результат predicate или 'empty', если LOCATION нет.
+    """
+    location = first_location(chunks)
+    if location is None:
+        return "empty"
+    return predicate(location)
@@ -1,159 +1,250 @@
 import os
 import csv
-from datetime import datetime
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, as_completed, wait
+from datetime import date, time as dt_time
+from functools import lru_cache
 import re
 
+from fetch_manifest import FetchManifest
+from ics_stream import (
+    Event, PROPERTY_INDEX, TEXT_PROPERTIES, TIME_PROPERTIES, iter_events, property_param, split_property,
+    to_utc, unescape_text, unfold_lines
+)
+
 # --- Конфигурация ---
 ICAL_DIR = "ical_files"       # папка, где лежат .ics файлы
 OUTPUT_CSV = "university_schedule.csv"
+OUTPUT_COLUMNAR = "university_schedule.cols"  # каталог колоночного снимка (columnar.py)
+# Размер LRU-кэшей разбора полей: преподаватели, группы и времена пар сильно повторяются
+FIELD_CACHE_SIZE = 8192
+
+TEACHER_RE = re.compile(r"Преподаватель\s([^,]+)")
+GROUP_RE = re.compile(r"группа:\s*([\w\-А-Яа-я]+)")
+DAYS_RU = ("Понедельник", "Вторник", "Среда", "Четверг", "Пятница", "Суббота", "Воскресенье")
+
+# Параллельный режим: сколько файлов может быть в работе на один процесс пула
+MAX_PENDING_PER_WORKER = 4
+FIELDNAMES = [
+    "date", "day", "start_time", "end_time",
+    "type", "subject", "teacher", "location", "group"
+]
 
 
 def parse_event(lines):
     """Парсит одно событие между BEGIN:VEVENT и END:VEVENT."""
     event = {}
-    for line in lines:
+    for line in unfold_lines(lines):
         line = line.strip()
-
-        if line.startswith("SUMMARY:"):
-            event["summary"] = line.replace("SUMMARY:", "").strip()
-
-        elif line.startswith("DTSTART:"):
-            event["start"] = line.split(":")[1].strip()
-
-        elif line.startswith("DTEND:"):
-            event["end"] = line.split(":")[1].strip()
-
-        elif line.startswith("LOCATION:"):
-            event["location"] = line.replace("LOCATION:", "").strip()
-
-        elif line.startswith("DESCRIPTION:"):
-            event["description"] = line.replace("DESCRIPTION:", "").strip()
-
+        name, value = split_property(line)
+        index = PROPERTY_INDEX.get(name.upper())
+        if index is not None:
+            value = value.strip()
+            if index in TEXT_PROPERTIES:
+                value = unescape_text(value)
+            elif index in TIME_PROPERTIES:
+                value = to_utc(value, property_param(line, "TZID"))
+            event[Event._fields[index]] = value
     return event
 
 
 def parse_ics_file(file_path):
-    """Извлекает все события из .ics файла."""
-    with open(file_path, "r", encoding="utf-8") as f:
-        lines = f.readlines()
-
-    events = []
-    inside_event = False
-    buffer = []
-
-    for line in lines:
-        line = line.strip()
-        if line == "BEGIN:VEVENT":
-            inside_event = True
-            buffer = []
-        elif line == "END:VEVENT":
-            inside_event = False
-            event = parse_event(buffer)
-            if event:
-                events.append(event)
-        elif inside_event:
-            buffer.append(line)
-
-    return events
+    """
+    Извлекает все события из .ics файла в виде списка словарей.
+    Для больших файлов используйте ics_stream.iter_events - он не держит события в памяти.
+    """
+    return [
+        {key: value for key, value in event._asdict().items() if value}
+        for event in iter_events(file_path)
+    ]
 
 
+@lru_cache(maxsize=FIELD_CACHE_SIZE)
 def format_datetime(dt_str):
     """
-    Преобразует строки вида 20251020T071000Z в дату и время.
+    Преобразует строки вида 20251020T071000Z в дату и время (TZID уже переведен в UTC парсером).
     Возвращает (дата, время).
+    Значения фиксированной ширины разбираются срезами вместо strptime/strftime;
+    в семестре мало различных времен начала пар, поэтому результат кэшируется.
     """
+    if len(dt_str) < 15 or dt_str[8] != "T" or not (dt_str[:8].isdigit() and dt_str[9:15].isdigit()):
+        return None, None
     try:
-        dt = datetime.strptime(dt_str, "%Y%m%dT%H%M%SZ")
-        date = dt.strftime("%Y-%m-%d")
-        time = dt.strftime("%H:%M")
-        return date, time
-    except Exception:
+        # Проверяем корректность даты и времени так же строго, как strptime
+        date(int(dt_str[:4]), int(dt_str[4:6]), int(dt_str[6:8]))
+        dt_time(int(dt_str[9:11]), int(dt_str[11:13]), int(dt_str[13:15]))
+    except ValueError:
         return None, None
+    return f"{dt_str[:4]}-{dt_str[4:6]}-{dt_str[6:8]}", f"{dt_str[9:11]}:{dt_str[11:13]}"
 
 
-def extract_details(summary, description):
-    """
-    Извлекает из SUMMARY и DESCRIPTION предмет, тип занятия, преподавателя и группу.
-    Пример SUMMARY: "лаб Живопись"
-    Пример DESCRIPTION: "Преподаватель Еремин В.Е., группа: 21-ДИбо-5"
-    """
-    # Тип и предмет
-    if summary:
-        parts = summary.split(" ", 1)
-        if len(parts) == 2:
-            lesson_type, subject = parts
-        else:
-            lesson_type, subject = "", summary
-    else:
-        lesson_type, subject = "", ""
+@lru_cache(maxsize=FIELD_CACHE_SIZE)
+def day_of_week(date_str):
+    """Название дня недели по-русски для даты вида 2025-10-20."""
+    return DAYS_RU[date.fromisoformat(date_str).weekday()]
+
+
+@lru_cache(maxsize=FIELD_CACHE_SIZE)
+def split_summary(summary):
+    """Тип занятия и предмет из SUMMARY: "лаб Живопись" -> ("лаб", "Живопись")."""
+    if not summary:
+        return "", ""
+    parts = summary.split(" ", 1)
+    if len(parts) == 2:
+        return parts[0], parts[1]
+    return "", summary
 
-    # Преподаватель и группа
+
+@lru_cache(maxsize=FIELD_CACHE_SIZE)
+def parse_description(description):
+    """Преподаватель и группа из DESCRIPTION; описания повторяются для каждой пары группы."""
     teacher, group = "", ""
     if description:
-        teacher_match = re.search(r"Преподаватель\s([^,]+)", description)
-        group_match = re.search(r"группа:\s*([\w\-А-Яа-я]+)", description)
+        teacher_match = TEACHER_RE.search(description)
+        group_match = GROUP_RE.search(description)
         if teacher_match:
             teacher = teacher_match.group(1).strip()
         if group_match:
             group = group_match.group(1).strip()
+    return teacher, group
+
 
+def extract_details(summary, description):
+    """
+    Извлекает из SUMMARY и DESCRIPTION предмет, тип занятия, преподавателя и группу.
+    Пример SUMMARY: "лаб Живопись"
+    Пример DESCRIPTION: "Преподаватель Еремин В.Е., группа: 21-ДИбо-5"
+    """
+    lesson_type, subject = split_summary(summary)
+    teacher, group = parse_description(description)
     return lesson_type, subject, teacher, group
 
 
-def main():
-    all_events = []
-
-    for filename in os.listdir(ICAL_DIR):
-        if filename.endswith(".ics"):
-            file_path = os.path.join(ICAL_DIR, filename)
-            events = parse_ics_file(file_path)
-            all_events.extend(events)
-
-    # --- Создаем CSV ---
-    with open(OUTPUT_CSV, "w", newline="", encoding="utf-8") as csvfile:
-        fieldnames = [
-            "date", "day", "start_time", "end_time",
-            "type", "subject", "teacher", "location", "group"
-        ]
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-
-        for e in all_events:
-            start_date, start_time = format_datetime(e.get("start", ""))
-            _, end_time = format_datetime(e.get("end", ""))
-            lesson_type, subject, teacher, group = extract_details(
-                e.get("summary", ""), e.get("description", "")
-            )
-
-            # Определяем день недели (понедельник, вторник и т.д.)
-            day_name = ""
-            if start_date:
-                day_name = datetime.strptime(start_date, "%Y-%m-%d").strftime("%A")
-                days_ru = {
-                    "Monday": "Понедельник",
-                    "Tuesday": "Вторник",
-                    "Wednesday": "Среда",
-                    "Thursday": "Четверг",
-                    "Friday": "Пятница",
-                    "Saturday": "Суббота",
-                    "Sunday": "Воскресенье"
-                }
-                day_name = days_ru.get(day_name, day_name)
-
-            writer.writerow({
-                "date": start_date or "",
-                "day": day_name,
-                "start_time": start_time or "",
-                "end_time": end_time or "",
-                "type": lesson_type,
-                "subject": subject,
-                "teacher": teacher,
-                "location": e.get("location", ""),
-                "group": group
-            })
-
-    print(f"✅ Готово! Сохранено {len(all_events)} записей в {OUTPUT_CSV}")
+def event_to_row(e):
+    """Преобразует событие Event в строку CSV."""
+    start_date, start_time = format_datetime(e.start)
+    _, end_time = format_datetime(e.end)
+    lesson_type, subject = split_summary(e.summary)
+    teacher, group = parse_description(e.description)
+
+    # Порядок значений совпадает с FIELDNAMES
+    return (
+        start_date or "",
+        day_of_week(start_date) if start_date else "",
+        start_time or "",
+        end_time or "",
+        lesson_type,
+        subject,
+        teacher,
+        e.location,
+        group,
+    )
+
+
+def convert_file(file_path):
+    """Разбирает один .ics файл в список строк CSV. Выполняется в процессе пула."""
+    return [event_to_row(event) for event in iter_events(file_path)]
+
+
+def iter_converted(file_paths, workers=None, ordered=True):
+    """
+    Разбирает файлы в пуле процессов и выдает списки строк по мере готовности.
+    Одновременно в работе не больше MAX_PENDING_PER_WORKER файлов на процесс,
+    поэтому память ограничена и при тысячах календарей.
+    ordered=True сохраняет порядок file_paths (вывод совпадает с последовательным режимом).
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = workers * MAX_PENDING_PER_WORKER
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        if ordered:
+            queue = deque()
+            for path in file_paths:
+                queue.append(pool.submit(convert_file, path))
+                if len(queue) >= max_pending:
+                    yield queue.popleft().result()
+            while queue:
+                yield queue.popleft().result()
+        else:
+            pending = set()
+            for path in file_paths:
+                pending.add(pool.submit(convert_file, path))
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            for future in as_completed(pending):
+                yield future.result()
+
+
+def main(force=False, parallel=False, workers=None, ordered=True, output_format="csv"):
+    """
+    Конвертирует все .ics файлы из ICAL_DIR в OUTPUT_CSV и/или колоночный снимок OUTPUT_COLUMNAR
+    (output_format: "csv", "columnar" или "both").
+    parallel=True разбирает файлы в пуле из workers процессов (по умолчанию по числу ядер);
+    ordered=False пишет строки в порядке готовности файлов, а не по имени.
+    """
+    ics_files = sorted(name for name in os.listdir(ICAL_DIR) if name.endswith(".ics"))
+    outputs = {"csv": [OUTPUT_CSV], "columnar": [OUTPUT_COLUMNAR], "both": [OUTPUT_CSV, OUTPUT_COLUMNAR]}[output_format]
+
+    # Если с прошлого разбора ни один файл не изменился, результаты уже актуальны
+    manifest = FetchManifest.load(ICAL_DIR)
+    if not force and all(os.path.exists(path) for path in outputs) and not manifest.pending_parse(ics_files):
+        print(f"✅ Файлы в {ICAL_DIR} не изменились, {', '.join(outputs)} актуальны")
+        return
+
+    snapshot = None
+    if output_format != "csv":
+        # NumPy нужен только для колоночного формата
+        from columnar import SnapshotWriter
+        snapshot = SnapshotWriter()
+
+    # --- События пишутся по мере разбора, без накопления строк в памяти ---
+    count = 0
+    file_paths = [os.path.join(ICAL_DIR, filename) for filename in ics_files]
+    csvfile = open(OUTPUT_CSV, "w", newline="", encoding="utf-8") if output_format != "columnar" else None
+    try:
+        writer = csv.writer(csvfile) if csvfile else None
+        if writer:
+            writer.writerow(FIELDNAMES)
+
+        if parallel:
+            batches = iter_converted(file_paths, workers, ordered)
+        else:
+            # По одной строке: последовательный режим не держит события файла в памяти
+            batches = ((event_to_row(event),) for file_path in file_paths for event in iter_events(file_path))
+        for rows in batches:
+            if writer:
+                writer.writerows(rows)
+            if snapshot is not None:
+                for row in rows:
+                    snapshot.add(row)
+            count += len(rows)
+    finally:
+        if csvfile:
+            csvfile.close()
+
+    if snapshot is not None:
+        snapshot.save(OUTPUT_COLUMNAR)
+
+    manifest.mark_parsed()
+    if manifest.entries:
+        manifest.save()
+
+    print(f"✅ Готово! Сохранено {count} записей в {', '.join(outputs)}")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Конвертация .ics файлов в CSV")
+    parser.add_argument("--force", action="store_true", help="Разобрать файлы, даже если они не изменились")
+    parser.add_argument("--parallel", action="store_true", help="Разбирать файлы в пуле процессов")
+    parser.add_argument("--workers", type=int, default=None, help="Число процессов (по умолчанию - число ядер)")
+    parser.add_argument("--unordered", action="store_true",
+                        help="Писать строки по мере готовности, без сохранения порядка файлов")
+    parser.add_argument("--format", choices=("csv", "columnar", "both"), default="csv",
+                        help="csv, колоночный снимок NumPy (columnar.py) или оба")
+    args = parser.parse_args()
+
+    main(force=args.force, parallel=args.parallel, workers=args.workers, ordered=not args.unordered,
+         output_format=args.format)
@@ -1,7 +1,9 @@
 import os
-import time
 import logging
-import requests
+from collections import Counter
+
+from fetcher import run_fetch
+from fetch_manifest import FetchManifest, store_result
 
 # --- 1. Конфигурация ---
 # Директория для сохранения скачанных .ics файлов
@@ -11,8 +13,11 @@ BASE_URL_ICAL = "https://eios.kosgos.ru/api/Rasp"
 # Диапазон ID групп для скачивания
 START_ID = 8149
 END_ID = 8515
-# Задержка между запросами в секундах, чтобы не перегружать сервер
-REQUEST_DELAY = 0.5
+# Число одновременных запросов и общий лимит запросов в секунду, чтобы не перегружать сервер
+CONCURRENCY = 8
+RATE_LIMIT = 10.0
+# Число повторов при сетевых ошибках и ответах 5xx/429
+MAX_RETRIES = 3
 # Заголовки для HTTP-запроса
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36',
@@ -23,10 +28,11 @@ HEADERS = {
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 
-def download_schedule_files():
+def download_schedule_files(full_refresh=False):
     """
     Скачивает файлы расписания в формате .ics для заданного диапазона ID групп.
-    Перед началом нового скачивания очищает папку назначения.
+    Запросы условные (ETag / Last-Modified из манифеста): неизменившиеся файлы
+    не перезаписываются. full_refresh=True игнорирует манифест и скачивает все заново.
     """
     logging.info("Начинается скачивание .ics файлов расписания...")
 
@@ -35,43 +41,46 @@ def download_schedule_files():
         os.makedirs(ICAL_DIR)
         logging.info(f"Создана директория: {ICAL_DIR}")
 
-    # Очищаем директорию от старых файлов
-    logging.info(f"Очистка директории {ICAL_DIR}...")
-    for f in os.listdir(ICAL_DIR):
-        os.remove(os.path.join(ICAL_DIR, f))
-
-    success_count = 0
-    # Проходим по всем ID групп в указанном диапазоне
-    for group_id in range(START_ID, END_ID + 1):
-        url = f"{BASE_URL_ICAL}?idGroup={group_id}&iCal=true"
-        try:
-            # Выполняем GET-запрос
-            response = requests.get(url, headers=HEADERS, timeout=15)
-            response.raise_for_status()  # Проверяем, успешен ли запрос
+    manifest = FetchManifest.load(ICAL_DIR)
+    if full_refresh:
+        manifest.entries.clear()
 
-            # Пропускаем, если ответ пустой
-            if not response.content:
-                logging.warning(f"Получен пустой ответ для ID группы: {group_id}")
-                continue
+    # Формируем условные запросы для всех ID групп в указанном диапазоне
+    jobs = [
+        (group_id,
+         f"{BASE_URL_ICAL}?idGroup={group_id}&iCal=true",
+         manifest.conditional_headers(f"group:{group_id}"))
+        for group_id in range(START_ID, END_ID + 1)
+    ]
+    counts = Counter()
 
-            # Сохраняем содержимое в файл
-            file_path = os.path.join(ICAL_DIR, f"calendar_{group_id}.ics")
-            with open(file_path, 'wb') as f:
-                f.write(response.content)
+    def save_result(result):
+        group_id = result.key
+        status = store_result(manifest, ICAL_DIR, f"group:{group_id}", f"calendar_{group_id}.ics", result)
+        counts[status] += 1
 
-            success_count += 1
+        if status == "error":
+            # Логируем ошибку, если запрос не удался после всех повторов
+            logging.error(f"Ошибка при скачивании для ID группы {group_id}: {result.error}")
+        elif status == "empty":
+            logging.warning(f"Получен пустой ответ для ID группы: {group_id}")
+        elif status == "updated":
             logging.info(f"Успешно скачан файл для ID группы: {group_id}")
 
-        except requests.exceptions.RequestException as e:
-            # Логируем ошибку, если запрос не удался
-            logging.error(f"Ошибка при скачивании для ID группы {group_id}: {e}")
-            continue
-        finally:
-            # Делаем паузу между запросами
-            time.sleep(REQUEST_DELAY)
+    try:
+        run_fetch(
+            jobs, save_result,
+            headers=HEADERS, concurrency=CONCURRENCY, rate=RATE_LIMIT, retries=MAX_RETRIES
+        )
+    finally:
+        manifest.save()
 
     logging.info(f"--- Скачивание завершено ---")
-    logging.info(f"Всего загружено {success_count} файлов.")
+    logging.info(
+        f"Обновлено {counts['updated']} файлов, без изменений {counts['not_modified'] + counts['unchanged']}, "
+        f"пустых {counts['empty']}, ошибок {counts['error']}."
+    )
+    return counts
 
 
 # --- Точка входа в скрипт ---
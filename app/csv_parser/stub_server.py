@@ -0,0 +1,136 @@
+"""
+Локальный HTTP-сервер, имитирующий API eios.kosgos.ru/api/Rasp.
+Нужен для бенчмарков и проверки загрузчиков без обращения к настоящему серверу.
+"""
+import argparse
+import hashlib
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from synthetic import SyntheticUniversity
+
+# --- Конфигурация ---
+HOST = "127.0.0.1"
+PORT = 8765
+EVENTS_PER_CALENDAR = 40
+SEMESTER_START = datetime(2025, 9, 1, 5, 0)
+LAST_MODIFIED = "Mon, 01 Sep 2025 00:00:00 GMT"
+
+
+def build_calendar(calendar_id, events=EVENTS_PER_CALENDAR):
+    """Детерминированно генерирует .ics файл для ID группы или аудитории."""
+    rnd = random.Random(calendar_id)
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//eios.kosgos.ru//stub//RU"]
+    for i in range(events):
+        start = SEMESTER_START + timedelta(days=rnd.randrange(120), hours=rnd.choice([0, 2, 3, 5, 7]), minutes=10)
+        end = start + timedelta(minutes=90)
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:{calendar_id}-{i}@stub",
+            f"DTSTART:{start:%Y%m%dT%H%M%SZ}",
+            f"DTEND:{end:%Y%m%dT%H%M%SZ}",
+            f"SUMMARY:{rnd.choice(['лек', 'пр', 'лаб'])} Дисциплина {rnd.randrange(50)}",
+            f"LOCATION:Б-{rnd.randrange(100, 400)}",
+            f"DESCRIPTION:Преподаватель Преподаватель{rnd.randrange(30)} А.Б., группа: 2{rnd.randrange(5)}-ДИбо-{rnd.randrange(1, 6)}",
+            "END:VEVENT",
+        ]
+    lines.append("END:VCALENDAR")
+    return ("\r\n".join(lines) + "\r\n").encode("utf-8")
+
+
+class RaspHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1, чтобы клиент мог переиспользовать соединения (keep-alive)
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+
+        if server.error_rate and random.random() < server.error_rate:
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        query = parse_qs(urlparse(self.path).query)
+        calendar_id = (query.get("idGroup") or query.get("idAudLine") or ["0"])[0]
+        body = server.calendar(int(calendar_id)) if calendar_id.isdigit() else b""
+
+        # Условные запросы: ETag зависит только от содержимого календаря
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()[:16]
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        self.send_header("Content-Type", "text/calendar; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Не засоряем вывод бенчмарков логом каждого запроса
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, university=None, latency=0.0, error_rate=0.0):
+        super().__init__(address, RaspHandler)
+        self.university = university
+        self.latency = latency
+        self.error_rate = error_rate
+        self._calendars = {}
+
+    def calendar(self, calendar_id):
+        """Календарь синтетического университета (кэшируется) или случайный build_calendar"""
+        if self.university is None:
+            return build_calendar(calendar_id)
+        body = self._calendars.get(calendar_id)
+        if body is None:
+            body = self._calendars[calendar_id] = self.university.calendar(calendar_id) or b""
+        return body
+
+
+def start_stub_server(host=HOST, port=0, latency=0.0, error_rate=0.0, university=None):
+    """
+    Запускает сервер в фоновом потоке.
+    university - SyntheticUniversity: отдавать согласованное расписание его групп.
+    Возвращает (server, base_url); остановка - server.shutdown().
+    """
+    server = StubServer((host, port), university, latency, error_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}/api/Rasp"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Заглушка API расписания eios.kosgos.ru")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--latency", type=float, default=0.05, help="Задержка ответа, секунды")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Доля ответов 503")
+    parser.add_argument("--synthetic-groups", type=int, default=0,
+                        help="Отдавать расписание синтетического университета из N групп (ID с 8149)")
+    parser.add_argument("--synthetic-classrooms", type=int, default=2000)
+    args = parser.parse_args()
+
+    university = None
+    if args.synthetic_groups:
+        university = SyntheticUniversity(args.synthetic_groups, args.synthetic_classrooms)
+    server, base_url = start_stub_server(port=args.port, latency=args.latency, error_rate=args.error_rate,
+                                         university=university)
+    print(f"Заглушка запущена: {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
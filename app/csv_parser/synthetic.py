@@ -0,0 +1,204 @@
+"""
+Генератор синтетического университета для бенчмарков и заглушки stub_server.
+
+Детерминированно по seed строит корпуса и аудитории (с вместимостью и оборудованием),
+преподавателей, группы и для каждой группы недельную сетку пар, которая повторяется
+весь семестр (с чередованием числителя и знаменателя). Аудитория и преподаватель
+не заняты двумя парами одновременно. Календари групп отдаются в формате eios.kosgos.ru:
+    DTSTART/DTEND в UTC, SUMMARY "тип предмет", LOCATION "Б-305",
+    DESCRIPTION "Преподаватель Фамилия И.О., группа: 22-ДИбо-2"
+
+Запуск: python synthetic.py --groups 300 --classrooms 2000 --out ical_files
+"""
+import argparse
+import os
+import random
+from datetime import datetime, timedelta
+
+SEMESTER_START = datetime(2025, 9, 1)   # понедельник
+SEMESTER_WEEKS = 18
+FIRST_GROUP_ID = 8149                   # как START_ID в rasp_parser
+# Начала пар по UTC (в расписании - московское время минус 3 часа), пара - 90 минут
+PAIR_STARTS = ((5, 0), (6, 40), (8, 20), (10, 20), (12, 0), (13, 40))
+PAIR_MINUTES = 90
+STUDY_DAYS = 6                          # понедельник - суббота
+
+BUILDINGS = "АБВГДЕЖИКЛ"
+LESSON_TYPES = ("лек", "пр", "лаб")
+PROGRAMS = ("ДИбо", "ИСбо", "ЭКбо", "ЮРбо", "ПИбо", "МОбо", "ФКбо", "ЛИбо")
+SURNAMES = (
+    "Еремин", "Иванов", "Смирнов", "Кузнецов", "Попов", "Васильев", "Петров", "Соколов", "Михайлов",
+    "Новиков", "Федоров", "Морозов", "Волков", "Алексеев", "Лебедев", "Семенов", "Егоров", "Павлов",
+    "Козлов", "Степанов", "Николаев", "Орлов", "Андреев", "Макаров", "Никитин", "Захаров", "Зайцев",
+    "Соловьев", "Борисов", "Яковлев", "Григорьев", "Романов", "Воробьев", "Сергеев", "Кузьмин",
+)
+INITIALS = "АБВГДЕИКЛМНОПРСТ"
+SUBJECT_WORDS = (
+    "Живопись", "Рисунок", "Композиция", "История искусств", "Математика", "Физика", "Информатика",
+    "Программирование", "Базы данных", "Экономика", "Менеджмент", "Право", "Философия", "Психология",
+    "Педагогика", "Английский язык", "Физическая культура", "Дизайн", "Графика", "Скульптура",
+)
+SUBJECT_SUFFIXES = ("", " (основы)", " (практикум)", " и моделирование", " в профессии", " (спецкурс)")
+EQUIPMENT = ("Проектор", "Маркерная доска", "Компьютеры", "Интерактивная доска", "Кондиционер", "Мольберты")
+
+
+class SyntheticUniversity:
+    """Синтетический университет; все списки строятся в конструкторе, календари - по запросу"""
+
+    def __init__(self, groups=300, classrooms=2000, teachers=None, subjects=None, pairs_per_week=16,
+                 weeks=SEMESTER_WEEKS, semester_start=SEMESTER_START, seed=0):
+        rnd = random.Random(seed)
+        self.weeks = weeks
+        self.semester_start = semester_start
+        self.classrooms = self._make_classrooms(rnd, classrooms)
+        self.teachers = self._make_teachers(rnd, teachers or max(30, groups * 2))
+        self.subjects = self._make_subjects(rnd, subjects or max(20, groups))
+        self.groups = self._make_groups(rnd, groups)
+        self.timetables = self._make_timetables(rnd, pairs_per_week)
+
+    @staticmethod
+    def _make_classrooms(rnd, count):
+        """[(номер, вместимость, оборудование, описание)]"""
+        rooms = []
+        for i in range(count):
+            building = BUILDINGS[i % len(BUILDINGS)]
+            number = f"{building}-{100 + i // len(BUILDINGS)}"
+            capacity = rnd.choice((12, 16, 20, 25, 30, 30, 40, 60, 100, 150))
+            equipment = ", ".join(sorted(rnd.sample(EQUIPMENT, rnd.randrange(1, 4))))
+            description = "Лекционная аудитория" if capacity >= 60 else "Аудитория для практических занятий"
+            rooms.append((number, capacity, equipment, description))
+        return rooms
+
+    @staticmethod
+    def _make_teachers(rnd, count):
+        names = set()
+        while len(names) < count:
+            suffix = "" if len(names) < len(SURNAMES) * len(INITIALS) ** 2 else str(len(names))
+            names.add(f"{rnd.choice(SURNAMES)}{suffix} {rnd.choice(INITIALS)}.{rnd.choice(INITIALS)}.")
+        return sorted(names)
+
+    @staticmethod
+    def _make_subjects(rnd, count):
+        subjects = {f"{word}{suffix}" for word in SUBJECT_WORDS for suffix in SUBJECT_SUFFIXES}
+        subjects = sorted(subjects)
+        rnd.shuffle(subjects)
+        while len(subjects) < count:
+            subjects.append(f"{rnd.choice(SUBJECT_WORDS)} {len(subjects)}")
+        return subjects[:count]
+
+    @staticmethod
+    def _make_groups(rnd, count):
+        """[(id для API, название)]: 22-ДИбо-2 - год набора, направление, номер группы"""
+        groups = []
+        for i in range(count):
+            year = 21 + i % 4
+            program = PROGRAMS[(i // 4) % len(PROGRAMS)]
+            number = 1 + i // (4 * len(PROGRAMS))
+            groups.append((FIRST_GROUP_ID + i, f"{year}-{program}-{number}"))
+        return groups
+
+    def _make_timetables(self, rnd, pairs_per_week):
+        """
+        Для каждой группы список пар двухнедельного цикла:
+        (четность недели или None - каждую неделю, день, пара, тип, предмет, преподаватель, аудитория)
+        """
+        busy_rooms, busy_teachers = {}, {}
+        slots = [(day, pair) for day in range(STUDY_DAYS) for pair in range(len(PAIR_STARTS))]
+        timetables = []
+        for _ in self.groups:
+            group_subjects = rnd.sample(self.subjects, min(len(self.subjects), 8))
+            lessons = []
+            for day, pair in sorted(rnd.sample(slots, min(pairs_per_week, len(slots)))):
+                parity = rnd.choice((None, None, None, 0, 1))
+                key = (parity, day, pair)
+                # Занятость проверяется для обеих недель цикла, если пара еженедельная
+                keys = [(p, day, pair) for p in ((0, 1) if parity is None else (parity,))]
+                room = self._free(rnd, self.classrooms, busy_rooms, keys)
+                teacher = self._free(rnd, self.teachers, busy_teachers, keys)
+                if room is None or teacher is None:
+                    continue
+                lessons.append(key + (rnd.choice(LESSON_TYPES), rnd.choice(group_subjects), teacher, room[0]))
+            timetables.append(lessons)
+        return timetables
+
+    @staticmethod
+    def _free(rnd, items, busy, keys, attempts=50):
+        """Случайный элемент items, не занятый ни в одном из слотов keys"""
+        for _ in range(attempts):
+            item = rnd.choice(items)
+            if all(item not in busy.get(key, ()) for key in keys):
+                for key in keys:
+                    busy.setdefault(key, set()).add(item)
+                return item
+        return None
+
+    def group_name(self, group_id):
+        return self.groups[group_id - FIRST_GROUP_ID][1]
+
+    def iter_lessons(self, index):
+        """Занятия группы за семестр: (начало, конец, тип, предмет, преподаватель, аудитория)"""
+        for week in range(self.weeks):
+            monday = self.semester_start + timedelta(weeks=week)
+            for parity, day, pair, lesson_type, subject, teacher, room in self.timetables[index]:
+                if parity is not None and week % 2 != parity:
+                    continue
+                hours, minutes = PAIR_STARTS[pair]
+                start = monday + timedelta(days=day, hours=hours, minutes=minutes)
+                yield start, start + timedelta(minutes=PAIR_MINUTES), lesson_type, subject, teacher, room
+
+    def calendar(self, group_id):
+        """.ics группы в формате eios.kosgos.ru (байты) или None для неизвестного ID"""
+        index = group_id - FIRST_GROUP_ID
+        if not 0 <= index < len(self.groups):
+            return None
+        name = self.groups[index][1]
+        lines = ["BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//eios.kosgos.ru//synthetic//RU"]
+        for i, (start, end, lesson_type, subject, teacher, room) in enumerate(self.iter_lessons(index)):
+            lines += [
+                "BEGIN:VEVENT",
+                f"UID:{group_id}-{i}@synthetic",
+                f"DTSTART:{start:%Y%m%dT%H%M%SZ}",
+                f"DTEND:{end:%Y%m%dT%H%M%SZ}",
+                f"SUMMARY:{lesson_type} {subject}",
+                f"LOCATION:{room}",
+                f"DESCRIPTION:Преподаватель {teacher}, группа: {name}",
+                "END:VEVENT",
+            ]
+        lines.append("END:VCALENDAR")
+        return ("\r\n".join(lines) + "\r\n").encode("utf-8")
+
+    def group_ids(self):
+        return [group_id for group_id, _ in self.groups]
+
+    def write_calendars(self, directory):
+        """Пишет calendar_<id>.ics всех групп (как rasp_parser); возвращает (файлов, байт)"""
+        os.makedirs(directory, exist_ok=True)
+        total = 0
+        for group_id in self.group_ids():
+            body = self.calendar(group_id)
+            with open(os.path.join(directory, f"calendar_{group_id}.ics"), "wb") as f:
+                f.write(body)
+            total += len(body)
+        return len(self.groups), total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--groups", type=int, default=300)
+    parser.add_argument("--classrooms", type=int, default=2000)
+    parser.add_argument("--teachers", type=int, default=None, help="По умолчанию - две на группу")
+    parser.add_argument("--pairs-per-week", type=int, default=16)
+    parser.add_argument("--weeks", type=int, default=SEMESTER_WEEKS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="ical_files")
+    args = parser.parse_args()
+
+    university = SyntheticUniversity(args.groups, args.classrooms, args.teachers,
+                                     pairs_per_week=args.pairs_per_week, weeks=args.weeks, seed=args.seed)
+    files, size = university.write_calendars(args.out)
+    print(f"✅ {files} календарей ({size / 2 ** 20:.1f} MiB) в {args.out}: аудиторий {len(university.classrooms)}, "
+          f"преподавателей {len(university.teachers)}, предметов {len(university.subjects)}")
+
+
+if __name__ == "__main__":
+    main()
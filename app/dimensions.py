@@ -0,0 +1,82 @@
+"""
+Справочники групп, преподавателей и типов занятий
+
+Занятия ссылаются на groups, teachers и lesson_types целыми ключами вместо повторения
+имен в каждой строке schedules. Импорт переводит имена в id через Interner - кэш
+имя -> id в памяти процесса: справочник читается одним запросом, а отсутствующие имена
+добавляются по одному отдельной короткой транзакцией. Запрос к базе нужен только для
+нового имени, а не для каждой строки расписания. Строки справочников не удаляются,
+поэтому закэшированные id не устаревают.
+"""
+import threading
+
+from flask import current_app, has_app_context
+from sqlalchemy import text
+
+from models import db
+
+
+class Interner:
+    """Кэш имя -> id для одной таблицы справочника (колонки id, name)"""
+
+    def __init__(self, table, max_length):
+        self.table = table
+        self.max_length = max_length
+        self._ids = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with db.engine.connect() as connection:
+            rows = connection.execute(text(f"SELECT id, name FROM {self.table}"))
+            return {name: row_id for row_id, name in rows}
+
+    def get(self, name):
+        """id строки справочника для name (None для пустого имени); новое имя добавляется"""
+        if not name:
+            return None
+        name = name[:self.max_length]
+        with self._lock:
+            if self._ids is None:
+                self._ids = self._load()
+            row_id = self._ids.get(name)
+            if row_id is not None:
+                return row_id
+            # Запись отдельной транзакцией: id попадает в кэш, только если строка точно сохранена
+            with db.engine.begin() as connection:
+                row_id = connection.execute(text(
+                    f"INSERT INTO {self.table} (name) VALUES (:name) "
+                    "ON CONFLICT (name) DO UPDATE SET name = excluded.name RETURNING id"
+                ), {'name': name}).scalar_one()
+            self._ids[name] = row_id
+            return row_id
+
+    def clear(self):
+        with self._lock:
+            self._ids = None
+
+
+class Dimensions:
+    """Кэши всех справочников расписания"""
+
+    def __init__(self):
+        self.groups = Interner('groups', 50)
+        self.teachers = Interner('teachers', 100)
+        self.lesson_types = Interner('lesson_types', 50)
+
+    def clear(self):
+        for interner in (self.groups, self.teachers, self.lesson_types):
+            interner.clear()
+
+
+def get_dimensions():
+    """Кэши справочников приложения; вне приложения - новые на время вызова"""
+    if has_app_context() and 'dimensions' in current_app.extensions:
+        return current_app.extensions['dimensions']
+    return Dimensions()
+
+
+def init_dimensions(app):
+    """Регистрирует кэши справочников в приложении"""
+    dimensions = Dimensions()
+    app.extensions['dimensions'] = dimensions
+    return dimensions
@@ -0,0 +1,299 @@
+"""
+iCal-фиды расписания групп и преподавателей (/groups/<code>/calendar.ics, /teachers/<name>/calendar.ics)
+
+Готовые фиды хранятся в calendar_feeds (общей для всех процессов сервера) вместе с ETag -
+хэшем тела. Импорт расписания в своей транзакции перерисовывает фиды затронутых групп
+и преподавателей (при полной замене - все), поэтому опрос календаря с телефона - это
+поиск ETag по первичному ключу и 304 Not Modified либо тело из памяти процесса.
+Только фид, которого еще нет в таблице, рисуется из schedules потоково и сохраняется.
+
+Фиды не зависят от бронирований, поэтому кэшируются по содержимому, а не по версии
+данных cache.py: ETag меняется, только если изменились занятия самого фида.
+Время в schedules хранится как в исходных .ics (DTSTART в UTC, см. parser_to_csv),
+поэтому выводится с суффиксом Z.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+from itertools import chain, groupby
+
+from flask import current_app, request, stream_with_context
+from sqlalchemy import event, inspect, text
+
+from models import db, Schedule
+from occupancy import DEFAULT_LESSON
+from serialization import STREAM_CHUNK_ROWS
+
+# Вид фида -> (справочник, колонка ссылки в schedules, колонка имени и ее позиция в строке FEED_ROWS_SQL)
+FEED_DIMENSIONS = {
+    'group': ('groups', 's.group_id', 'g.name', 5),
+    'teacher': ('teachers', 's.teacher_id', 't.name', 6),
+}
+FEED_TITLES = {'group': 'Расписание группы {}', 'teacher': 'Расписание преподавателя {}'}
+# Фидов, хранимых в памяти процесса
+FEED_CACHE_SIZE = 512
+# Фидов в одном пакете при перерисовке после импорта
+REFRESH_BATCH = 200
+UID_DOMAIN = 'timetable.university'
+MIMETYPE = 'text/calendar'
+
+CRLF = b'\r\n'
+MAX_LINE_OCTETS = 75
+TIME_FORMAT = '%Y%m%dT%H%M%SZ'
+
+FEED_ROWS_SQL = (
+    "SELECT s.id, s.classroom_number, s.lesson, s.date, s.end_date, g.name, t.name FROM schedules s "
+    "LEFT JOIN groups g ON g.id = s.group_id LEFT JOIN teachers t ON t.id = s.teacher_id"
+)
+
+UPSERT_FEED = text(
+    "INSERT INTO calendar_feeds (kind, name, etag, body, events, updated_at) "
+    "VALUES (:kind, :name, :etag, :body, :events, :updated_at) "
+    "ON CONFLICT (kind, name) DO UPDATE SET etag = excluded.etag, body = excluded.body, "
+    "events = excluded.events, updated_at = excluded.updated_at"
+)
+# Фид, нарисованный по запросу, не перезаписывает уже сохраненный импортом
+INSERT_FEED = text(
+    "INSERT INTO calendar_feeds (kind, name, etag, body, events, updated_at) "
+    "VALUES (:kind, :name, :etag, :body, :events, :updated_at) ON CONFLICT (kind, name) DO NOTHING"
+)
+
+
+def escape_text(value):
+    """Экранирование TEXT по RFC 5545"""
+    return (value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def fold_line(line):
+    """Строка контента в байтах с переносами по 75 октетов (не разрывая символы UTF-8) и CRLF"""
+    data = line.encode('utf-8')
+    if len(data) <= MAX_LINE_OCTETS:
+        return data + CRLF
+    parts, start, limit = [], 0, MAX_LINE_OCTETS
+    while len(data) - start > limit:
+        cut = start + limit
+        while data[cut] & 0xC0 == 0x80:
+            cut -= 1
+        parts.append(data[start:cut])
+        # Строка продолжения начинается с пробела, он входит в 75 октетов
+        start, limit = cut, MAX_LINE_OCTETS - 1
+    parts.append(data[start:])
+    return b'\r\n '.join(parts) + CRLF
+
+
+@lru_cache(maxsize=8192)
+def _text_property(name, value):
+    """Свойство с текстом; названия, аудитории и описания сильно повторяются"""
+    return fold_line(f"{name}:{escape_text(value)}")
+
+
+def render_event(row):
+    """VEVENT занятия (id, аудитория, занятие, начало, конец, группа, преподаватель)"""
+    schedule_id, classroom, lesson, start, end, group, teacher = row
+    start_text = start.strftime(TIME_FORMAT)
+    details = ', '.join(part for part in (
+        f"Преподаватель {teacher}" if teacher else '', f"группа: {group}" if group else ''
+    ) if part)
+    # DTSTAMP детерминирован, чтобы хэш фида зависел только от занятий
+    return b''.join((
+        b'BEGIN:VEVENT\r\n',
+        f"UID:schedule-{schedule_id}@{UID_DOMAIN}\r\n"
+        f"DTSTAMP:{start_text}\r\nDTSTART:{start_text}\r\n"
+        f"DTEND:{(end or start + DEFAULT_LESSON).strftime(TIME_FORMAT)}\r\n".encode('ascii'),
+        _text_property('SUMMARY', lesson),
+        _text_property('LOCATION', classroom),
+        _text_property('DESCRIPTION', details) if details else b'',
+        b'END:VEVENT\r\n',
+    ))
+
+
+def iter_calendar(title, chunks):
+    """VCALENDAR по пачкам строк занятий; каждая пачка кодируется в один кусок байтов"""
+    yield b''.join((
+        b'BEGIN:VCALENDAR\r\nVERSION:2.0\r\n',
+        b'PRODID:-//University Management System//Timetable//RU\r\n',
+        b'CALSCALE:GREGORIAN\r\nMETHOD:PUBLISH\r\n',
+        _text_property('X-WR-CALNAME', title),
+        b'X-PUBLISHED-TTL:PT1H\r\n',
+    ))
+    for chunk in chunks:
+        if chunk:
+            yield b''.join(map(render_event, chunk))
+    yield b'END:VCALENDAR\r\n'
+
+
+def feed_title(kind, name):
+    return FEED_TITLES[kind].format(name)
+
+
+def _feed_row(kind, name, body, events):
+    return {'kind': kind, 'name': name, 'etag': hashlib.sha1(body).hexdigest(), 'body': body,
+            'events': events, 'updated_at': datetime.utcnow()}
+
+
+def refresh_feeds(connection, audiences=None):
+    """
+    Перерисовывает фиды в transaction connection: audiences - {'group': {имена}, 'teacher': {...}}
+    или None - все фиды заново. Фиды, у которых не осталось занятий, удаляются.
+    Возвращает число сохраненных фидов.
+    """
+    if audiences is None:
+        connection.execute(text("DELETE FROM calendar_feeds"))
+        audiences = {kind: None for kind in FEED_DIMENSIONS}
+
+    saved = 0
+    for kind, names in audiences.items():
+        _, id_column, column, index = FEED_DIMENSIONS[kind]
+        if names is not None:
+            names = sorted(name for name in names if name)
+            if not names:
+                continue
+            connection.execute(text("DELETE FROM calendar_feeds WHERE kind = :kind AND name = ANY(:names)"),
+                               {'kind': kind, 'names': names})
+            condition, params = f"{column} = ANY(:names)", {'names': names}
+        else:
+            condition, params = f"{id_column} IS NOT NULL", {}
+        rows = connection.execute(text(f"{FEED_ROWS_SQL} WHERE {condition} ORDER BY {column}, s.date, s.id"),
+                                  params)
+
+        batch = []
+        for name, lessons in groupby(rows, key=lambda row: row[index]):
+            lessons = list(lessons)
+            body = b''.join(iter_calendar(feed_title(kind, name), [lessons]))
+            batch.append(_feed_row(kind, name, body, len(lessons)))
+            if len(batch) >= REFRESH_BATCH:
+                connection.execute(UPSERT_FEED, batch)
+                saved += len(batch)
+                batch = []
+        if batch:
+            connection.execute(UPSERT_FEED, batch)
+            saved += len(batch)
+    return saved
+
+
+def feed_audiences(diff):
+    """Группы и преподаватели, чьи фиды меняет schedule_diff.ScheduleDiff"""
+    audiences = {kind: set() for kind in FEED_DIMENSIONS}
+    lessons = chain(diff.added, diff.removed, *diff.moved, *diff.changed)
+    for lesson in lessons:
+        audiences['group'].add(lesson.group)
+        audiences['teacher'].add(lesson.teacher)
+    return audiences
+
+
+class FeedStore:
+    """Тела фидов в памяти процесса (LRU); актуальность проверяется по ETag из calendar_feeds"""
+
+    def __init__(self, max_entries=FEED_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # (вид, имя) -> (etag, тело)
+        self._lock = threading.Lock()
+
+    def body(self, kind, name, etag):
+        """Тело фида с данным ETag; из базы читается, только если в памяти другая версия"""
+        key = (kind, name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == etag:
+                self._entries.move_to_end(key)
+                return entry[1]
+        body = db.session.execute(
+            text("SELECT body FROM calendar_feeds WHERE kind = :kind AND name = :name AND etag = :etag"),
+            {'kind': kind, 'name': name, 'etag': etag}
+        ).scalar()
+        if body is None:
+            return None
+        body = bytes(body)
+        with self._lock:
+            self._entries[key] = (etag, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return body
+
+
+def _stream_feed(kind, name):
+    """Фид, которого нет в calendar_feeds: рисуется из курсора по мере отправки и сохраняется"""
+    column = FEED_DIMENSIONS[kind][2]
+    statement = text(f"{FEED_ROWS_SQL} WHERE {column} = :name ORDER BY s.date, s.id")
+
+    def generate():
+        parts, events = [], 0
+        with db.engine.connect() as connection:
+            result = connection.execute(statement, {'name': name},
+                                        execution_options={'yield_per': STREAM_CHUNK_ROWS})
+
+            def chunks():
+                nonlocal events
+                for chunk in result.partitions():
+                    events += len(chunk)
+                    yield chunk
+
+            for part in iter_calendar(feed_title(kind, name), chunks()):
+                parts.append(part)
+                yield part
+            connection.execute(INSERT_FEED, _feed_row(kind, name, b''.join(parts), events))
+            connection.commit()
+
+    return current_app.response_class(stream_with_context(generate()), mimetype=MIMETYPE)
+
+
+def calendar_response(kind, name):
+    """
+    Ответ на запрос фида: 304 по If-None-Match, готовое тело с ETag
+    или потоковая генерация, если фид еще не сохранен. None - у фида нет занятий.
+    """
+    etag = db.session.execute(
+        text("SELECT etag FROM calendar_feeds WHERE kind = :kind AND name = :name"),
+        {'kind': kind, 'name': name}
+    ).scalar()
+    if etag is not None:
+        if request.if_none_match.contains(etag):
+            response = current_app.response_class(status=304)
+        else:
+            body = current_app.extensions['calendar_feeds'].body(kind, name, etag)
+            if body is None:
+                # Фид перерисован между двумя запросами - отдаем заново
+                return calendar_response(kind, name)
+            response = current_app.response_class(body, mimetype=MIMETYPE)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    table, id_column, _, _ = FEED_DIMENSIONS[kind]
+    exists = db.session.execute(
+        text(f"SELECT 1 FROM schedules s JOIN {table} d ON d.id = {id_column} WHERE d.name = :name LIMIT 1"),
+        {'name': name}
+    ).scalar()
+    if exists is None:
+        return None
+    return _stream_feed(kind, name)
+
+
+def init_ical(app):
+    """Регистрирует хранилище фидов в приложении"""
+    store = FeedStore(app.config.get('CALENDAR_FEED_CACHE_SIZE', FEED_CACHE_SIZE))
+    app.extensions['calendar_feeds'] = store
+    return store
+
+
+# Занятия, измененные через ORM (не импортом), сбрасывают фиды своих групп и преподавателей
+@event.listens_for(db.session, 'after_flush')
+def _drop_changed_feeds(session, flush_context):
+    audiences = {kind: set() for kind in FEED_DIMENSIONS}
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if not isinstance(obj, Schedule):
+            continue
+        for kind, attribute in (('group', 'group_id'), ('teacher', 'teacher_id')):
+            history = inspect(obj).attrs[attribute].history
+            audiences[kind].update(value for value in chain(history.added, history.unchanged, history.deleted)
+                                   if value)
+    for kind, ids in audiences.items():
+        if ids:
+            session.execute(text(
+                f"DELETE FROM calendar_feeds WHERE kind = :kind "
+                f"AND name IN (SELECT name FROM {FEED_DIMENSIONS[kind][0]} WHERE id = ANY(:ids))"
+            ), {'kind': kind, 'ids': sorted(ids)})
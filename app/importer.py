@@ -0,0 +1,344 @@
+"""
+Массовая загрузка расписания из .ics файлов или CSV (university_schedule.csv) в PostgreSQL
+"""
+import csv
+import io
+import os
+import sys
+from collections import Counter
+from datetime import datetime
+
+from flask import current_app, has_app_context
+from sqlalchemy import insert, text
+
+from models import db, Schedule
+from cache import bump_data_version
+from dimensions import get_dimensions
+from search import refresh_search_index
+from notifications import changes_from_diff
+from ical import feed_audiences, refresh_feeds
+from occupancy import publish_version
+from schedule_diff import Lesson, diff_snapshots, is_empty
+
+# Каталог скриптов парсера; их модули импортируют друг друга по короткому имени
+CSV_PARSER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'csv_parser')
+
+# Размер пакета для executemany, если драйвер не поддерживает COPY
+BATCH_SIZE = 5000
+
+STAGING_COLUMNS = ('classroom_number', 'lesson', 'date', 'end_date', 'group_id', 'teacher_id', 'lesson_type_id')
+# Длины колонок schedules: более длинные значения не обрезаются (разные аудитории слились бы в одну)
+LOCATION_LENGTH = Schedule.__table__.c.classroom_number.type.length
+LESSON_LENGTH = Schedule.__table__.c.lesson.type.length
+
+
+def _parser():
+    """Ленивый импорт parser_to_csv из csv_parser"""
+    if CSV_PARSER_DIR not in sys.path:
+        sys.path.append(CSV_PARSER_DIR)
+    import parser_to_csv
+    return parser_to_csv
+
+
+def iter_source_rows(source):
+    """
+    Строки расписания в виде словарей с полями parser_to_csv.FIELDNAMES.
+    source - CSV файл, колоночный снимок (columnar.py) или каталог с .ics файлами (разбирается потоково).
+    """
+    parser = _parser()
+    # columnar (из каталога парсера) тянет NumPy - импортируется здесь, а не при запуске приложения
+    from columnar import is_snapshot, load_snapshot
+    if is_snapshot(source):
+        for row in load_snapshot(source).iter_rows():
+            yield dict(zip(parser.FIELDNAMES, row))
+    elif os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if name.endswith('.ics'):
+                for event in parser.iter_events(os.path.join(source, name)):
+                    yield dict(zip(parser.FIELDNAMES, parser.event_to_row(event)))
+    else:
+        with open(source, 'r', newline='', encoding='utf-8') as f:
+            yield from csv.DictReader(f)
+
+
+def iter_staging_rows(rows, dimensions, rejected=None):
+    """
+    Преобразует строки парсера в кортежи STAGING_COLUMNS для staging-таблицы;
+    группа, преподаватель и тип занятия переводятся в id справочников через кэш dimensions.
+    Строки с некорректной датой или временем, с концом не позже начала (Schedule.period
+    не построить) и со значениями длиннее колонок пропускаются и считаются в rejected
+    (Counter по причинам), а не обрывают импорт.
+    """
+    groups, teachers, lesson_types = dimensions.groups, dimensions.teachers, dimensions.lesson_types
+    rejected = rejected if rejected is not None else Counter()
+    for row in rows:
+        location = (row.get('location') or '').strip()
+        if not location or not row.get('date') or not row.get('start_time'):
+            # Занятия без аудитории или времени в таблицу schedules не попадают
+            continue
+        lesson = f"{row.get('type', '')} {row.get('subject', '')}".strip()
+        group, teacher, lesson_type = row.get('group'), row.get('teacher'), row.get('type')
+        too_long = next((reason for reason, value, limit in (
+            ('location_too_long', location, LOCATION_LENGTH),
+            ('lesson_too_long', lesson, LESSON_LENGTH),
+            ('group_too_long', group, groups.max_length),
+            ('teacher_too_long', teacher, teachers.max_length),
+            ('type_too_long', lesson_type, lesson_types.max_length),
+        ) if value and len(value) > limit), None)
+        if too_long:
+            rejected[too_long] += 1
+            continue
+        try:
+            start = datetime.strptime(f"{row['date']} {row['start_time']}", '%Y-%m-%d %H:%M')
+            end = None
+            if row.get('end_time'):
+                end = datetime.strptime(f"{row['date']} {row['end_time']}", '%Y-%m-%d %H:%M')
+        except ValueError:
+            rejected['invalid_time'] += 1
+            continue
+        if end is not None and end <= start:
+            rejected['inverted_interval'] += 1
+            continue
+        yield (location, lesson, start, end, groups.get(group), teachers.get(teacher), lesson_types.get(lesson_type))
+
+
+class CsvStream(io.RawIOBase):
+    """Файлоподобный объект, отдающий строки в формате CSV по мере чтения - для COPY FROM STDIN"""
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._buffer = b''
+        self._line = io.StringIO()
+        self._writer = csv.writer(self._line, lineterminator='\n')
+        self.count = 0
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            self._writer.writerow(row)
+            self._buffer += self._line.getvalue().encode('utf-8')
+            self._line.seek(0)
+            self._line.truncate()
+            self.count += 1
+        if size < 0:
+            size = len(self._buffer)
+        chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
+
+def _copy_rows(connection, rows):
+    """Загружает строки в staging-таблицу: COPY для psycopg2/psycopg 3, иначе пакетный executemany"""
+    copy_sql = f"COPY schedule_staging ({', '.join(STAGING_COLUMNS)}) FROM STDIN"
+    driver = connection.dialect.driver
+
+    if driver == 'psycopg2':
+        stream = CsvStream(rows)
+        with connection.connection.driver_connection.cursor() as cursor:
+            cursor.copy_expert(f"{copy_sql} WITH (FORMAT csv)", stream)
+        return stream.count
+
+    if driver == 'psycopg':
+        count = 0
+        with connection.connection.driver_connection.cursor() as cursor:
+            with cursor.copy(copy_sql) as copy:
+                for row in rows:
+                    copy.write_row(row)
+                    count += 1
+        return count
+
+    insert_sql = text(
+        f"INSERT INTO schedule_staging ({', '.join(STAGING_COLUMNS)}) "
+        f"VALUES ({', '.join(':' + column for column in STAGING_COLUMNS)})"
+    )
+    count = 0
+    batch = []
+    for row in rows:
+        batch.append(dict(zip(STAGING_COLUMNS, row)))
+        if len(batch) >= BATCH_SIZE:
+            connection.execute(insert_sql, batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        connection.execute(insert_sql, batch)
+        count += len(batch)
+    return count
+
+
+# Колонки schedules (s) и имена из справочников в порядке полей schedule_diff.Lesson
+LESSON_COLUMNS = 'g.name, s.classroom_number, s.date, s.end_date, s.lesson, t.name'
+LESSON_JOINS = (
+    "LEFT JOIN groups g ON g.id = s.group_id "
+    "LEFT JOIN teachers t ON t.id = s.teacher_id "
+    "LEFT JOIN lesson_types lt ON lt.id = s.lesson_type_id"
+)
+
+
+def _load_lessons(connection, table, start, end, with_id=False):
+    """Занятия таблицы за [start, end) в виде schedule_diff.Lesson"""
+    columns = f"{LESSON_COLUMNS}, {'s.id' if with_id else 'NULL'}, lt.name"
+    rows = connection.execute(
+        text(f"SELECT {columns} FROM {table} s {LESSON_JOINS} WHERE s.date >= :start AND s.date < :end"),
+        {'start': start, 'end': end}
+    )
+    return [Lesson(*row) for row in rows]
+
+
+def _lesson_values(lesson, dimensions):
+    return {'classroom_number': lesson.classroom, 'lesson': lesson.lesson, 'date': lesson.start,
+            'end_date': lesson.end, 'group_id': dimensions.groups.get(lesson.group),
+            'teacher_id': dimensions.teachers.get(lesson.teacher),
+            'lesson_type_id': dimensions.lesson_types.get(lesson.lesson_type)}
+
+
+def apply_diff(connection, diff, dimensions=None):
+    """
+    Применяет к schedules только изменения: удаление, обновление на месте (перенос
+    и изменение содержимого сохраняют id строки) и вставку.
+    Возвращает (удалено, обновлено, [(id, Lesson) добавленных]).
+    """
+    dimensions = dimensions or get_dimensions()
+    deleted = 0
+    if diff.removed:
+        deleted = connection.execute(
+            text("DELETE FROM schedules WHERE id = ANY(:ids)"),
+            {'ids': [lesson.id for lesson in diff.removed]}
+        ).rowcount
+
+    updates = [{'id': old.id, **_lesson_values(new, dimensions)} for old, new in diff.moved + diff.changed]
+    if updates:
+        connection.execute(text(
+            "UPDATE schedules SET classroom_number = :classroom_number, lesson = :lesson, date = :date, "
+            "end_date = :end_date, group_id = :group_id, teacher_id = :teacher_id, "
+            "lesson_type_id = :lesson_type_id WHERE id = :id"
+        ), updates)
+
+    added = []
+    if diff.added:
+        table = Schedule.__table__
+        ids = connection.execute(
+            insert(table).returning(table.c.id, sort_by_parameter_order=True),
+            [_lesson_values(lesson, dimensions) for lesson in diff.added]
+        ).scalars().all()
+        added = list(zip(ids, diff.added))
+    return deleted, len(updates), added
+
+
+def _update_occupancy(diff, added, version=None):
+    """
+    Переносит изменения занятий в индекс занятости аудиторий без полного перестроения;
+    version - версия данных занятости, опубликованная транзакцией импорта
+    """
+    if not (has_app_context() and 'occupancy' in current_app.extensions):
+        return
+    index = current_app.extensions['occupancy']
+    if diff is None:
+        index.invalidate()
+        return
+    for lesson in diff.removed:
+        index.remove_schedule(lesson.id)
+    for old, new in diff.moved + diff.changed:
+        index.apply_schedule(old.id, new.classroom, new.start, new.end)
+    for row_id, lesson in added:
+        index.apply_schedule(row_id, lesson.classroom, lesson.start, lesson.end)
+    index.advance(version)
+
+
+def import_schedule(source, semester_start=None, semester_end=None, notify=True, full=False):
+    """
+    Загружает расписание из source одной транзакцией:
+    строки идут через временную staging-таблицу, новые аудитории добавляются в classrooms,
+    новые группы, преподаватели и типы занятий - в справочники (dimensions.py).
+    Занятия семестра [semester_start, semester_end) сравниваются с уже загруженными
+    (schedule_diff), и в schedules применяются только добавления, удаления и переносы.
+    При первой загрузке периода или full=True занятия периода заменяются целиком.
+    Если границы семестра не заданы, берется диапазон дат из загружаемых данных.
+    notify - разослать уведомления группам и преподавателям, чьи занятия изменились.
+    iCal-фиды (ical.py) изменившихся групп и преподавателей перерисовываются заранее.
+    Возвращает словарь со статистикой (rejected - пропущенные некорректные строки, см. iter_staging_rows).
+    """
+    dimensions = get_dimensions()
+    with db.engine.begin() as connection:
+        # Версия данных занятости увеличивается в конце транзакции, а не триггером на первой
+        # записи: иначе строка версии была бы заблокирована для бронирований на весь импорт
+        connection.execute(text("SET LOCAL timetable.defer_occupancy_version = 'on'"))
+        connection.execute(text(
+            "CREATE TEMP TABLE schedule_staging ("
+            " classroom_number VARCHAR(20) NOT NULL,"
+            " lesson VARCHAR(100) NOT NULL,"
+            " date TIMESTAMP NOT NULL,"
+            " end_date TIMESTAMP,"
+            " group_id INTEGER,"
+            " teacher_id INTEGER,"
+            " lesson_type_id INTEGER"
+            ") ON COMMIT DROP"
+        ))
+        rejected = Counter()
+        staged = _copy_rows(connection, iter_staging_rows(iter_source_rows(source), dimensions, rejected))
+
+        bounds = connection.execute(text(
+            "SELECT date_trunc('day', min(date)), date_trunc('day', max(date)) + interval '1 day' "
+            "FROM schedule_staging"
+        )).one()
+        start = semester_start or bounds[0]
+        end = semester_end or bounds[1]
+        if start is None or end is None:
+            return {'staged': 0, 'rejected': sum(rejected.values()), 'classrooms': 0, 'deleted': 0,
+                    'inserted': 0, 'updated': 0, 'changes': 0, 'feeds': 0}
+
+        classrooms = connection.execute(text(
+            "INSERT INTO classrooms (number) "
+            "SELECT DISTINCT classroom_number FROM schedule_staging "
+            "ON CONFLICT (number) DO NOTHING"
+        )).rowcount
+
+        # При первой загрузке периода сравнивать не с чем
+        old = _load_lessons(connection, 'schedules', start, end, with_id=True)
+        diff = diff_snapshots(old, _load_lessons(connection, 'schedule_staging', start, end)) if old else None
+
+        if diff is None or full:
+            deleted = connection.execute(
+                text("DELETE FROM schedules WHERE date >= :start AND date < :end"),
+                {'start': start, 'end': end}
+            ).rowcount
+            inserted = connection.execute(text(
+                f"INSERT INTO schedules ({', '.join(STAGING_COLUMNS)}) "
+                f"SELECT {', '.join(STAGING_COLUMNS)} FROM schedule_staging "
+                "WHERE date >= :start AND date < :end"
+            ), {'start': start, 'end': end}).rowcount
+            updated, added = 0, None
+
+            # Статистика планировщика после массовой замены строк
+            connection.execute(text("ANALYZE schedules"))
+            feeds = refresh_feeds(connection)
+        else:
+            deleted, updated, added = apply_diff(connection, diff, dimensions)
+            inserted = len(added)
+            # iCal-фиды затронутых групп и преподавателей меняются в той же транзакции
+            feeds = refresh_feeds(connection, feed_audiences(diff)) if not is_empty(diff) else 0
+
+        version = None
+        if added is None or classrooms or not is_empty(diff):
+            version = publish_version(connection)
+
+    # Кэши и индексы сбрасываются, только если расписание действительно изменилось
+    if added is None:
+        _update_occupancy(None, None)
+        bump_data_version()
+        refresh_search_index()
+    elif not is_empty(diff):
+        _update_occupancy(diff, added, version)
+        bump_data_version()
+        refresh_search_index()
+
+    # Уведомления рассылаются фоновым потоком уже после коммита
+    changes = changes_from_diff(diff) if notify and diff is not None else []
+    if changes and has_app_context() and 'notifications' in current_app.extensions:
+        current_app.extensions['notifications'].submit(changes)
+
+    return {'staged': staged, 'rejected': sum(rejected.values()), 'classrooms': classrooms, 'deleted': deleted,
+            'inserted': inserted, 'updated': updated, 'changes': len(changes), 'feeds': feeds}
@@ -0,0 +1,92 @@
+"""
+Нагрузочный тест HTTP API: задержки p50/p99 и пропускная способность по эндпоинтам.
+
+Потоки-клиенты в течение --duration секунд по кругу запрашивают пути из --paths
+(по умолчанию - основные GET-эндпоинты). Запускается против работающего сервера:
+
+    python wsgi.py &
+    python loadtest.py --url http://localhost:8000 --concurrency 32 --duration 30
+"""
+import argparse
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+DEFAULT_PATHS = [
+    '/classrooms',
+    '/users',
+    '/schedules?limit=100',
+    '/bookings?limit=100',
+    '/classrooms/free?start=2025-10-20T10:00&end=2025-10-20T11:30',
+    '/health',
+]
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:8000')
+    parser.add_argument('--paths', nargs='+', default=DEFAULT_PATHS)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--warmup', type=float, default=2, help='секунд прогрева, не попадающих в статистику')
+    args = parser.parse_args()
+
+    latencies = defaultdict(list)
+    statuses = Counter()
+    lock = threading.Lock()
+    started = time.perf_counter()
+    measure_from = started + args.warmup
+    deadline = measure_from + args.duration
+
+    def client(offset):
+        local_latencies = defaultdict(list)
+        local_statuses = Counter()
+        with requests.Session() as session:
+            i = offset
+            while True:
+                path = args.paths[i % len(args.paths)]
+                i += 1
+                begin = time.perf_counter()
+                if begin >= deadline:
+                    break
+                try:
+                    status = session.get(args.url + path).status_code
+                except requests.RequestException:
+                    status = 'error'
+                if begin >= measure_from:
+                    local_latencies[path].append(time.perf_counter() - begin)
+                    local_statuses[status] += 1
+        with lock:
+            for path, values in local_latencies.items():
+                latencies[path].extend(values)
+            statuses.update(local_statuses)
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(client, range(args.concurrency)))
+
+    total = sum(len(values) for values in latencies.values())
+    print(f"concurrency: {args.concurrency}, seconds: {args.duration:.0f}, requests: {total}, "
+          f"rps: {total / args.duration:.0f}, statuses: {dict(statuses)}")
+    print(f"{'path':<64} {'count':>7} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    everything = []
+    for path in args.paths:
+        values = sorted(latencies[path])
+        everything += values
+        if values:
+            print(f"{path:<64} {len(values):>7} {percentile(values, 0.5) * 1000:>8.1f} "
+                  f"{percentile(values, 0.99) * 1000:>8.1f} {values[-1] * 1000:>8.1f}")
+    everything.sort()
+    if everything:
+        print(f"{'all':<64} {len(everything):>7} {percentile(everything, 0.5) * 1000:>8.1f} "
+              f"{percentile(everything, 0.99) * 1000:>8.1f} {everything[-1] * 1000:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+"""
+Метрики запросов и SQL для University Management System
+
+Для каждого эндпоинта (правило маршрута + метод) собираются гистограмма задержек,
+число ответов с ошибкой, а также количество и суммарное время SQL-запросов.
+Запросы дольше SLOW_QUERY_MS пишутся в лог. Если в рамках одного HTTP-запроса
+один и тот же SQL выполняется N_PLUS_ONE_THRESHOLD раз и больше (типичный случай -
+ленивая загрузка Classroom.schedules/bookings в цикле), это считается N+1
+и тоже пишется в лог. Метрики отдаются на /metrics в формате Prometheus
+(или JSON с ?format=json).
+
+Метрики свои в каждом процессе сервера. За gunicorn с несколькими воркерами (wsgi.py)
+/metrics отвечает тот воркер, которому достался запрос, поэтому у всех рядов есть метка
+worker (pid процесса): ряды разных воркеров не смешиваются, счетчик не "скачет" между
+значениями разных процессов, а перезапуск воркера выглядит как новый ряд. Prometheus
+со временем собирает ряды всех воркеров; итог по сервису - агрегация без метки worker,
+например sum without (worker) (rate(http_request_errors_total[5m])). Для полного
+среза на каждом опросе воркеры запускаются на отдельных портах, и опрашивается каждый.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+
+from flask import Response, g, has_request_context, jsonify, request
+from sqlalchemy import event
+
+from models import db
+
+# Верхние границы корзин гистограммы задержек, секунды
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+DEFAULT_SLOW_QUERY_MS = 200
+DEFAULT_N_PLUS_ONE_THRESHOLD = 10
+# Длина текста SQL в логах и метриках
+STATEMENT_PREVIEW = 200
+
+# Семейства метрик эндпоинтов: (имя, тип, описание, значение из EndpointStats); гистограмма задержек - отдельно
+ENDPOINT_COUNTERS = (
+    ('http_request_errors_total', 'Ответы с кодом 5xx', lambda s: s.errors),
+    ('http_request_sql_queries_total', 'SQL-запросы при обработке запросов', lambda s: s.queries),
+    ('http_request_sql_seconds_total', 'Время SQL-запросов при обработке запросов, секунды',
+     lambda s: f'{s.query_seconds:.6f}'),
+    ('http_request_n_plus_one_total', 'Запросы с признаками N+1', lambda s: s.n_plus_one),
+)
+
+
+class EndpointStats:
+    __slots__ = ('count', 'errors', 'seconds', 'buckets', 'queries', 'query_seconds', 'n_plus_one')
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)   # последняя - +Inf
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.n_plus_one = 0
+
+
+class Metrics:
+    """Накопитель метрик процесса"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints = {}
+        self.slow_queries = 0
+        # Последние замеченные N+1: текст SQL -> (эндпоинт, число повторов)
+        self.n_plus_one_samples = {}
+
+    def observe(self, endpoint, status, seconds, queries, query_seconds, repeated):
+        with self._lock:
+            stats = self.endpoints.get(endpoint)
+            if stats is None:
+                stats = self.endpoints[endpoint] = EndpointStats()
+            stats.count += 1
+            stats.errors += status >= 500
+            stats.seconds += seconds
+            stats.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            stats.queries += queries
+            stats.query_seconds += query_seconds
+            if repeated:
+                stats.n_plus_one += 1
+                for statement, count in repeated:
+                    self.n_plus_one_samples[statement] = (endpoint, count)
+
+    def slow_query(self):
+        with self._lock:
+            self.slow_queries += 1
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'worker': os.getpid(),
+                'endpoints': {
+                    endpoint: {
+                        'count': s.count,
+                        'errors': s.errors,
+                        'seconds_sum': round(s.seconds, 6),
+                        'latency_buckets': dict(zip([*map(str, LATENCY_BUCKETS), '+Inf'], s.buckets)),
+                        'sql_queries': s.queries,
+                        'sql_seconds_sum': round(s.query_seconds, 6),
+                        'n_plus_one': s.n_plus_one,
+                    } for endpoint, s in sorted(self.endpoints.items())
+                },
+                'slow_queries': self.slow_queries,
+                'n_plus_one_samples': [
+                    {'endpoint': endpoint, 'repeats': count, 'statement': statement}
+                    for statement, (endpoint, count) in self.n_plus_one_samples.items()
+                ],
+            }
+
+    def to_prometheus(self):
+        """Text format Prometheus: каждое семейство - один блок HELP/TYPE и все его ряды"""
+        worker = f'worker="{os.getpid()}"'
+        with self._lock:
+            endpoints = []
+            for endpoint, s in sorted(self.endpoints.items()):
+                method, rule = endpoint.split(' ', 1)
+                endpoints.append((f'{worker},method="{method}",endpoint="{rule}"', s))
+
+            lines = ['# HELP http_request_duration_seconds Время обработки запроса, секунды',
+                     '# TYPE http_request_duration_seconds histogram']
+            for labels, s in endpoints:
+                cumulative = 0
+                for bound, count in zip([*map(str, LATENCY_BUCKETS), '+Inf'], s.buckets):
+                    cumulative += count
+                    lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'http_request_duration_seconds_sum{{{labels}}} {s.seconds:.6f}')
+                lines.append(f'http_request_duration_seconds_count{{{labels}}} {s.count}')
+            for name, help_text, value in ENDPOINT_COUNTERS:
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+                lines += [f'{name}{{{labels}}} {value(s)}' for labels, s in endpoints]
+            lines += [
+                '# HELP sql_slow_queries_total SQL-запросы дольше SLOW_QUERY_MS',
+                '# TYPE sql_slow_queries_total counter',
+                f'sql_slow_queries_total{{{worker}}} {self.slow_queries}',
+            ]
+        return '\n'.join(lines) + '\n'
+
+
+def _endpoint_name():
+    rule = request.url_rule.rule if request.url_rule else 'unmatched'
+    return f'{request.method} {rule}'
+
+
+def init_metrics(app):
+    """Подключает сбор метрик к приложению (после db.init_app) и регистрирует /metrics"""
+    metrics = Metrics()
+    app.extensions['metrics'] = metrics
+    slow_query_seconds = app.config.get('SLOW_QUERY_MS', DEFAULT_SLOW_QUERY_MS) / 1000
+    n_plus_one_threshold = app.config.get('N_PLUS_ONE_THRESHOLD', DEFAULT_N_PLUS_ONE_THRESHOLD)
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info['query_started'].pop()
+        if seconds >= slow_query_seconds:
+            metrics.slow_query()
+            app.logger.warning('Медленный SQL (%.0f мс): %s', seconds * 1000, statement[:STATEMENT_PREVIEW])
+        if has_request_context() and 'sql_statements' in g:
+            g.sql_statements[statement] += 1
+            g.sql_seconds += seconds
+
+    @event.listens_for(engine, 'handle_error')
+    def handle_error(exception_context):
+        started = exception_context.connection.info.get('query_started') if exception_context.connection else None
+        if started:
+            started.pop()
+
+    @app.before_request
+    def start_request_metrics():
+        g.request_started = time.perf_counter()
+        g.sql_statements = Counter()
+        g.sql_seconds = 0.0
+
+    @app.after_request
+    def record_request_metrics(response):
+        if 'request_started' not in g:
+            return response
+        seconds = time.perf_counter() - g.request_started
+        endpoint = _endpoint_name()
+        repeated = [
+            (statement[:STATEMENT_PREVIEW], count)
+            for statement, count in g.sql_statements.items() if count >= n_plus_one_threshold
+        ]
+        for statement, count in repeated:
+            app.logger.warning('Вероятный N+1 в %s: запрос выполнен %d раз: %s', endpoint, count, statement)
+        metrics.observe(endpoint, response.status_code, seconds,
+                        sum(g.sql_statements.values()), g.sql_seconds, repeated)
+        response.headers['Server-Timing'] = (
+            f'app;dur={seconds * 1000:.1f}, sql;dur={g.sql_seconds * 1000:.1f}'
+        )
+        # Запросы потоковой выгрузки выполняются уже после ответа и сюда не относятся
+        del g.sql_statements
+        return response
+
+    @app.route('/metrics')
+    def metrics_endpoint():
+        """Метрики процесса: Prometheus text format или JSON (?format=json)"""
+        if request.args.get('format') == 'json':
+            return jsonify(metrics.to_dict())
+        return Response(metrics.to_prometheus(), mimetype='text/plain; version=0.0.4')
+
+    return metrics
@@ -0,0 +1,212 @@
+"""
+Миграции схемы базы данных University Management System
+
+db.create_all() создает только отсутствующие таблицы и не меняет существующие,
+поэтому изменения схемы описываются здесь упорядоченным списком SQL-шагов.
+Примененные версии хранятся в таблице schema_version. Шаги пишутся идемпотентными
+(IF NOT EXISTS), чтобы их можно было применить и к базе, только что созданной create_all.
+"""
+from sqlalchemy import text
+
+from models import db
+
+# Включает btree_gist, если расширение доступно на сервере (нужно для GiST-индексов
+# с равенством по аудитории); без него остаются индексы только по интервалу
+ENABLE_BTREE_GIST = """
+DO $$
+BEGIN
+    CREATE EXTENSION IF NOT EXISTS btree_gist;
+EXCEPTION WHEN OTHERS THEN
+    RAISE NOTICE 'btree_gist недоступно: %', SQLERRM;
+END
+$$
+"""
+
+
+def _if_btree_gist(statement):
+    """Выполняет statement, только если установлено расширение btree_gist"""
+    return f"""
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'btree_gist') THEN
+        EXECUTE $sql${statement}$sql$;
+    END IF;
+END
+$$
+"""
+
+
+# Запрет пересечения бронирований одной аудитории на уровне базы (нужен btree_gist
+# для равенства по classroom_number). Если в таблице уже есть пересечения,
+# ограничение не создается - их нужно разобрать вручную и применить шаг повторно.
+BOOKINGS_NO_OVERLAP = """
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'btree_gist')
+       AND NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'bookings_no_overlap') THEN
+        ALTER TABLE bookings ADD CONSTRAINT bookings_no_overlap
+            EXCLUDE USING gist (classroom_number WITH =, period WITH &&);
+    END IF;
+EXCEPTION WHEN exclusion_violation THEN
+    RAISE NOTICE 'bookings_no_overlap не создано: в bookings есть пересекающиеся бронирования';
+END
+$$
+"""
+
+
+def _move_to_dimension(column, table, id_column):
+    """
+    Переносит текстовую колонку schedules в справочник table: имена добавляются
+    в справочник, в id_column проставляются ссылки, колонка (и индексы по ней) удаляется
+    """
+    return f"""
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM information_schema.columns
+               WHERE table_schema = current_schema() AND table_name = 'schedules' AND column_name = '{column}') THEN
+        INSERT INTO {table} (name) SELECT DISTINCT {column} FROM schedules WHERE {column} IS NOT NULL
+            ON CONFLICT (name) DO NOTHING;
+        UPDATE schedules s SET {id_column} = d.id FROM {table} d WHERE d.name = s.{column};
+        ALTER TABLE schedules DROP COLUMN {column};
+    END IF;
+END
+$$
+"""
+
+
+# (версия, описание, SQL-шаги)
+# Версия данных занятости аудиторий (occupancy.py): увеличивается один раз за транзакцию,
+# изменившую bookings, schedules или classrooms, в том числе в других процессах и из SQL.
+# С версии 8 - и users, groups, teachers, lesson_types: по ней же проверяется кэш ответов (cache.py).
+# Строка блокируется до коммита транзакции, поэтому импорт (importer.py) откладывает
+# увеличение до конца транзакции через timetable.defer_occupancy_version
+OCCUPANCY_VERSION_FUNCTION = """
+CREATE OR REPLACE FUNCTION bump_occupancy_version() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF current_setting('timetable.defer_occupancy_version', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    UPDATE data_versions SET version = version + 1, txid = txid_current()
+    WHERE name = 'occupancy' AND txid IS DISTINCT FROM txid_current();
+    RETURN NULL;
+END
+$$
+"""
+
+
+def _occupancy_version_trigger(table):
+    return [
+        f"DROP TRIGGER IF EXISTS occupancy_version ON {table}",
+        f"CREATE TRIGGER occupancy_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} "
+        "FOR EACH STATEMENT EXECUTE FUNCTION bump_occupancy_version()",
+    ]
+
+
+MIGRATIONS = [
+    (1, "Интервалы занятий и бронирований, индексы по аудитории и времени", [
+        "ALTER TABLE schedules ADD COLUMN IF NOT EXISTS end_date TIMESTAMP",
+        "ALTER TABLE schedules ADD COLUMN IF NOT EXISTS period TSRANGE GENERATED ALWAYS AS "
+        "(tsrange(date, coalesce(end_date, date + interval '90 minutes'))) STORED",
+        "ALTER TABLE bookings ADD COLUMN IF NOT EXISTS period TSRANGE GENERATED ALWAYS AS "
+        "(tsrange(date, date + duration * interval '1 minute')) STORED",
+        "CREATE INDEX IF NOT EXISTS ix_schedules_classroom_date ON schedules (classroom_number, date)",
+        "CREATE INDEX IF NOT EXISTS ix_bookings_classroom_date ON bookings (classroom_number, date)",
+        "CREATE INDEX IF NOT EXISTS ix_schedules_period ON schedules USING gist (period)",
+        "CREATE INDEX IF NOT EXISTS ix_bookings_period ON bookings USING gist (period)",
+        ENABLE_BTREE_GIST,
+        _if_btree_gist("CREATE INDEX IF NOT EXISTS ix_schedules_classroom_period "
+                       "ON schedules USING gist (classroom_number, period)"),
+        _if_btree_gist("CREATE INDEX IF NOT EXISTS ix_bookings_classroom_period "
+                       "ON bookings USING gist (classroom_number, period)"),
+    ]),
+    (2, "Группа и преподаватель занятия, индексы для постраничной выдачи", [
+        "ALTER TABLE schedules ADD COLUMN IF NOT EXISTS group_name VARCHAR(50)",
+        "ALTER TABLE schedules ADD COLUMN IF NOT EXISTS teacher VARCHAR(100)",
+        "CREATE INDEX IF NOT EXISTS ix_schedules_date_id ON schedules (date, id)",
+        "CREATE INDEX IF NOT EXISTS ix_schedules_group_date ON schedules (group_name, date)",
+        "CREATE INDEX IF NOT EXISTS ix_schedules_teacher_date ON schedules (teacher, date)",
+        "CREATE INDEX IF NOT EXISTS ix_bookings_date_id ON bookings (date, id)",
+    ]),
+    (3, "Запрет пересечения бронирований одной аудитории", [
+        ENABLE_BTREE_GIST,
+        BOOKINGS_NO_OVERLAP,
+    ]),
+    (4, "Уведомления об изменениях расписания", [
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS group_name VARCHAR(50)",
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS teacher_name VARCHAR(100)",
+        "CREATE INDEX IF NOT EXISTS ix_users_group_name ON users (group_name)",
+        "CREATE INDEX IF NOT EXISTS ix_users_teacher_name ON users (teacher_name)",
+        "ALTER TABLE notifications ADD COLUMN IF NOT EXISTS read_at TIMESTAMP",
+        "CREATE INDEX IF NOT EXISTS ix_notifications_user_created ON notifications (user_id, created_at)",
+    ]),
+    (5, "Готовые iCal-фиды групп и преподавателей", [
+        "CREATE TABLE IF NOT EXISTS calendar_feeds ("
+        " kind VARCHAR(10) NOT NULL,"
+        " name VARCHAR(100) NOT NULL,"
+        " etag VARCHAR(40) NOT NULL,"
+        " body BYTEA NOT NULL,"
+        " events INTEGER NOT NULL,"
+        " updated_at TIMESTAMP NOT NULL DEFAULT now(),"
+        " PRIMARY KEY (kind, name)"
+        ")",
+    ]),
+    (6, "Справочники групп, преподавателей и типов занятий вместо текста в schedules", [
+        "CREATE TABLE IF NOT EXISTS groups (id SERIAL PRIMARY KEY, name VARCHAR(50) NOT NULL UNIQUE)",
+        "CREATE TABLE IF NOT EXISTS teachers (id SERIAL PRIMARY KEY, name VARCHAR(100) NOT NULL UNIQUE)",
+        "CREATE TABLE IF NOT EXISTS lesson_types (id SERIAL PRIMARY KEY, name VARCHAR(50) NOT NULL UNIQUE)",
+        "ALTER TABLE schedules ADD COLUMN IF NOT EXISTS group_id INTEGER REFERENCES groups (id)",
+        "ALTER TABLE schedules ADD COLUMN IF NOT EXISTS teacher_id INTEGER REFERENCES teachers (id)",
+        "ALTER TABLE schedules ADD COLUMN IF NOT EXISTS lesson_type_id INTEGER REFERENCES lesson_types (id)",
+        _move_to_dimension('group_name', 'groups', 'group_id'),
+        _move_to_dimension('teacher', 'teachers', 'teacher_id'),
+        "CREATE INDEX IF NOT EXISTS ix_schedules_group_date ON schedules (group_id, date)",
+        "CREATE INDEX IF NOT EXISTS ix_schedules_teacher_date ON schedules (teacher_id, date)",
+        "ANALYZE schedules",
+    ]),
+    (7, "Версия данных занятости аудиторий для проверки индекса в каждом процессе", [
+        "CREATE TABLE IF NOT EXISTS data_versions ("
+        " name VARCHAR(30) PRIMARY KEY,"
+        " version BIGINT NOT NULL DEFAULT 0,"
+        " txid BIGINT"
+        ")",
+        "INSERT INTO data_versions (name) VALUES ('occupancy') ON CONFLICT (name) DO NOTHING",
+        OCCUPANCY_VERSION_FUNCTION,
+        *_occupancy_version_trigger('bookings'),
+        *_occupancy_version_trigger('schedules'),
+        *_occupancy_version_trigger('classrooms'),
+    ]),
+    (8, "Версия данных меняется и при изменении пользователей и справочников (ключ кэша ответов)", [
+        *_occupancy_version_trigger('users'),
+        *_occupancy_version_trigger('groups'),
+        *_occupancy_version_trigger('teachers'),
+        *_occupancy_version_trigger('lesson_types'),
+    ]),
+]
+
+
+def migrate():
+    """Применяет недостающие миграции в одной транзакции. Возвращает список примененных версий"""
+    applied_now = []
+    with db.engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_version ("
+            " version INTEGER PRIMARY KEY,"
+            " description TEXT,"
+            " applied_at TIMESTAMP NOT NULL DEFAULT now()"
+            ")"
+        ))
+        # Блокировка не дает двум процессам применять миграции одновременно
+        connection.execute(text("LOCK TABLE schema_version IN EXCLUSIVE MODE"))
+        applied = set(connection.execute(text("SELECT version FROM schema_version")).scalars())
+
+        for version, description, statements in MIGRATIONS:
+            if version in applied:
+                continue
+            for statement in statements:
+                connection.execute(text(statement))
+            connection.execute(
+                text("INSERT INTO schema_version (version, description) VALUES (:version, :description)"),
+                {'version': version, 'description': description}
+            )
+            applied_now.append(version)
+    return applied_now
@@ -2,6 +2,8 @@
 Модели базы данных для University Management System
 """
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import TSRANGE
 from datetime import datetime
 
 # Инициализируем экземпляр SQLAlchemy
@@ -13,6 +15,9 @@ class User(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     role = db.Column(db.String(50), nullable=False)
+    # Чье расписание касается пользователя: группа студента или ФИО преподавателя как в расписании
+    group_name = db.Column(db.String(50), index=True)
+    teacher_name = db.Column(db.String(100), index=True)
     notifications = db.relationship('Notification', backref='user', lazy=True)
 
     def __repr__(self):
@@ -21,11 +26,15 @@ class User(db.Model):
 
 class Notification(db.Model):
     __tablename__ = 'notifications'
+    __table_args__ = (
+        db.Index('ix_notifications_user_created', 'user_id', 'created_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     message = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    read_at = db.Column(db.DateTime)
 
     def __repr__(self):
         return f'<Notification {self.id}>'
@@ -45,13 +54,70 @@ class Classroom(db.Model):
         return f'<Classroom {self.number}>'
 
 
+class Group(db.Model):
+    __tablename__ = 'groups'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), unique=True, nullable=False)
+
+    def __repr__(self):
+        return f'<Group {self.name}>'
+
+
+class Teacher(db.Model):
+    __tablename__ = 'teachers'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)
+
+    def __repr__(self):
+        return f'<Teacher {self.name}>'
+
+
+class LessonType(db.Model):
+    __tablename__ = 'lesson_types'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), unique=True, nullable=False)  # 'лек', 'пр', 'лаб', ...
+
+    def __repr__(self):
+        return f'<LessonType {self.name}>'
+
+
 class Schedule(db.Model):
     __tablename__ = 'schedules'
+    __table_args__ = (
+        db.Index('ix_schedules_classroom_date', 'classroom_number', 'date'),
+        db.Index('ix_schedules_period', 'period', postgresql_using='gist'),
+        db.Index('ix_schedules_date_id', 'date', 'id'),
+        db.Index('ix_schedules_group_date', 'group_id', 'date'),
+        db.Index('ix_schedules_teacher_date', 'teacher_id', 'date'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     classroom_number = db.Column(db.String(20), db.ForeignKey('classrooms.number'), nullable=False)
     lesson = db.Column(db.String(100), nullable=False)
     date = db.Column(db.DateTime, nullable=False)
+    end_date = db.Column(db.DateTime)
+    # Группа, преподаватель и тип занятия - ссылки на справочники (dimensions.py)
+    group_id = db.Column(db.Integer, db.ForeignKey('groups.id'))
+    teacher_id = db.Column(db.Integer, db.ForeignKey('teachers.id'))
+    lesson_type_id = db.Column(db.Integer, db.ForeignKey('lesson_types.id'))
+    group = db.relationship('Group')
+    teacher = db.relationship('Teacher')
+    lesson_type = db.relationship('LessonType')
+    # Интервал занятия [date, end_date); для старых строк без end_date - одна пара (90 минут)
+    period = db.Column(TSRANGE, db.Computed(
+        "tsrange(date, coalesce(end_date, date + interval '90 minutes'))", persisted=True
+    ))
+
+    @classmethod
+    def overlapping(cls, start, end, classroom_number=None):
+        """Занятия, пересекающиеся с интервалом [start, end) - поиск по GiST-индексу"""
+        query = cls.query.filter(cls.period.op('&&')(func.tsrange(start, end)))
+        if classroom_number is not None:
+            query = query.filter(cls.classroom_number == classroom_number)
+        return query
 
     def __repr__(self):
         return f'<Schedule {self.id}: {self.lesson}>'
@@ -59,19 +125,51 @@ class Schedule(db.Model):
 
 class Booking(db.Model):
     __tablename__ = 'bookings'
+    __table_args__ = (
+        db.Index('ix_bookings_classroom_date', 'classroom_number', 'date'),
+        db.Index('ix_bookings_period', 'period', postgresql_using='gist'),
+        db.Index('ix_bookings_date_id', 'date', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     classroom_number = db.Column(db.String(20), db.ForeignKey('classrooms.number'), nullable=False)
     date = db.Column(db.DateTime, nullable=False)
-    duration = db.Column(db.Integer, nullable=False)
+    duration = db.Column(db.Integer, nullable=False)  # в минутах
     description = db.Column(db.Text)
+    # Интервал бронирования [date, date + duration), вычисляется базой данных
+    period = db.Column(TSRANGE, db.Computed(
+        "tsrange(date, date + duration * interval '1 minute')", persisted=True
+    ))
+
+    @classmethod
+    def overlapping(cls, start, end, classroom_number=None):
+        """Бронирования, пересекающиеся с интервалом [start, end) - поиск по GiST-индексу"""
+        query = cls.query.filter(cls.period.op('&&')(func.tsrange(start, end)))
+        if classroom_number is not None:
+            query = query.filter(cls.classroom_number == classroom_number)
+        return query
 
     def __repr__(self):
         return f'<Booking {self.id}>'
 
 
+class CalendarFeed(db.Model):
+    """Готовый iCal-фид группы или преподавателя (см. ical.py); etag - хэш тела"""
+    __tablename__ = 'calendar_feeds'
+
+    kind = db.Column(db.String(10), primary_key=True)  # 'group' | 'teacher'
+    name = db.Column(db.String(100), primary_key=True)
+    etag = db.Column(db.String(40), nullable=False)
+    body = db.Column(db.LargeBinary, nullable=False)
+    events = db.Column(db.Integer, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<CalendarFeed {self.kind}:{self.name}>'
+
+
 def init_db():
-    """Инициализация базы данных - создание всех таблиц"""
+    """Инициализация базы данных - создание всех таблиц и миграции; возвращает примененные миграции"""
     from sqlalchemy import inspect
 
     # Создаем инспектор для проверки существования таблиц
@@ -88,6 +186,13 @@ def init_db():
     else:
         print("✅ Таблицы уже существуют в базе данных")
 
+    # create_all не меняет существующие таблицы - новые колонки и индексы добавляют миграции
+    from migrations import migrate
+    applied = migrate()
+    if applied:
+        print(f"✅ Применены миграции: {', '.join(str(v) for v in applied)}")
+    return applied
+
 
 def add_sample_data():
     """Добавление тестовых данных в базу"""
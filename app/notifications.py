@@ -0,0 +1,149 @@
+"""
+Уведомления преподавателей и групп об изменениях расписания
+
+Импорт расписания в своей транзакции сравнивает старый и новый снимок занятий
+(schedule_diff) и передает список изменений в очередь. Фоновый поток уже после
+коммита группирует изменения по группам и преподавателям, формирует по одному сообщению на адресата
+и пакетно вставляет уведомления всем пользователям с этой группой (users.group_name)
+или этим преподавателем (users.teacher_name). Импорт доставки не ждет.
+"""
+import queue
+import threading
+from collections import defaultdict, namedtuple
+from datetime import datetime
+
+from sqlalchemy import text
+
+from models import db
+
+# Адресатов в одном пакете INSERT
+NOTIFICATION_BATCH = 500
+# Строк с подробностями в одном уведомлении
+MAX_DETAIL_LINES = 10
+
+# kind: 'added' | 'removed' | 'moved' | 'changed'; old_* - где и когда занятие было до переноса
+LessonChange = namedtuple('LessonChange', 'kind group teacher classroom lesson start end old_classroom old_start',
+                          defaults=(None, None))
+
+KIND_MARKS = {'added': '+', 'removed': '-', 'moved': '~', 'changed': '*'}
+KIND_LABELS = (('added', 'добавлено'), ('removed', 'отменено'), ('moved', 'перенесено'), ('changed', 'изменено'))
+
+INSERT_FOR_GROUP = text(
+    "INSERT INTO notifications (user_id, message, created_at) "
+    "SELECT id, :message, :created_at FROM users WHERE group_name = :name"
+)
+INSERT_FOR_TEACHER = text(
+    "INSERT INTO notifications (user_id, message, created_at) "
+    "SELECT id, :message, :created_at FROM users WHERE teacher_name = :name"
+)
+
+
+def changes_from_diff(diff):
+    """Список LessonChange по schedule_diff.ScheduleDiff"""
+    def change(kind, lesson, old=None):
+        return LessonChange(kind, lesson.group, lesson.teacher, lesson.classroom, lesson.lesson,
+                            lesson.start, lesson.end,
+                            old.classroom if old else None, old.start if old else None)
+
+    changes = [change('added', lesson) for lesson in diff.added]
+    changes += [change('removed', lesson) for lesson in diff.removed]
+    changes += [change('moved', new, old) for old, new in diff.moved]
+    for old, new in diff.changed:
+        # Тип занятия - часть названия; отдельно изменившаяся ссылка на справочник не сообщается
+        if (old.end, old.lesson, old.teacher) == (new.end, new.lesson, new.teacher):
+            continue
+        changes.append(change('changed', new))
+        # Сменился преподаватель - прежнему тоже нужно сообщить
+        if old.teacher and old.teacher != new.teacher:
+            changes.append(LessonChange('removed', None, old.teacher, old.classroom, old.lesson, old.start, old.end))
+    return changes
+
+
+def group_by_audience(changes):
+    """{('group'|'teacher', имя): [изменения]} - каждое изменение касается группы и преподавателя"""
+    audiences = defaultdict(list)
+    for change in changes:
+        if change.group:
+            audiences['group', change.group].append(change)
+        if change.teacher:
+            audiences['teacher', change.teacher].append(change)
+    return audiences
+
+
+def format_message(kind, name, changes):
+    """Текст уведомления: сводка и первые MAX_DETAIL_LINES изменений по времени"""
+    counts = defaultdict(int)
+    for change in changes:
+        counts[change.kind] += 1
+    title = f"группы {name}" if kind == 'group' else f"преподавателя {name}"
+    summary = ', '.join(f"{label}: {counts[key]}" for key, label in KIND_LABELS if counts[key])
+    lines = [f"Изменения в расписании {title} ({summary})"]
+    ordered = sorted(changes, key=lambda c: (c.start, c.kind))
+    for change in ordered[:MAX_DETAIL_LINES]:
+        where = f"{change.start:%d.%m %H:%M} {change.classroom}"
+        if change.kind == 'moved':
+            where = f"{change.old_start:%d.%m %H:%M} {change.old_classroom} -> {where}"
+        lines.append(f"{KIND_MARKS[change.kind]} {where} {change.lesson}")
+    if len(ordered) > MAX_DETAIL_LINES:
+        lines.append(f"... и еще {len(ordered) - MAX_DETAIL_LINES}")
+    return '\n'.join(lines)
+
+
+def fan_out(changes):
+    """Создает уведомления по списку изменений; возвращает число вставленных строк"""
+    created_at = datetime.utcnow()
+    params = {'group': [], 'teacher': []}
+    for (kind, name), items in group_by_audience(changes).items():
+        params[kind].append({'name': name, 'message': format_message(kind, name, items), 'created_at': created_at})
+
+    inserted = 0
+    with db.engine.begin() as connection:
+        for kind, statement in (('group', INSERT_FOR_GROUP), ('teacher', INSERT_FOR_TEACHER)):
+            batch = params[kind]
+            for i in range(0, len(batch), NOTIFICATION_BATCH):
+                result = connection.execute(statement, batch[i:i + NOTIFICATION_BATCH])
+                inserted += max(result.rowcount, 0)
+    return inserted
+
+
+class NotificationQueue:
+    """Очередь заданий уведомлений с одним фоновым потоком-обработчиком"""
+
+    def __init__(self, app):
+        self.app = app
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, changes):
+        """Поставить изменения расписания в очередь рассылки (не блокирует)"""
+        if not changes:
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='notifications', daemon=True)
+                self._thread.start()
+        self._queue.put(changes)
+
+    def wait(self):
+        """Дождаться обработки всех заданий (например, перед выходом CLI-команды)"""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            changes = self._queue.get()
+            try:
+                with self.app.app_context():
+                    inserted = fan_out(changes)
+                self.app.logger.info('Создано уведомлений: %d по %d изменениям', inserted, len(changes))
+            except Exception:
+                self.app.logger.exception('Ошибка рассылки уведомлений')
+            finally:
+                self._queue.task_done()
+
+
+def init_notifications(app):
+    """Регистрирует очередь уведомлений в приложении"""
+    notifications = NotificationQueue(app)
+    app.extensions['notifications'] = notifications
+    return notifications
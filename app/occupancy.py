@@ -0,0 +1,292 @@
+"""
+Индекс занятости аудиторий в памяти для поиска свободных аудиторий
+
+Время делится на слоты по SLOT_MINUTES минут. Для каждого слота хранится битовая
+маска занятых аудиторий (бит i - аудитория с индексом i), поэтому запрос
+"какие аудитории свободны в [start, end)" сводится к OR масок слотов интервала
+и AND с масками фильтров по вместимости и оборудованию.
+
+Индекс строится лениво из Schedule и Booking и обновляется инкрементально
+после коммита сессии, в которой менялись бронирования, и после импорта
+расписания, применившего только изменения. Индекс свой в каждом процессе;
+полная перезапись расписания сбрасывает его через invalidate().
+
+Изменения из других процессов (воркеры gunicorn, flask import-schedule) видны по версии
+данных в таблице data_versions: триггеры увеличивают ее один раз за транзакцию, изменившую
+bookings, schedules или classrooms. Перед ответом индекс сверяет свою версию с базой
+(один запрос по первичному ключу) и перестраивается, если версии разошлись. Свои изменения
+процесс применяет инкрементально и переходит на новую версию, только если она следует
+сразу за версией индекса, то есть между ними не было чужих транзакций.
+Эта же версия входит в ключ кэша ответов (cache.py), поэтому ее увеличивают и изменения
+пользователей и справочников; индекс после них просто перестраивается.
+"""
+import threading
+from datetime import datetime, timedelta
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, text
+
+from models import db, Classroom, Schedule, Booking
+
+SLOT_MINUTES = 10
+# Длительность занятия без end_date (см. Schedule.period)
+DEFAULT_LESSON = timedelta(minutes=90)
+_EPOCH = datetime(2000, 1, 1)
+
+VERSION_SQL = "SELECT version FROM data_versions WHERE name = 'occupancy'"
+
+
+def data_version(connection):
+    """Текущая версия данных занятости (в транзакции connection - с ее собственными изменениями)"""
+    return connection.execute(text(VERSION_SQL)).scalar()
+
+
+def publish_version(connection):
+    """
+    Увеличить версию данных занятости в транзакции connection и вернуть новую.
+    Для транзакций, отложивших увеличение триггерами (SET LOCAL timetable.defer_occupancy_version).
+    """
+    return connection.execute(text(
+        "UPDATE data_versions SET version = version + 1, txid = txid_current() "
+        "WHERE name = 'occupancy' RETURNING version"
+    )).scalar()
+
+
+def to_slot(moment, round_up=False):
+    """Номер слота, содержащего момент времени (round_up - первый слот после момента)"""
+    minutes, rest = divmod((moment - _EPOCH).total_seconds(), 60)
+    slot, offset = divmod(int(minutes), SLOT_MINUTES)
+    if round_up and (offset or rest):
+        slot += 1
+    return slot
+
+
+def _period_bounds(period):
+    """(начало, конец) интервала tsrange; пустой интервал - None, без конца - одна пара"""
+    if period is None or period.lower is None:
+        return None
+    return period.lower, period.upper or period.lower + DEFAULT_LESSON
+
+
+def _equipment_tokens(equipment):
+    """'Проектор, маркерная доска' -> {'проектор', 'маркерная доска'}"""
+    return {item.strip().lower() for item in (equipment or '').split(',') if item.strip()}
+
+
+class OccupancyIndex:
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.ready = False
+        self.version = None
+
+    def build(self):
+        """Полное построение индекса из базы данных"""
+        with self._lock:
+            # Версия читается до данных: изменение между запросами приведет к лишнему
+            # перестроению, но не к устаревшему индексу
+            self.version = data_version(db.session)
+            self.rooms = []             # индекс -> номер аудитории
+            self.room_index = {}        # номер аудитории -> индекс
+            self.capacity = []
+            self.equipment = []
+            self.busy = {}              # слот -> маска занятых аудиторий
+            self.intervals = {}         # ключ занятия/брони -> (индекс аудитории, первый слот, последний + 1)
+            self.room_intervals = {}    # индекс аудитории -> множество ключей
+            self._capacity_masks = {}
+            self._equipment_masks = {}
+
+            rows = db.session.execute(
+                db.select(Classroom.number, Classroom.capacity, Classroom.equipment).order_by(Classroom.number)
+            )
+            for number, capacity, equipment in rows:
+                self._add_room(number, capacity, equipment)
+
+            for kind, model in (('schedule', Schedule), ('booking', Booking)):
+                rows = db.session.execute(db.select(model.id, model.classroom_number, model.period))
+                for row_id, number, period in rows:
+                    bounds = _period_bounds(period)
+                    if bounds is not None:
+                        self._add_interval((kind, row_id), number, *bounds)
+
+            self.ready = True
+
+    def invalidate(self):
+        """Сбросить индекс; он будет построен заново при следующем запросе"""
+        with self._lock:
+            self.ready = False
+
+    def advance(self, version):
+        """
+        Отметить, что индекс учитывает изменения транзакции, опубликовавшей version.
+        Если до нее были чужие транзакции, версия не меняется и следующий запрос перестроит индекс.
+        """
+        with self._lock:
+            if self.ready and version is not None and self.version == version - 1:
+                self.version = version
+
+    def _add_room(self, number, capacity, equipment):
+        self.room_index[number] = len(self.rooms)
+        self.rooms.append(number)
+        self.capacity.append(capacity or 0)
+        self.equipment.append(_equipment_tokens(equipment))
+
+    def _add_interval(self, key, number, start, end):
+        if number not in self.room_index:
+            self._add_room(number, None, None)
+            self._capacity_masks.clear()
+            self._equipment_masks.clear()
+        room = self.room_index[number]
+        first, last = to_slot(start), to_slot(end, round_up=True)
+        self.intervals[key] = (room, first, last)
+        self.room_intervals.setdefault(room, set()).add(key)
+        bit = 1 << room
+        for slot in range(first, last):
+            self.busy[slot] = self.busy.get(slot, 0) | bit
+
+    def _remove_interval(self, key):
+        if key not in self.intervals:
+            return
+        room, first, last = self.intervals.pop(key)
+        keys = self.room_intervals[room]
+        keys.discard(key)
+        bit = 1 << room
+        for slot in range(first, last):
+            self.busy[slot] = self.busy.get(slot, 0) & ~bit
+        # Слоты, которые остаются заняты другими занятиями этой аудитории
+        for other in keys:
+            _, other_first, other_last = self.intervals[other]
+            for slot in range(max(first, other_first), min(last, other_last)):
+                self.busy[slot] |= bit
+
+    def apply_booking(self, booking_id, number, start, end):
+        """Добавить или обновить бронирование без перестроения индекса"""
+        with self._lock:
+            if not self.ready:
+                return
+            self._remove_interval(('booking', booking_id))
+            self._add_interval(('booking', booking_id), number, start, end)
+
+    def remove_booking(self, booking_id):
+        with self._lock:
+            if self.ready:
+                self._remove_interval(('booking', booking_id))
+
+    def apply_schedule(self, schedule_id, number, start, end=None):
+        """Добавить или перенести занятие (end=None - одна пара, как в Schedule.period)"""
+        with self._lock:
+            if not self.ready:
+                return
+            self._remove_interval(('schedule', schedule_id))
+            self._add_interval(('schedule', schedule_id), number, start, end or start + DEFAULT_LESSON)
+
+    def remove_schedule(self, schedule_id):
+        with self._lock:
+            if self.ready:
+                self._remove_interval(('schedule', schedule_id))
+
+    def _capacity_mask(self, min_capacity):
+        mask = self._capacity_masks.get(min_capacity)
+        if mask is None:
+            mask = 0
+            for room, capacity in enumerate(self.capacity):
+                if capacity >= min_capacity:
+                    mask |= 1 << room
+            self._capacity_masks[min_capacity] = mask
+        return mask
+
+    def _equipment_mask(self, term):
+        """Аудитории, в оборудовании которых есть позиция, содержащая term"""
+        mask = self._equipment_masks.get(term)
+        if mask is None:
+            mask = 0
+            for room, tokens in enumerate(self.equipment):
+                if any(term in token for token in tokens):
+                    mask |= 1 << room
+            self._equipment_masks[term] = mask
+        return mask
+
+    def free_rooms(self, start, end, min_capacity=None, equipment=()):
+        """Номера аудиторий, свободных во всем интервале [start, end) и подходящих под фильтры"""
+        current = data_version(db.session)
+        with self._lock:
+            if not self.ready or self.version != current:
+                self.build()
+
+            busy = 0
+            for slot in range(to_slot(start), to_slot(end, round_up=True)):
+                busy |= self.busy.get(slot, 0)
+
+            candidates = ((1 << len(self.rooms)) - 1) & ~busy
+            if min_capacity:
+                candidates &= self._capacity_mask(min_capacity)
+            for term in equipment:
+                candidates &= self._equipment_mask(term.strip().lower())
+
+            result = []
+            room = 0
+            while candidates:
+                if candidates & 1:
+                    result.append(self.rooms[room])
+                candidates >>= 1
+                room += 1
+            return result
+
+
+def get_index():
+    return current_app.extensions['occupancy']
+
+
+def init_occupancy(app):
+    """Регистрирует индекс занятости в приложении"""
+    index = OccupancyIndex()
+    app.extensions['occupancy'] = index
+    return index
+
+
+# Изменения бронирований собираются при flush (когда уже известен id)
+# и применяются к индексу только после успешного коммита
+@event.listens_for(db.session, 'after_flush')
+def _collect_booking_changes(session, flush_context):
+    changes = session.info.setdefault('occupancy_changes', [])
+    before = len(changes)
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Booking):
+            changes.append(('upsert', (obj.id, obj.classroom_number, obj.date, obj.duration)))
+        elif isinstance(obj, Classroom) and session.is_modified(obj, include_collections=False):
+            changes.append(('classroom', None))
+    for obj in session.deleted:
+        if isinstance(obj, Booking):
+            changes.append(('delete', obj.id))
+        elif isinstance(obj, Classroom):
+            changes.append(('classroom', None))
+    if len(changes) > before:
+        # Версия, которую опубликует коммит: строка версии уже заблокирована этой транзакцией
+        session.info['occupancy_version'] = data_version(session.connection())
+
+
+@event.listens_for(db.session, 'after_commit')
+def _apply_booking_changes(session):
+    changes = session.info.pop('occupancy_changes', [])
+    version = session.info.pop('occupancy_version', None)
+    if not changes or not has_app_context():
+        return
+    index = current_app.extensions.get('occupancy')
+    if index is None:
+        return
+    for kind, payload in changes:
+        if kind == 'upsert':
+            booking_id, number, start, duration = payload
+            index.apply_booking(booking_id, number, start, start + timedelta(minutes=duration))
+        elif kind == 'delete':
+            index.remove_booking(payload)
+        else:
+            # Изменились вместимость или оборудование аудиторий - маски фильтров строятся заново
+            index.invalidate()
+    index.advance(version)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_booking_changes(session):
+    session.info.pop('occupancy_changes', None)
+    session.info.pop('occupancy_version', None)
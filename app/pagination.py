@@ -0,0 +1,87 @@
+"""
+Постраничная выдача списков по ключу (keyset pagination) с непрозрачными курсорами
+"""
+import base64
+import json
+from datetime import datetime, timezone
+
+from flask import abort, request
+from sqlalchemy import tuple_
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+
+
+def encode_cursor(values):
+    """Курсор - base64url от JSON со значениями ключа сортировки последней строки страницы"""
+    payload = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Обратное к encode_cursor: (datetime, id)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        date, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(date), int(row_id)
+    except (ValueError, TypeError):
+        abort(400, description='Некорректный cursor')
+
+
+def arg_limit():
+    """Размер страницы из параметра limit, не больше MAX_LIMIT"""
+    try:
+        limit = int(request.args.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        abort(400, description='limit должен быть числом')
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def naive_utc(moment):
+    """Время с часовым поясом (…Z, …+03:00) переводится в UTC без пояса - так хранятся времена в базе"""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def arg_datetime(name, zone=None):
+    """
+    Параметр запроса в формате ISO 8601 (2025-10-20, 2025-10-20T10:10 или с поясом
+    2025-10-20T07:10Z) или None; время с поясом переводится в UTC без пояса.
+    zone - вернуть местное время зоны zone без пояса: время без пояса считается местным
+    """
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        moment = datetime.fromisoformat(value)
+        if zone is not None:
+            return moment.astimezone(zone).replace(tzinfo=None) if moment.tzinfo else moment
+        return naive_utc(moment)
+    except ValueError:
+        abort(400, description=f'{name} должен быть датой в формате ISO 8601')
+
+
+def keyset_page(query, date_column, id_column, limit, descending=False):
+    """
+    Страница query, упорядоченного по (date, id), начиная после курсора из параметра cursor.
+    Условие (date, id) > курсор использует индекс и не зависит от номера страницы.
+    descending - от новых к старым (условие < курсор, индекс читается в обратном порядке).
+    Возвращает (строки, курсор следующей страницы или None).
+    """
+    cursor = request.args.get('cursor')
+    if cursor:
+        key, after = tuple_(date_column, id_column), tuple_(*decode_cursor(cursor))
+        query = query.filter(key < after if descending else key > after)
+
+    if descending:
+        query = query.order_by(date_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(date_column, id_column)
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor((getattr(last, date_column.key), getattr(last, id_column.key)))
+    return rows, next_cursor
@@ -1,8 +1,42 @@
 """
 Маршруты API для University Management System
 """
-from flask import jsonify
-from models import Classroom, User, Schedule, Booking, db
+import time
+from datetime import datetime
+
+from flask import abort, jsonify, request
+from sqlalchemy import select, text
+from sqlalchemy.exc import SQLAlchemyError
+from werkzeug.exceptions import HTTPException
+from models import Classroom, User, Schedule, Booking, Notification, Group, Teacher, LessonType, db
+from pagination import arg_datetime, arg_limit, keyset_page, naive_utc
+from occupancy import get_index
+from cache import cached_response
+from serialization import json_response, rows_to_dicts, stream_query
+from ical import calendar_response
+from search import SEARCH_KINDS, SEARCH_LIMIT, SEARCH_MAX_LIMIT, get_search_index
+from bookings import BookingConflict, MAX_DURATION, create_booking
+
+
+# Колонки списков выбираются кортежами, без создания ORM-объектов
+SCHEDULE_COLUMNS = (
+    Schedule.id, Schedule.classroom_number.label('classroom'), Schedule.lesson, LessonType.name.label('type'),
+    Schedule.date, Schedule.end_date, Group.name.label('group'), Teacher.name.label('teacher'),
+)
+SCHEDULE_KEYS = tuple(column.key for column in SCHEDULE_COLUMNS)
+
+
+def schedule_query(session=None):
+    """Запрос строк SCHEDULE_COLUMNS: имена группы, преподавателя и типа занятия - из справочников"""
+    return (session or db.session).query(*SCHEDULE_COLUMNS).select_from(Schedule) \
+        .outerjoin(Schedule.group).outerjoin(Schedule.teacher).outerjoin(Schedule.lesson_type)
+
+
+BOOKING_COLUMNS = (
+    Booking.id, Booking.classroom_number.label('classroom'), Booking.date, Booking.duration,
+    Booking.description,
+)
+BOOKING_KEYS = tuple(column.key for column in BOOKING_COLUMNS)
 
 
 def init_routes(app):
@@ -17,13 +51,29 @@ def init_routes(app):
             "version": "1.0",
             "endpoints": {
                 "classrooms": "/classrooms",
+                "free_classrooms": "/classrooms/free?start=&end=&min_capacity=&equipment=",
                 "users": "/users",
-                "schedules": "/schedules",
-                "bookings": "/bookings"
+                "unread_notifications": "/users/<id>/notifications/unread?limit=&cursor=",
+                "schedules": "/schedules?classroom=&group=&teacher=&date_from=&date_to=&limit=&cursor=",
+                "schedules_export": "/schedules/export?classroom=&group=&teacher=&date_from=&date_to=",
+                "bookings": "/bookings?classroom=&date_from=&date_to=&limit=&cursor=",
+                "create_booking": "POST /bookings {classroom, date, duration, description}",
+                "utilization": "/analytics/utilization?date_from=&date_to=",
+                "search": "/search?q=&kind=&limit=",
+                "group_calendar": "/groups/<code>/calendar.ics",
+                "teacher_calendar": "/teachers/<name>/calendar.ics",
+                "metrics": "/metrics?format=json",
+                "health": "/health"
             }
         })
 
+    @app.errorhandler(HTTPException)
+    def handle_http_error(error):
+        """Ошибки API возвращаются в JSON"""
+        return jsonify({'error': error.description}), error.code
+
     @app.route('/classrooms')
+    @cached_response
     def list_classrooms():
         """Получить список всех аудиторий"""
         classrooms = Classroom.query.all()
@@ -38,7 +88,40 @@ def init_routes(app):
             ]
         })
 
+    @app.route('/classrooms/free')
+    @cached_response
+    def list_free_classrooms():
+        """
+        Аудитории, свободные во всем интервале [start, end).
+        Фильтры: min_capacity, equipment (через запятую или несколькими параметрами,
+        ищется вхождение в позиции оборудования аудитории).
+        """
+        start, end = arg_datetime('start'), arg_datetime('end')
+        if not start or not end:
+            abort(400, description='Параметры start и end обязательны')
+        if start >= end:
+            abort(400, description='start должен быть раньше end')
+        min_capacity = request.args.get('min_capacity', type=int)
+        equipment = [term for value in request.args.getlist('equipment')
+                     for term in value.split(',') if term.strip()]
+
+        numbers = get_index().free_rooms(start, end, min_capacity, equipment)
+        classrooms = Classroom.query.filter(Classroom.number.in_(numbers)).order_by(Classroom.number).all() \
+            if numbers else []
+        return jsonify({
+            'classrooms': [
+                {
+                    'number': c.number,
+                    'equipment': c.equipment,
+                    'capacity': c.capacity,
+                    'description': c.description
+                } for c in classrooms
+            ],
+            'count': len(classrooms)
+        })
+
     @app.route('/users')
+    @cached_response
     def list_users():
         """Получить список всех пользователей"""
         users = User.query.all()
@@ -46,46 +129,236 @@ def init_routes(app):
             'users': [
                 {
                     'id': u.id,
-                    'role': u.role
+                    'role': u.role,
+                    'group': u.group_name,
+                    'teacher': u.teacher_name
                 } for u in users
             ]
         })
 
+    @app.route('/users/<int:user_id>/notifications/unread')
+    def list_unread_notifications(user_id):
+        """
+        Непрочитанные уведомления пользователя от новых к старым, постранично
+        (индекс ix_notifications_user_created); следующая страница - по курсору next_cursor.
+        """
+        query = Notification.query.with_entities(
+            Notification.id, Notification.message, Notification.created_at
+        ).filter(Notification.user_id == user_id, Notification.read_at.is_(None))
+        notifications, next_cursor = keyset_page(
+            query, Notification.created_at, Notification.id, arg_limit(), descending=True
+        )
+        return json_response({
+            'notifications': rows_to_dicts(('id', 'message', 'created_at'), notifications),
+            'next_cursor': next_cursor
+        })
+
+    @app.route('/users/<int:user_id>/notifications/read', methods=['POST'])
+    def mark_notifications_read(user_id):
+        """Отметить прочитанными уведомления из JSON {ids: [...]} или все непрочитанные, если ids нет"""
+        ids = (request.get_json(silent=True) or {}).get('ids')
+        query = Notification.query.filter(Notification.user_id == user_id, Notification.read_at.is_(None))
+        if ids is not None:
+            if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+                abort(400, description='ids должен быть списком чисел')
+            query = query.filter(Notification.id.in_(ids))
+        updated = query.update({Notification.read_at: datetime.utcnow()}, synchronize_session=False)
+        db.session.commit()
+        return jsonify({'updated': updated})
+
+    def schedule_filters(query):
+        """
+        Фильтры classroom, group, teacher, date_from, date_to (интервал [date_from, date_to)).
+        Имя группы или преподавателя переводится в id подзапросом - фильтр идет по индексу (id, date).
+        """
+        if request.args.get('classroom'):
+            query = query.filter(Schedule.classroom_number == request.args['classroom'])
+        if request.args.get('group'):
+            query = query.filter(Schedule.group_id == select(Group.id).where(
+                Group.name == request.args['group']).scalar_subquery())
+        if request.args.get('teacher'):
+            query = query.filter(Schedule.teacher_id == select(Teacher.id).where(
+                Teacher.name == request.args['teacher']).scalar_subquery())
+        date_from, date_to = arg_datetime('date_from'), arg_datetime('date_to')
+        if date_from:
+            query = query.filter(Schedule.date >= date_from)
+        if date_to:
+            query = query.filter(Schedule.date < date_to)
+        return query
+
     @app.route('/schedules')
+    @cached_response
     def list_schedules():
-        """Получить расписание"""
-        schedules = Schedule.query.all()
-        return jsonify({
-            'schedules': [
-                {
-                    'id': s.id,
-                    'classroom': s.classroom_number,
-                    'lesson': s.lesson,
-                    'date': s.date.isoformat() if s.date else None
-                } for s in schedules
-            ]
+        """
+        Получить расписание постранично.
+        Фильтры: classroom, group, teacher, date_from, date_to (интервал [date_from, date_to));
+        следующая страница - по курсору next_cursor из предыдущего ответа.
+        """
+        query = schedule_filters(schedule_query())
+        schedules, next_cursor = keyset_page(query, Schedule.date, Schedule.id, arg_limit())
+        return json_response({
+            'schedules': rows_to_dicts(SCHEDULE_KEYS, schedules),
+            'next_cursor': next_cursor
         })
 
+    @app.route('/schedules/export')
+    def export_schedules():
+        """
+        Выгрузка всего расписания (с теми же фильтрами, что /schedules) одним потоковым JSON.
+        Строки читаются из курсора пачками и кодируются по мере отправки.
+        """
+        statement = schedule_filters(schedule_query()).order_by(Schedule.date, Schedule.id).statement
+        return stream_query('schedules', SCHEDULE_KEYS, statement)
+
     @app.route('/bookings')
+    @cached_response
     def list_bookings():
-        """Получить список бронирований"""
-        bookings = Booking.query.all()
+        """
+        Получить список бронирований постранично.
+        Фильтры: classroom, date_from, date_to; следующая страница - по курсору next_cursor.
+        """
+        query = Booking.query.with_entities(*BOOKING_COLUMNS)
+        if request.args.get('classroom'):
+            query = query.filter(Booking.classroom_number == request.args['classroom'])
+        date_from, date_to = arg_datetime('date_from'), arg_datetime('date_to')
+        if date_from:
+            query = query.filter(Booking.date >= date_from)
+        if date_to:
+            query = query.filter(Booking.date < date_to)
+
+        bookings, next_cursor = keyset_page(query, Booking.date, Booking.id, arg_limit())
+        return json_response({
+            'bookings': rows_to_dicts(BOOKING_KEYS, bookings),
+            'next_cursor': next_cursor
+        })
+
+    @app.route('/bookings', methods=['POST'])
+    def add_booking():
+        """
+        Забронировать аудиторию: JSON {classroom, date (ISO 8601), duration (минуты), description}.
+        201 - бронирование создано, 409 - интервал пересекается с занятиями или бронированиями.
+        """
+        data = request.get_json(silent=True) or {}
+        number = data.get('classroom')
+        if not isinstance(number, str) or not number:
+            abort(400, description='Поле classroom обязательно')
+        try:
+            # Время с поясом хранится в UTC без пояса, как все времена в базе
+            start = naive_utc(datetime.fromisoformat(data.get('date') or ''))
+        except (TypeError, ValueError):
+            abort(400, description='date должен быть датой в формате ISO 8601')
+        duration = data.get('duration')
+        if not isinstance(duration, int) or isinstance(duration, bool) or not 0 < duration <= MAX_DURATION:
+            abort(400, description=f'duration должен быть целым числом минут от 1 до {MAX_DURATION}')
+        description = data.get('description')
+        if description is not None and not isinstance(description, str):
+            abort(400, description='description должен быть строкой')
+
+        try:
+            booking = create_booking(number, start, duration, description)
+        except LookupError:
+            abort(404, description=f'Аудитория {number} не найдена')
+        except BookingConflict as conflict:
+            return jsonify({'error': str(conflict), 'conflicts': conflict.conflicts}), 409
+
         return jsonify({
-            'bookings': [
-                {
-                    'id': b.id,
-                    'classroom': b.classroom_number,
-                    'date': b.date.isoformat() if b.date else None,
-                    'duration': b.duration,
-                    'description': b.description
-                } for b in bookings
-            ]
+            'id': booking.id,
+            'classroom': booking.classroom_number,
+            'date': booking.date.isoformat(),
+            'duration': booking.duration,
+            'description': booking.description
+        }), 201
+
+    @app.route('/analytics/utilization')
+    def utilization():
+        """
+        Загрузка аудиторий за [date_from, date_to): часы занятий и бронирований по аудиториям,
+        по корпусам - по неделям и часам суток. Отчет кэшируется по периоду и версии данных.
+        """
+        # NumPy импортируется при первом запросе отчета, а не при запуске приложения
+        from analytics import MAX_REPORT_DAYS, local_zone, utilization_report
+
+        # Границы отчета - местные даты университета (время с поясом переводится в местное)
+        zone = local_zone()
+        date_from, date_to = arg_datetime('date_from', zone), arg_datetime('date_to', zone)
+        if not date_from or not date_to:
+            abort(400, description='Параметры date_from и date_to обязательны')
+        if date_from >= date_to:
+            abort(400, description='date_from должен быть раньше date_to')
+        if (date_to - date_from).days > MAX_REPORT_DAYS:
+            abort(400, description=f'Период отчета не больше {MAX_REPORT_DAYS} дней')
+        return json_response(utilization_report(date_from, date_to))
+
+    @app.route('/search')
+    def search():
+        """
+        Подсказки при вводе: аудитории, преподаватели, группы и предметы, похожие на q
+        (без учета регистра и с опечатками), по убыванию оценки.
+        Фильтр kind - виды результатов через запятую или несколькими параметрами.
+        """
+        query = request.args.get('q', '').strip()
+        if not query:
+            abort(400, description='Параметр q обязателен')
+        kinds = {kind.strip() for value in request.args.getlist('kind') for kind in value.split(',') if kind.strip()}
+        unknown = kinds - set(SEARCH_KINDS)
+        if unknown:
+            abort(400, description=f"Неизвестный kind: {', '.join(sorted(unknown))}; "
+                                   f"допустимы {', '.join(SEARCH_KINDS)}")
+        limit = request.args.get('limit', SEARCH_LIMIT, type=int)
+
+        started = time.perf_counter()
+        results = get_search_index().search(query, max(1, min(limit, SEARCH_MAX_LIMIT)), kinds)
+        return jsonify({
+            'query': query,
+            'results': [{'kind': kind, 'text': value, 'score': score} for kind, value, score in results],
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 2)
         })
 
+    @app.route('/groups/<code>/calendar.ics')
+    def group_calendar(code):
+        """
+        Расписание группы в формате iCal для подписки из календаря.
+        Фид готовится при импорте расписания; по If-None-Match отвечает 304.
+        """
+        response = calendar_response('group', code)
+        if response is None:
+            abort(404, description=f'Занятий группы {code} не найдено')
+        return response
+
+    @app.route('/teachers/<name>/calendar.ics')
+    def teacher_calendar(name):
+        """Расписание преподавателя в формате iCal (как /groups/<code>/calendar.ics)"""
+        response = calendar_response('teacher', name)
+        if response is None:
+            abort(404, description=f'Занятий преподавателя {name} не найдено')
+        return response
+
     @app.route('/health')
     def health_check():
-        """Проверка здоровья приложения"""
+        """Проверка здоровья: реальный запрос к базе данных и состояние пула соединений"""
+        pool = db.engine.pool
+        pool_stats = {
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': pool.overflow(),
+        } if hasattr(pool, 'checkedout') else {'status': pool.status()}
+
+        started = time.perf_counter()
+        try:
+            with db.engine.connect() as connection:
+                connection.execute(text('SELECT 1'))
+        except SQLAlchemyError as error:
+            return jsonify({
+                'status': 'unhealthy',
+                'database': 'unavailable',
+                'error': str(error.__cause__ or error).strip(),
+                'pool': pool_stats
+            }), 503
+
         return jsonify({
-            "status": "healthy",
-            "database": "connected"  # Можно добавить проверку подключения к БД
-        })
\ No newline at end of file
+            'status': 'healthy',
+            'database': 'connected',
+            'database_latency_ms': round((time.perf_counter() - started) * 1000, 2),
+            'pool': pool_stats
+        })
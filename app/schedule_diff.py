@@ -0,0 +1,143 @@
+"""
+Разница между двумя снимками расписания
+
+Занятие идентифицируется стабильным ключом (группа, аудитория, начало); содержимое
+(окончание, название, преподаватель, тип занятия) сравнивается по хэшу. Результат:
+    added   - ключа не было в старом снимке
+    removed - ключа нет в новом снимке
+    changed - ключ тот же, содержимое другое (пара старое/новое)
+    moved   - из added и removed: то же занятие той же группы (название и преподаватель)
+              оказалось в другой аудитории или в другое время не дальше MOVE_WINDOW (пара старое/новое)
+
+Импорт применяет к базе только эти изменения вместо перезаписи семестра.
+Отдельно модуль сравнивает два CSV из parser_to_csv:
+
+    python schedule_diff.py old.csv new.csv
+"""
+import argparse
+import csv
+import hashlib
+from collections import defaultdict, namedtuple
+from datetime import datetime, timedelta
+
+# Максимальный сдвиг по времени, при котором пара удалено/добавлено считается переносом
+MOVE_WINDOW = timedelta(days=7)
+
+# id - первичный ключ в schedules (None для занятий нового снимка); lesson_type - 'лек', 'пр', ...
+Lesson = namedtuple('Lesson', 'group classroom start end lesson teacher id lesson_type', defaults=(None, None))
+
+ScheduleDiff = namedtuple('ScheduleDiff', 'added removed moved changed')
+
+
+def lesson_key(lesson):
+    return lesson.group, lesson.classroom, lesson.start
+
+
+def lesson_digest(lesson):
+    """Хэш содержимого занятия, не входящего в ключ"""
+    payload = f"{lesson.end}\x1f{lesson.lesson}\x1f{lesson.teacher}\x1f{lesson.lesson_type}".encode('utf-8')
+    return hashlib.blake2b(payload, digest_size=8).digest()
+
+
+def index_snapshot(lessons):
+    """
+    {ключ: (хэш, занятие)}. Если под одним ключом несколько занятий (подгруппы),
+    к ключу добавляется порядковый номер после сортировки по хэшу - так ключи
+    остаются стабильными между запусками.
+    """
+    buckets = defaultdict(list)
+    for lesson in lessons:
+        buckets[lesson_key(lesson)].append((lesson_digest(lesson), lesson))
+    index = {}
+    for key, items in buckets.items():
+        if len(items) == 1:
+            index[key] = items[0]
+        else:
+            items.sort(key=lambda item: item[0])
+            for n, item in enumerate(items):
+                index[key + (n,)] = item
+    return index
+
+
+def _pair_moves(removed, added):
+    """Сопоставляет удаленные и добавленные занятия одной группы с тем же названием и преподавателем"""
+    candidates = defaultdict(list)
+    for lesson in removed:
+        candidates[lesson.group, lesson.lesson, lesson.teacher].append(lesson)
+
+    moved, paired, still_added = [], set(), []
+    for new in sorted(added, key=lambda lesson: lesson.start):
+        best = None
+        for old in candidates.get((new.group, new.lesson, new.teacher), ()):
+            if id(old) in paired or abs(old.start - new.start) > MOVE_WINDOW:
+                continue
+            if best is None or abs(old.start - new.start) < abs(best.start - new.start):
+                best = old
+        if best is None:
+            still_added.append(new)
+        else:
+            paired.add(id(best))
+            moved.append((best, new))
+    still_removed = [lesson for lesson in removed if id(lesson) not in paired]
+    return moved, still_removed, still_added
+
+
+def diff_snapshots(old_lessons, new_lessons):
+    """ScheduleDiff между старым и новым снимком (итерируемые Lesson)"""
+    old_index = index_snapshot(old_lessons)
+    new_index = index_snapshot(new_lessons)
+
+    removed = [old_index[key][1] for key in old_index.keys() - new_index.keys()]
+    added = [new_index[key][1] for key in new_index.keys() - old_index.keys()]
+    changed = [
+        (old_index[key][1], new_index[key][1])
+        for key in old_index.keys() & new_index.keys()
+        if old_index[key][0] != new_index[key][0]
+    ]
+    moved, removed, added = _pair_moves(removed, added)
+    return ScheduleDiff(added, removed, moved, changed)
+
+
+def is_empty(diff):
+    return not (diff.added or diff.removed or diff.moved or diff.changed)
+
+
+def read_csv_snapshot(path):
+    """Занятия из CSV parser_to_csv (поля date, start_time, end_time, type, subject, teacher, location, group)"""
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            if not row.get('date') or not row.get('start_time'):
+                continue
+            start = datetime.strptime(f"{row['date']} {row['start_time']}", '%Y-%m-%d %H:%M')
+            end = datetime.strptime(f"{row['date']} {row['end_time']}", '%Y-%m-%d %H:%M') \
+                if row.get('end_time') else None
+            yield Lesson(row.get('group') or None, row.get('location') or '', start, end,
+                         f"{row.get('type', '')} {row.get('subject', '')}".strip(), row.get('teacher') or None,
+                         lesson_type=row.get('type') or None)
+
+
+def _describe(lesson):
+    return f"{lesson.start:%Y-%m-%d %H:%M} {lesson.classroom} {lesson.group or '-'} {lesson.lesson}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('old')
+    parser.add_argument('new')
+    args = parser.parse_args()
+
+    diff = diff_snapshots(read_csv_snapshot(args.old), read_csv_snapshot(args.new))
+    for lesson in sorted(diff.added, key=lambda lesson: lesson.start):
+        print(f"+ {_describe(lesson)}")
+    for lesson in sorted(diff.removed, key=lambda lesson: lesson.start):
+        print(f"- {_describe(lesson)}")
+    for old, new in sorted(diff.moved, key=lambda pair: pair[0].start):
+        print(f"~ {_describe(old)} -> {new.start:%Y-%m-%d %H:%M} {new.classroom}")
+    for old, new in sorted(diff.changed, key=lambda pair: pair[0].start):
+        print(f"* {_describe(old)} -> {new.lesson} / {new.teacher or '-'}")
+    print(f"добавлено: {len(diff.added)}, удалено: {len(diff.removed)}, "
+          f"перенесено: {len(diff.moved)}, изменено: {len(diff.changed)}")
+
+
+if __name__ == '__main__':
+    main()
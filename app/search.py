@@ -0,0 +1,231 @@
+"""
+Нечеткий поиск с подсказками по аудиториям, преподавателям, группам и предметам
+
+Триграммный инвертированный индекс в памяти процесса: каждое название разбивается на слова,
+слово дополняется пробелами ("  еремин ") и режется на триграммы, как в pg_trgm;
+для каждой триграммы хранится список записей, где она встречается. Запрос разбивается так же,
+но у последнего слова нет завершающего пробела - пользователь еще печатает. Оценка записи -
+доля триграмм запроса, найденных в записи; совпадение с начала названия и вхождение
+подстрокой поднимают запись выше. Регистр и ё/е не различаются, опечатки допускаются.
+
+Индекс строится лениво при первом запросе. Импорт расписания и изменение аудиторий
+помечают его устаревшим: новый индекс строится в фоновом потоке, а запросы до его готовности
+обслуживает старый. Импорт в другом процессе виден по истечении SEARCH_INDEX_TTL.
+"""
+import heapq
+import re
+import threading
+import time
+from collections import Counter
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, text
+
+from models import db, Classroom
+
+SEARCH_KINDS = ('classroom', 'teacher', 'group', 'subject')
+# Минимальная доля триграмм запроса в записи
+MIN_SIMILARITY = 0.3
+SEARCH_LIMIT = 10
+SEARCH_MAX_LIMIT = 50
+# Через сколько секунд индекс перестраивается, даже если в этом процессе ничего не менялось
+SEARCH_INDEX_TTL = 300
+
+PREFIX_BONUS = 0.5
+SUBSTRING_BONUS = 0.25
+
+WORD_RE = re.compile(r'\w+')
+
+# Предмет - название занятия без типа в начале ('лаб Живопись' -> 'Живопись')
+SOURCES_SQL = {
+    'classroom': "SELECT number FROM classrooms",
+    'teacher': "SELECT name FROM teachers",
+    'group': "SELECT name FROM groups",
+    'subject': (
+        "SELECT DISTINCT CASE WHEN lt.name IS NOT NULL AND s.lesson LIKE lt.name || ' %' "
+        "THEN substr(s.lesson, length(lt.name) + 2) ELSE s.lesson END "
+        "FROM schedules s LEFT JOIN lesson_types lt ON lt.id = s.lesson_type_id"
+    ),
+}
+
+
+def split_words(value):
+    """Слова строки в нижнем регистре, ё -> е; разделители ('Б-305', 'Б 305') не важны"""
+    return WORD_RE.findall(value.lower().replace('ё', 'е'))
+
+
+def normalize(value):
+    return ' '.join(split_words(value))
+
+
+def trigrams(value, partial=False):
+    """Множество триграмм слов строки; partial - последнее слово может быть недописано"""
+    words = split_words(value)
+    grams = set()
+    for i, word in enumerate(words):
+        padded = f"  {word}" if partial and i == len(words) - 1 else f"  {word} "
+        grams.update(padded[j:j + 3] for j in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    """Неизменяемый индекс: записи (вид, название) и списки записей по триграммам"""
+
+    def __init__(self, entries):
+        self.kinds = []
+        self.texts = []
+        self.normalized = []
+        postings = {}
+        for kind, value in entries:
+            grams = trigrams(value)
+            if not grams:
+                continue
+            entry = len(self.texts)
+            self.kinds.append(kind)
+            self.texts.append(value)
+            self.normalized.append(normalize(value))
+            for gram in grams:
+                postings.setdefault(gram, []).append(entry)
+        self.postings = {gram: tuple(items) for gram, items in postings.items()}
+
+    def __len__(self):
+        return len(self.texts)
+
+    def search(self, query, limit=SEARCH_LIMIT, kinds=None):
+        """Лучшие limit записей: [(вид, название, оценка)] по убыванию оценки"""
+        grams = trigrams(query, partial=True)
+        if not grams:
+            return []
+        shared = Counter()
+        for gram in grams:
+            entries = self.postings.get(gram)
+            if entries:
+                shared.update(entries)
+
+        needed = MIN_SIMILARITY * len(grams)
+        prefix = normalize(query)
+        scored = []
+        for entry, count in shared.items():
+            if count < needed or (kinds and self.kinds[entry] not in kinds):
+                continue
+            score = count / len(grams)
+            value = self.normalized[entry]
+            if value.startswith(prefix):
+                score += PREFIX_BONUS
+            elif prefix in value:
+                score += SUBSTRING_BONUS
+            # При равной оценке короче - точнее
+            scored.append((-score, len(value), value, entry))
+        return [
+            (self.kinds[entry], self.texts[entry], round(-score, 3))
+            for score, _, _, entry in heapq.nsmallest(limit, scored)
+        ]
+
+
+def load_entries():
+    """(вид, название) для индекса из базы данных"""
+    entries = []
+    for kind, sql in SOURCES_SQL.items():
+        entries.extend((kind, value) for value in db.session.execute(text(sql)).scalars() if value)
+    return entries
+
+
+class SearchIndex:
+    """Текущий TrigramIndex процесса с фоновым перестроением"""
+
+    def __init__(self, app, ttl=SEARCH_INDEX_TTL):
+        self.app = app
+        self.ttl = ttl
+        self._index = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._rebuilding = False
+        self._pending = False
+
+    def build(self):
+        """Построить индекс в текущем контексте приложения и заменить им текущий"""
+        index = TrigramIndex(load_entries())
+        with self._lock:
+            self._index, self._built_at = index, time.monotonic()
+        return index
+
+    def _rebuild(self):
+        while True:
+            try:
+                with self.app.app_context():
+                    self.build()
+            except Exception:
+                self.app.logger.exception('Ошибка построения поискового индекса')
+            with self._lock:
+                if not self._pending:
+                    self._rebuilding = False
+                    return
+                # Данные менялись во время построения - строим еще раз
+                self._pending = False
+
+    def invalidate(self):
+        """Перестроить индекс в фоне; до готовности запросы обслуживает текущий"""
+        with self._lock:
+            if self._index is None:
+                # Индекс еще не строился - построится при первом запросе
+                return
+            if self._rebuilding:
+                self._pending = True
+                return
+            self._rebuilding = True
+        threading.Thread(target=self._rebuild, name='search-index', daemon=True).start()
+
+    def get(self):
+        """Текущий индекс; первый запрос строит его синхронно"""
+        index = self._index
+        if index is None:
+            # Параллельные первые запросы ждут одно построение
+            with self._build_lock:
+                index = self._index
+                if index is None:
+                    index = self.build()
+            return index
+        if time.monotonic() - self._built_at > self.ttl and not self._rebuilding:
+            self.invalidate()
+        return index
+
+    def search(self, query, limit=SEARCH_LIMIT, kinds=None):
+        return self.get().search(query, limit, kinds)
+
+
+def get_search_index():
+    return current_app.extensions['search']
+
+
+def refresh_search_index():
+    """Обновить поисковый индекс после изменения данных (безопасно вызывать вне приложения)"""
+    if has_app_context() and 'search' in current_app.extensions:
+        current_app.extensions['search'].invalidate()
+
+
+def init_search(app):
+    """Регистрирует поисковый индекс в приложении"""
+    index = SearchIndex(app, app.config.get('SEARCH_INDEX_TTL', SEARCH_INDEX_TTL))
+    app.extensions['search'] = index
+    return index
+
+
+# Номера аудиторий в индексе меняются только после успешного коммита
+@event.listens_for(db.session, 'after_flush')
+def _collect_classroom_changes(session, flush_context):
+    if not session.info.get('search_dirty'):
+        session.info['search_dirty'] = any(
+            isinstance(obj, Classroom) for obj in list(session.new) + list(session.deleted)
+        )
+
+
+@event.listens_for(db.session, 'after_commit')
+def _refresh_after_commit(session):
+    if session.info.pop('search_dirty', False):
+        refresh_search_index()
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_classroom_changes(session):
+    session.info.pop('search_dirty', None)
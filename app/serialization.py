@@ -0,0 +1,81 @@
+"""
+Быстрая сериализация списков в JSON
+
+Эндпоинты выбирают кортежи колонок вместо ORM-объектов и кодируют их через orjson,
+если он установлен (иначе - стандартный json). Большие выгрузки отдаются потоково:
+массив кодируется пачками по мере чтения строк из курсора, и документ целиком
+в памяти не собирается.
+"""
+import json
+from datetime import date
+
+from flask import current_app, stream_with_context
+
+from models import db
+
+try:
+    import orjson
+except ImportError:  # orjson необязателен
+    orjson = None
+
+# Строк в одной пачке потоковой выгрузки
+STREAM_CHUNK_ROWS = 2000
+
+
+def _default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} не сериализуется в JSON')
+
+
+if orjson is not None:
+    def dumps(obj):
+        """JSON в байтах; datetime - в формате ISO 8601"""
+        return orjson.dumps(obj)
+else:
+    _encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=_default)
+
+    def dumps(obj):
+        """JSON в байтах; datetime - в формате ISO 8601"""
+        return _encoder.encode(obj).encode('utf-8')
+
+
+def json_response(payload, status=200):
+    """Аналог jsonify через dumps"""
+    return current_app.response_class(dumps(payload), status=status, mimetype='application/json')
+
+
+def rows_to_dicts(keys, rows):
+    """Кортежи колонок -> словари с ключами keys"""
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def iter_json_array(name, keys, chunks):
+    """
+    Потоковый JSON-документ {"name": [...]} из пачек строк-кортежей.
+    chunks - итерируемое пачек (например, Result.partitions()).
+    """
+    yield b'{"' + name.encode('utf-8') + b'":['
+    first = True
+    for chunk in chunks:
+        if not chunk:
+            continue
+        # Пачка кодируется одним вызовом; от массива отрезаются скобки
+        encoded = dumps(rows_to_dicts(keys, chunk))[1:-1]
+        yield encoded if first else b',' + encoded
+        first = False
+    yield b']}'
+
+
+def stream_query(name, keys, statement):
+    """
+    Потоковый ответ {"name": [...]} со строками statement.
+    Запрос выполняется на отдельном соединении внутри генератора: сессия запроса
+    закрывается, как только view вернет ответ, а курсор нужен до конца отправки.
+    """
+    def generate():
+        with db.engine.connect() as connection:
+            result = connection.execution_options(yield_per=STREAM_CHUNK_ROWS).execute(statement)
+            yield from iter_json_array(name, keys, result.partitions())
+
+    return current_app.response_class(stream_with_context(generate()), mimetype='application/json')
@@ -0,0 +1,74 @@
+"""
+Запуск University Management System в продакшене
+
+На Linux/macOS - gunicorn с несколькими процессами-воркерами (gthread), на Windows,
+где gunicorn не работает, - waitress с пулом потоков в одном процессе.
+Приложение создается в каждом воркере после fork, поэтому пул соединений с базой
+у каждого процесса свой (см. config.py).
+
+    python wsgi.py
+
+Переменные окружения (кроме настроек из config.py):
+    HOST, PORT          адрес и порт (0.0.0.0:8000)
+    WEB_CONCURRENCY     число процессов gunicorn (2 * CPU + 1)
+    WEB_THREADS         потоков на процесс (gunicorn) или всего (waitress)
+    WEB_TIMEOUT         секунд на запрос до перезапуска воркера gunicorn
+
+Метрики /metrics свои в каждом воркере и помечены меткой worker (pid) - см. metrics.py.
+
+Каждый воркер при DB_INIT_ON_STARTUP=1 проверяет схему базы. Быстрее обновлять схему один раз
+при деплое и запускать воркеры без обращения к базе:
+    flask --app main:create_app migrate
+    DB_INIT_ON_STARTUP=0 python wsgi.py
+
+Те же настройки без этого скрипта:
+    gunicorn -w 4 --threads 4 -b 0.0.0.0:8000 'main:create_app()'
+    waitress-serve --threads 16 --port 8000 --call main:create_app
+"""
+import multiprocessing
+import os
+
+from main import create_app
+
+HOST = os.environ.get('HOST', '0.0.0.0')
+PORT = int(os.environ.get('PORT', 8000))
+WORKERS = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+# Waitress работает в одном процессе, поэтому потоков ему нужно больше
+THREADS = int(os.environ.get('WEB_THREADS', 16 if os.name == 'nt' else 4))
+TIMEOUT = int(os.environ.get('WEB_TIMEOUT', 60))
+
+
+def serve_gunicorn():
+    from gunicorn.app.base import BaseApplication
+
+    class Application(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f'{HOST}:{PORT}')
+            self.cfg.set('workers', WORKERS)
+            self.cfg.set('threads', THREADS)
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('timeout', TIMEOUT)
+            self.cfg.set('accesslog', '-')
+
+        def load(self):
+            return create_app()
+
+    Application().run()
+
+
+def serve_waitress():
+    from waitress import serve
+
+    serve(create_app(), host=HOST, port=PORT, threads=THREADS)
+
+
+def main():
+    print(f"Запуск University Management System на {HOST}:{PORT}...")
+    if os.name == 'nt':
+        serve_waitress()
+    else:
+        serve_gunicorn()
+
+
+if __name__ == '__main__':
+    main()
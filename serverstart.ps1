@@ -1,3 +1,3 @@
 venv/scripts/activate
 cd app
-uvicorn main:app --reload --port 8000
\ No newline at end of file
+python wsgi.py
\ No newline at end of file
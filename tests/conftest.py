@@ -0,0 +1,64 @@
+"""
+Общие настройки тестов.
+
+Модули приложения импортируются по короткому имени, как при запуске из app/,
+скрипты парсера - как при запуске из app/csv_parser/. Тесты, которым нужна база,
+используют отдельную базу PostgreSQL из TEST_DATABASE_URL (данные в ней очищаются)
+и пропускаются, если переменная не задана:
+
+    TEST_DATABASE_URL=postgresql://localhost/timetable_test python -m pytest -q
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (os.path.join(ROOT, 'app'), os.path.join(ROOT, 'app', 'csv_parser')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+TEST_DATABASE_URL = os.environ.get('TEST_DATABASE_URL')
+
+
+@pytest.fixture(scope='session')
+def app():
+    """Приложение на тестовой базе; схема создается и мигрируется один раз за сессию"""
+    if not TEST_DATABASE_URL:
+        pytest.skip('TEST_DATABASE_URL не задан')
+    from main import create_app
+    return create_app({'SQLALCHEMY_DATABASE_URI': TEST_DATABASE_URL, 'TESTING': True})
+
+
+@pytest.fixture
+def db_session(app):
+    """Контекст приложения с пустыми таблицами расписания и бронирований"""
+    from sqlalchemy import text
+    from models import db
+
+    with app.app_context():
+        db.session.execute(text(
+            "TRUNCATE schedules, bookings, calendar_feeds, notifications, users, classrooms RESTART IDENTITY CASCADE"
+        ))
+        db.session.commit()
+        for name in ('occupancy', 'dimensions'):
+            extension = app.extensions.get(name)
+            if extension is not None:
+                getattr(extension, 'invalidate', getattr(extension, 'clear', None))()
+        yield db.session
+        db.session.rollback()
+
+
+@pytest.fixture
+def other_process(app):
+    """Выполнить SQL как другой процесс: отдельным соединением мимо сессии и событий приложения"""
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine(TEST_DATABASE_URL)
+
+    def execute(sql, params=None):
+        with engine.begin() as connection:
+            connection.execute(text(sql), params or {})
+
+    yield execute
+    engine.dispose()
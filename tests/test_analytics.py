@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from analytics import merge_intervals, utilization_report
+from models import Booking, Classroom, Schedule
+
+MONDAY = datetime(2025, 10, 20)
+
+
+def test_merge_intervals():
+    key = np.array([1, 0, 0, 0, 1, 0])
+    begin = np.array([0, 10, 20, 50, 5, 60])
+    finish = np.array([10, 30, 40, 60, 8, 70])
+    key, begin, finish = merge_intervals(key, begin, finish)
+    assert key.tolist() == [0, 0, 1]
+    assert begin.tolist() == [10, 50, 0]
+    assert finish.tolist() == [40, 70, 10]
+
+
+def lesson(group, hour, minutes=90):
+    start = MONDAY.replace(hour=hour)
+    return Schedule(classroom_number='Б-101', lesson=f'лек Живопись {group}', date=start,
+                    end_date=start.replace(hour=hour + minutes // 60, minute=minutes % 60))
+
+
+def test_shared_lecture_counts_once(app, db_session):
+    db_session.add(Classroom(number='Б-101', capacity=100))
+    # Одна лекция у трех групп - три строки schedules с одинаковым интервалом
+    db_session.add_all([lesson(group, 7, minutes=12 * 60) for group in range(3)])
+    db_session.add(Booking(classroom_number='Б-101', date=MONDAY.replace(hour=20), duration=60))
+    db_session.commit()
+    with app.test_request_context():
+        report = utilization_report(MONDAY, MONDAY.replace(hour=23))
+    room = report['classrooms'][0]
+    assert room['schedule_hours'] == 12
+    assert room['booking_hours'] == 1
+    assert room['booked_hours'] == 13
+    assert room['utilization'] == 1.0
+    assert report['buildings'][0]['booked_hours'] == 13
+    assert all(hour['utilization'] <= 1.0 for hour in report['buildings'][0]['by_hour'])
+
+
+def test_report_sees_changes_from_other_process(app, db_session, other_process):
+    db_session.add(Classroom(number='Б-101', capacity=100))
+    db_session.commit()
+    with app.test_request_context():
+        assert utilization_report(MONDAY, MONDAY.replace(hour=23))['totals']['booked_hours'] == 0
+        other_process("INSERT INTO bookings (classroom_number, date, duration) VALUES ('Б-101', :date, 90)",
+                      {'date': MONDAY.replace(hour=10)})
+        assert utilization_report(MONDAY, MONDAY.replace(hour=23))['totals']['booked_hours'] == 1.5
+
+
+def hours_of_day(report):
+    return {hour['hour']: hour['booked_hours'] for hour in report['buildings'][0]['by_hour'] if hour['booked_hours']}
+
+
+def test_hours_are_local(app, db_session, monkeypatch):
+    db_session.add(Classroom(number='Б-101', capacity=30))
+    # 08:30-09:30 по Москве хранится в UTC
+    db_session.add(Schedule(classroom_number='Б-101', lesson='лек Живопись', date=MONDAY.replace(hour=5, minute=30),
+                            end_date=MONDAY.replace(hour=6, minute=30)))
+    db_session.commit()
+    with app.test_request_context():
+        report = utilization_report(MONDAY, MONDAY.replace(hour=12))
+        assert report['range']['timezone'] == 'Europe/Moscow'
+        assert hours_of_day(report) == {8: 0.5, 9: 0.5}
+        monkeypatch.setitem(app.config, 'TIMEZONE', 'UTC')
+        assert hours_of_day(utilization_report(MONDAY, MONDAY.replace(hour=12))) == {5: 0.5, 6: 0.5}
+
+
+def test_local_day_boundaries(app, db_session):
+    db_session.add(Classroom(number='Б-101', capacity=30))
+    # 23:30 UTC воскресенья - уже 02:30 понедельника по Москве
+    db_session.add(Booking(classroom_number='Б-101', date=MONDAY - timedelta(minutes=30), duration=60))
+    db_session.commit()
+    client = app.test_client()
+    report = client.get('/analytics/utilization', query_string={'date_from': '2025-10-20', 'date_to': '2025-10-21'}) \
+        .get_json()
+    assert report['range']['from'] == '2025-10-20T00:00:00'
+    assert hours_of_day(report) == {2: 0.5, 3: 0.5}
+    # Граница с поясом переводится в местную дату: 2025-10-19T22:00Z - 20 октября по Москве
+    report = client.get('/analytics/utilization', query_string={'date_from': '2025-10-19T22:00Z',
+                                                                 'date_to': '2025-10-21'}).get_json()
+    assert report['range']['from'] == '2025-10-20T00:00:00'
@@ -0,0 +1,64 @@
+import asyncio
+from types import SimpleNamespace
+
+import auth_id_finder
+from auth_id_finder import _scan, load_checkpoint, skipped_ids
+
+
+class FakeFetcher:
+    """Отвечает статусом классификации по ID, как classify_stream"""
+
+    def __init__(self, matches):
+        self.matches = set(matches)
+        self.probed = []
+
+    async def fetch(self, key, url, consumer=None):
+        self.probed.append(key)
+        return SimpleNamespace(ok=True, error=None, value="match" if key in self.matches else "empty")
+
+
+def scan(tmp_path, start, end, matches, max_stride=auth_id_finder.MAX_STRIDE, state=None):
+    state = state or load_checkpoint(str(tmp_path / "missing.json"), start, end)
+    fetcher = FakeFetcher(matches)
+    asyncio.run(_scan(state, str(tmp_path / "scan.json"), fetcher, None, max_stride))
+    return state["found"], fetcher.probed
+
+
+def test_shard_tail_is_scanned_densely(tmp_path, monkeypatch):
+    monkeypatch.setattr(auth_id_finder, "SHARD_SIZE", 500)
+    found, probed = scan(tmp_path, 1000, 1999, [1000, 1999])
+    assert found == [1000, 1999]
+    assert len(probed) < 1000
+
+
+def test_match_after_gap_backfills_skipped_ids(tmp_path, monkeypatch):
+    monkeypatch.setattr(auth_id_finder, "SHARD_SIZE", 1000)
+    # 1200 попадает на проверку с шагом, 1190-1199 досканируются подряд
+    found, _ = scan(tmp_path, 1000, 1999, list(range(1190, 1201)))
+    assert found == list(range(1190, 1201))
+
+
+def test_dense_scan_finds_isolated_ids(tmp_path, monkeypatch):
+    monkeypatch.setattr(auth_id_finder, "SHARD_SIZE", 1000)
+    found, probed = scan(tmp_path, 1000, 1999, [1333, 1777], max_stride=1)
+    assert found == [1333, 1777]
+    assert sorted(probed) == list(range(1000, 2000))
+
+
+def test_skipped_ids_are_counted(tmp_path, monkeypatch):
+    monkeypatch.setattr(auth_id_finder, "SHARD_SIZE", 1000)
+    for matches in ([], list(range(1190, 1201)), [1500, 1999]):
+        state = load_checkpoint(str(tmp_path / "missing.json"), 1000, 1999)
+        _, probed = scan(tmp_path, 1000, 1999, matches, state=state)
+        assert skipped_ids(state) == 1000 - len(set(probed)) > 0
+
+
+def test_dense_resume_clamps_saved_stride(tmp_path, monkeypatch):
+    monkeypatch.setattr(auth_id_finder, "SHARD_SIZE", 1000)
+    state = load_checkpoint(str(tmp_path / "missing.json"), 1000, 1999)
+    # Прерванный прореживающий запуск: шаг уже вырос до максимального
+    state["shards"]["1000"].update(next=1500, last_probed=1499, stride=auth_id_finder.MAX_STRIDE)
+    found, probed = scan(tmp_path, 1000, 1999, [1501, 1777], max_stride=1, state=state)
+    assert found == [1501, 1777]
+    assert probed == list(range(1500, 2000))
+    assert skipped_ids(state) == 0
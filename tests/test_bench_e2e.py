@@ -0,0 +1,23 @@
+from bench_e2e import compare, describe_regression
+
+
+def results(seconds, p95_ms):
+    return {'stages': {'import': {'seconds': seconds}}, 'endpoints': {'free': {'p50_ms': 1.0, 'p95_ms': p95_ms,
+                                                                               'p99_ms': 1.0, 'cold_ms': 1.0}}}
+
+
+def test_compare_reports_regressions_above_tolerance_and_min_delta():
+    baseline = results(10.0, 5.0)
+    assert compare(results(10.5, 5.5), baseline, tolerance=0.2) == []
+    # +200%, но прирост меньше min_delta_ms - шум
+    assert compare(results(10.0, 1.5), results(10.0, 0.5), tolerance=0.2) == []
+    assert compare(results(20.0, 15.0), baseline, tolerance=0.2) == [
+        ('stages.import.seconds', 10.0, 20.0), ('endpoints.free.p95_ms', 5.0, 15.0)]
+
+
+def test_zero_baseline():
+    regressions = compare(results(3.0, 50.0), results(0, 0), tolerance=0.2)
+    assert [metric for metric, _, _ in regressions] == ['stages.import.seconds', 'endpoints.free.p95_ms']
+    assert describe_regression('endpoints.free.p95_ms', 0, 50.0) == 'endpoints.free.p95_ms: 0 -> 50.0 (+50.000 ms)'
+    assert describe_regression('stages.import.seconds', 2.0, 3.0) == \
+        'stages.import.seconds: 2.0 -> 3.0 (+1.000 s, +50%)'
@@ -0,0 +1,50 @@
+from datetime import datetime
+
+import pytest
+
+from models import Booking, Classroom
+
+
+@pytest.fixture
+def client(app, db_session):
+    db_session.add(Classroom(number='Б-201', capacity=25))
+    db_session.commit()
+    return app.test_client()
+
+
+def book(client, date, duration=90):
+    return client.post('/bookings', json={'classroom': 'Б-201', 'date': date, 'duration': duration})
+
+
+@pytest.mark.parametrize('date', ['2025-10-20T07:00:00Z', '2025-10-20T10:00:00+03:00', '2025-10-20T07:00:00'])
+def test_offsets_are_stored_as_naive_utc(client, db_session, date):
+    response = book(client, date)
+    assert response.status_code == 201
+    assert response.get_json()['date'] == '2025-10-20T07:00:00'
+    assert db_session.get(Booking, response.get_json()['id']).date == datetime(2025, 10, 20, 7, 0)
+
+
+def test_overlap_across_offsets_conflicts(client):
+    assert book(client, '2025-10-20T07:00:00Z').status_code == 201
+    response = book(client, '2025-10-20T11:00:00+03:00')
+    assert response.status_code == 409
+    assert book(client, '2025-10-20T11:30:00+03:00').status_code == 201
+
+
+def test_free_rooms_sees_booking_with_offset(client):
+    assert book(client, '2025-10-20T10:00:00+03:00').status_code == 201
+    response = client.get('/classrooms/free', query_string={'start': '2025-10-20T07:30Z', 'end': '2025-10-20T08:00Z'})
+    assert response.get_json()['count'] == 0
+
+
+def test_invalid_booking(client):
+    assert book(client, 'завтра').status_code == 400
+    assert book(client, '2025-10-20T07:00:00Z', duration=0).status_code == 400
+    for description in ({'текст': 1}, ['текст'], 42, True):
+        response = client.post('/bookings', json={'classroom': 'Б-201', 'date': '2025-10-20T07:00:00Z',
+                                                  'duration': 30, 'description': description})
+        assert response.status_code == 400
+    assert client.post('/bookings', json={'classroom': 'Б-201', 'date': '2025-10-20T07:00:00Z', 'duration': 30,
+                                          'description': None}).status_code == 201
+    assert client.post('/bookings', json={'classroom': 'Б-999', 'date': '2025-10-20T07:00', 'duration': 30}) \
+        .status_code == 404
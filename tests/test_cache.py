@@ -0,0 +1,51 @@
+from datetime import datetime
+
+import pytest
+
+from models import Classroom
+
+MONDAY = datetime(2025, 10, 20)
+FREE = ('/classrooms/free', {'start': '2025-10-20T10:00', 'end': '2025-10-20T11:00'})
+
+
+@pytest.fixture
+def client(app, db_session):
+    db_session.add_all([Classroom(number='Б-101', capacity=30), Classroom(number='Б-102', capacity=30)])
+    db_session.commit()
+    return app.test_client()
+
+
+def get(client, path, query=None):
+    response = client.get(path, query_string=query)
+    assert response.status_code == 200
+    return response
+
+
+def test_repeated_get_is_cached(client):
+    assert get(client, *FREE).headers['X-Cache'] == 'MISS'
+    response = get(client, *FREE)
+    assert response.headers['X-Cache'] == 'HIT'
+    assert client.get(FREE[0], query_string=FREE[1], headers={'If-None-Match': response.headers['ETag']}) \
+        .status_code == 304
+
+
+@pytest.mark.parametrize('sql, path, query, check', [
+    ("INSERT INTO bookings (classroom_number, date, duration) VALUES ('Б-101', '2025-10-20 10:00', 60)",
+     *FREE, lambda body: body['count'] == 1),
+    ("INSERT INTO bookings (classroom_number, date, duration) VALUES ('Б-101', '2025-10-20 10:00', 60)",
+     '/bookings', None, lambda body: len(body['bookings']) == 1),
+    ("INSERT INTO schedules (classroom_number, lesson, date, end_date) "
+     "VALUES ('Б-102', 'лек Живопись', '2025-10-20 10:00', '2025-10-20 11:30')",
+     '/schedules', None, lambda body: len(body['schedules']) == 1),
+    ("INSERT INTO classrooms (number) VALUES ('Б-103')", '/classrooms', None,
+     lambda body: len(body['classrooms']) == 3),
+    ("INSERT INTO users (role) VALUES ('student')",
+     '/users', None, lambda body: len(body['users']) == 1),
+])
+def test_commit_in_other_process_invalidates(client, other_process, sql, path, query, check):
+    assert not check(get(client, path, query).get_json())
+    assert get(client, path, query).headers['X-Cache'] == 'HIT'
+    other_process(sql)
+    response = get(client, path, query)
+    assert response.headers['X-Cache'] == 'MISS'
+    assert check(response.get_json())
@@ -0,0 +1,74 @@
+import asyncio
+import math
+
+import pytest
+
+import fetcher
+from fetcher import TokenBucket
+
+yield_to_loop = asyncio.sleep
+
+
+class FakeClock:
+    """Время, которое идет только в sleep: тесты ограничителя не ждут по-настоящему"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    async def sleep(self, delay):
+        self.sleeps.append(delay)
+        # Как у настоящих таймеров, сон не короче микросекунды - иначе ошибки округления
+        # оставляют в ведре 0.999... токена и ожидание повторяется бесконечно
+        self.now += math.ceil(delay * 1e6) / 1e6
+        await yield_to_loop(0)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(fetcher.time, 'monotonic', clock.monotonic)
+    monkeypatch.setattr(fetcher.asyncio, 'sleep', clock.sleep)
+    return clock
+
+
+def acquire_times(bucket, clock, count):
+    async def run():
+        times = []
+
+        async def one():
+            await bucket.acquire()
+            times.append(clock.now)
+
+        await asyncio.gather(*(one() for _ in range(count)))
+        return times
+
+    return asyncio.run(run())
+
+
+def test_burst_then_rate(clock):
+    bucket = TokenBucket(rate=10, capacity=3)
+    times = acquire_times(bucket, clock, 7)
+    start = 1000.0
+    # Полное ведро отдает capacity токенов сразу, дальше - по одному каждые 1 / rate секунды
+    assert times[:3] == [start] * 3
+    assert times[3:] == pytest.approx([start + 0.1, start + 0.2, start + 0.3, start + 0.4])
+
+
+def test_refill_is_capped_by_capacity(clock):
+    bucket = TokenBucket(rate=2, capacity=2)
+    acquire_times(bucket, clock, 2)
+    clock.now += 60
+    times = acquire_times(bucket, clock, 3)
+    assert times == pytest.approx([times[0], times[0], times[0] + 0.5])
+
+
+def test_default_capacity_and_unlimited(clock):
+    assert TokenBucket(rate=0.5).capacity == 1.0
+    assert TokenBucket(rate=20).capacity == 20
+    bucket = TokenBucket(rate=0)
+    assert acquire_times(bucket, clock, 100) == [1000.0] * 100
+    assert clock.sleeps == []
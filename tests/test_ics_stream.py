@@ -0,0 +1,67 @@
+from ics_stream import Event, parse_lines, property_param, to_utc
+from parser_to_csv import event_to_row, parse_event
+
+
+def parse(text):
+    return list(parse_lines(text.splitlines(keepends=True)))
+
+
+def test_folded_lines_are_joined():
+    events = parse(
+        "BEGIN:VEVENT\r\n"
+        "SUMMARY:лек Исто\r\n"
+        " рия искусств\r\n"
+        "DESCRIPTION:Преподаватель Еремин В.Е.,\r\n"
+        "\t группа: 21-ДИбо-5\r\n"
+        "DTSTART:20251020T071000Z\r\n"
+        "END:VEVENT\r\n"
+    )
+    assert events == [Event("лек История искусств", "20251020T071000Z", "",
+                            "", "Преподаватель Еремин В.Е., группа: 21-ДИбо-5")]
+
+
+def test_tzid_is_converted_to_utc():
+    events = parse(
+        "BEGIN:VEVENT\n"
+        "DTSTART;TZID=Europe/Moscow:20251020T101000\n"
+        'DTEND;TZID="Europe/Moscow":20251020T114000\n'
+        "LOCATION:Б-305\n"
+        "END:VEVENT\n"
+    )
+    assert events[0].start == "20251020T071000Z"
+    assert events[0].end == "20251020T084000Z"
+    assert event_to_row(events[0])[:4] == ("2025-10-20", "Понедельник", "07:10", "08:40")
+
+
+def test_unknown_tzid_is_not_stored_as_utc():
+    events = parse("BEGIN:VEVENT\nDTSTART;TZID=Nowhere/City:20251020T101000\nLOCATION:Б-305\nEND:VEVENT\n")
+    assert events[0].start == ""
+    assert event_to_row(events[0])[0] == ""
+
+
+def test_trailing_whitespace_and_lowercase_names():
+    events = parse(
+        "begin:vevent  \r\n"
+        "dtstart:20251020T071000Z \r\n"
+        "Location:Б-305\r\n"
+        "END:VEVENT\t\r\n"
+    )
+    assert events == [Event("", "20251020T071000Z", "", "Б-305", "")]
+
+
+def test_escaped_text_and_params_with_quoted_colon():
+    events = parse('BEGIN:VEVENT\nLOCATION;ALTREP="http://x:1/":Б-305\\, корпус 2\nEND:VEVENT\n')
+    assert events[0].location == "Б-305, корпус 2"
+
+
+def test_legacy_parse_event_matches_stream_parser():
+    lines = ["DTSTART;TZID=Europe/Moscow:20251020T101000", "SUMMARY:пр Рисунок"]
+    assert parse_event(lines) == {"start": "20251020T071000Z", "summary": "пр Рисунок"}
+
+
+def test_helpers():
+    assert property_param("DTSTART;VALUE=DATE-TIME;TZID=Asia/Yekaterinburg:20251020T101000", "TZID") \
+        == "Asia/Yekaterinburg"
+    assert property_param("DTSTART:20251020T101000", "TZID") is None
+    assert to_utc("20251020T071000Z", "Europe/Moscow") == "20251020T071000Z"
+    assert to_utc("20251020", "Europe/Moscow") == "20251020"
@@ -0,0 +1,77 @@
+import csv
+from collections import Counter
+from datetime import datetime
+
+from importer import import_schedule, iter_source_rows, iter_staging_rows
+
+
+class FakeInterner:
+    def __init__(self, max_length):
+        self.max_length = max_length
+        self.ids = {}
+
+    def get(self, name):
+        return self.ids.setdefault(name, len(self.ids) + 1) if name else None
+
+
+class FakeDimensions:
+    def __init__(self):
+        self.groups, self.teachers, self.lesson_types = FakeInterner(50), FakeInterner(100), FakeInterner(50)
+
+
+def row(date='2025-10-20', start='07:10', end='08:40', location='Б-305'):
+    return {'date': date, 'start_time': start, 'end_time': end, 'type': 'лек', 'subject': 'Живопись',
+            'teacher': 'Еремин В.Е.', 'location': location, 'group': '21-ДИбо-5'}
+
+
+def test_invalid_rows_are_rejected_not_raised():
+    rejected = Counter()
+    rows = [row(), row(end='06:00'), row(end='07:10'), row(start='25:00'), row(date='2025-13-01'),
+            row(location=''), row(end='')]
+    staged = list(iter_staging_rows(rows, FakeDimensions(), rejected))
+    assert [(r[2], r[3]) for r in staged] == [
+        (datetime(2025, 10, 20, 7, 10), datetime(2025, 10, 20, 8, 40)),
+        (datetime(2025, 10, 20, 7, 10), None),
+    ]
+    assert rejected == {'inverted_interval': 2, 'invalid_time': 2}
+
+
+def test_too_long_values_are_rejected_not_truncated():
+    rejected = Counter()
+    rows = [row(location='Б-305 (лаборатория физики)'), row(location='Б-305'), dict(row(), subject='П' * 100),
+            dict(row(), group='Г' * 51), dict(row(), teacher='Т' * 101), dict(row(), type='т' * 51),
+            dict(row(), teacher='Т' * 100)]
+    staged = list(iter_staging_rows(rows, FakeDimensions(), rejected))
+    assert [r[0] for r in staged] == ['Б-305', 'Б-305']
+    assert rejected == {'location_too_long': 1, 'lesson_too_long': 1, 'group_too_long': 1, 'teacher_too_long': 1,
+                        'type_too_long': 1}
+
+
+def write_csv(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=list(row()))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def test_snapshot_and_csv_sources_yield_same_rows(tmp_path):
+    from columnar import SnapshotWriter
+    from parser_to_csv import FIELDNAMES
+    rows = [row(), row(start='10:00', end='11:30', location='Б-101')]
+    write_csv(tmp_path / 'schedule.csv', rows)
+    writer = SnapshotWriter()
+    for item in rows:
+        writer.add([item.get(name, '') for name in FIELDNAMES])
+    writer.save(str(tmp_path / 'schedule.cols'))
+    from_csv = [{name: r[name] for name in row()} for r in iter_source_rows(str(tmp_path / 'schedule.csv'))]
+    from_snapshot = [{name: r[name] for name in row()} for r in iter_source_rows(str(tmp_path / 'schedule.cols'))]
+    assert from_snapshot == from_csv == rows
+
+
+def test_import_skips_inverted_interval(db_session, tmp_path):
+    path = tmp_path / 'schedule.csv'
+    write_csv(path, [row(), row(start='10:00', end='09:00'), row(start='12:00', end='13:30')])
+    stats = import_schedule(str(path), notify=False)
+    assert stats['staged'] == 2
+    assert stats['rejected'] == 1
+    assert stats['inserted'] == 2
@@ -0,0 +1,60 @@
+import pytest
+
+from location_filter import BUILDING_B, classify_stream, first_location
+
+CALENDAR = (
+    "BEGIN:VCALENDAR\r\nBEGIN:VEVENT\r\nSUMMARY:лек Живопись\r\nDESCRIPTION:LOCATION в описании\r\n"
+    "LOCATION:Б-305\r\nEND:VEVENT\r\nBEGIN:VEVENT\r\nLOCATION:Б1-101\r\nEND:VEVENT\r\nEND:VCALENDAR\r\n"
+).encode('utf-8')
+
+
+def split_at(body, *positions):
+    bounds = [0, *positions, len(body)]
+    return [body[a:b] for a, b in zip(bounds, bounds[1:])]
+
+
+def test_every_chunk_boundary():
+    # Граница блока в любом месте, в том числе внутри маркера, значения и многобайтной буквы
+    for position in range(1, len(CALENDAR)):
+        assert first_location(iter(split_at(CALENDAR, position))) == 'Б-305'.encode('utf-8'), position
+
+
+def test_one_byte_chunks():
+    assert first_location(CALENDAR[i:i + 1] for i in range(len(CALENDAR))) == 'Б-305'.encode('utf-8')
+
+
+def test_stops_after_first_location():
+    chunks = split_at(CALENDAR, CALENDAR.index(b'END:VEVENT'))
+    consumed = []
+
+    def stream():
+        for chunk in chunks:
+            consumed.append(chunk)
+            yield chunk
+        raise AssertionError('поток дочитан до конца')
+
+    assert first_location(stream()) == 'Б-305'.encode('utf-8')
+    assert len(consumed) == 1
+
+
+@pytest.mark.parametrize('body, location', [
+    (b'BEGIN:VCALENDAR\nLOCATION;LANGUAGE=ru:\xd0\x91-101\nEND:VCALENDAR', 'Б-101'),
+    (b'BEGIN:VCALENDAR\r\nLOCATIONS:x\r\nLOCATION: \xd0\x91-7 \r\n', 'Б-7'),
+    ('BEGIN:VCALENDAR\nLOCATION:Б-9'.encode('utf-8'), 'Б-9'),
+    (b'BEGIN:VCALENDAR\r\nEND:VCALENDAR\r\n', None),
+])
+def test_line_variants(body, location):
+    for position in range(1, len(body)):
+        result = first_location(iter(split_at(body, position)))
+        assert result == (location.encode('utf-8') if location else None), position
+
+
+@pytest.mark.parametrize('location, expected', [('Б-305', 'match'), ('Б1-101', 'excluded'), ('А-101', 'excluded')])
+def test_classify_stream(location, expected):
+    body = f"BEGIN:VCALENDAR\r\nLOCATION:{location}\r\n".encode('utf-8')
+    assert classify_stream([body]) == expected
+    assert BUILDING_B(location.encode('utf-8')) == expected
+
+
+def test_classify_empty():
+    assert classify_stream([b'BEGIN:VCALENDAR\r\n', b'END:VCALENDAR\r\n']) == 'empty'
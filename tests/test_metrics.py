@@ -0,0 +1,48 @@
+import os
+import re
+
+SAMPLE_RE = re.compile(r'^(\w+)\{([^}]*)\} (\S+)$')
+
+
+def family_of(name, types):
+    for suffix in ('_bucket', '_sum', '_count'):
+        if name.endswith(suffix) and types.get(name[:-len(suffix)]) == 'histogram':
+            return name[:-len(suffix)]
+    return name
+
+
+def test_prometheus_families_are_contiguous(app, db_session):
+    client = app.test_client()
+    for path in ('/classrooms', '/users', '/classrooms', '/bookings'):
+        assert client.get(path).status_code == 200
+    body = client.get('/metrics').get_data(as_text=True)
+
+    types, finished, current, samples = {}, set(), None, {}
+    for line in body.splitlines():
+        if line.startswith('# TYPE '):
+            _, _, name, kind = line.split(' ')
+            assert name not in types, f'{name}: второй TYPE'
+            types[name] = kind
+            continue
+        if line.startswith('#'):
+            continue
+        name, labels, value = SAMPLE_RE.match(line).groups()
+        family = family_of(name, types)
+        assert family in types, f'{name}: ряд до TYPE'
+        if family != current:
+            assert family not in finished, f'{family}: ряды семейства разорваны'
+            if current:
+                finished.add(current)
+            current = family
+        assert f'worker="{os.getpid()}"' in labels
+        samples[name, labels] = float(value)
+
+    assert types['http_request_duration_seconds'] == 'histogram'
+    assert types['sql_slow_queries_total'] == 'counter'
+    count = samples['http_request_duration_seconds_count',
+                    f'worker="{os.getpid()}",method="GET",endpoint="/classrooms"']
+    assert count >= 2
+
+
+def test_json_names_worker(app):
+    assert app.test_client().get('/metrics', query_string={'format': 'json'}).get_json()['worker'] == os.getpid()
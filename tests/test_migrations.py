@@ -0,0 +1,42 @@
+from sqlalchemy import text
+
+from migrations import MIGRATIONS, migrate
+from models import db, init_db
+
+SCHEMA_SQL = """
+SELECT 'column', table_name || '.' || column_name || ' ' || data_type FROM information_schema.columns
+WHERE table_schema = 'public'
+UNION ALL SELECT 'index', indexdef FROM pg_indexes WHERE schemaname = 'public'
+UNION ALL SELECT 'constraint', conrelid::regclass || ' ' || pg_get_constraintdef(oid) FROM pg_constraint
+WHERE connamespace = 'public'::regnamespace
+UNION ALL SELECT 'trigger', tgrelid::regclass || ' ' || tgname FROM pg_trigger WHERE NOT tgisinternal
+ORDER BY 1, 2
+"""
+
+
+def schema(connection):
+    return connection.execute(text(SCHEMA_SQL)).all()
+
+
+def test_migrate_twice(app):
+    with app.app_context():
+        migrate()
+        assert migrate() == []
+        assert init_db() == []
+        applied = db.session.execute(text("SELECT version FROM schema_version ORDER BY version")).scalars().all()
+        assert applied == [version for version, _, _ in MIGRATIONS]
+
+
+def test_steps_are_idempotent(app):
+    """Повторное применение всех шагов к уже мигрированной базе не падает и не меняет схему"""
+    with app.app_context(), db.engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            connection.execute(text("SET LOCAL lock_timeout = '5s'"))
+            before = schema(connection)
+            for _, _, statements in MIGRATIONS:
+                for statement in statements:
+                    connection.execute(text(statement))
+            assert schema(connection) == before
+        finally:
+            transaction.rollback()
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+
+import pytest
+from flask import current_app
+
+from models import Booking, Classroom, Schedule
+from occupancy import OccupancyIndex, to_slot
+
+MONDAY = datetime(2025, 10, 20)
+
+
+@pytest.fixture
+def rooms(db_session):
+    db_session.add_all([
+        Classroom(number='Б-101', capacity=30, equipment='Проектор, маркерная доска'),
+        Classroom(number='Б-102', capacity=100, equipment='Компьютеры'),
+        Classroom(number='Б-103', capacity=20, equipment=None),
+    ])
+    db_session.add(Schedule(classroom_number='Б-101', lesson='лек Живопись',
+                            date=MONDAY.replace(hour=7, minute=10), end_date=MONDAY.replace(hour=8, minute=40)))
+    db_session.commit()
+    return db_session
+
+
+def test_to_slot_rounding():
+    assert to_slot(datetime(2000, 1, 1, 0, 10)) == 1
+    assert to_slot(datetime(2000, 1, 1, 0, 15)) == 1
+    assert to_slot(datetime(2000, 1, 1, 0, 15), round_up=True) == 2
+    assert to_slot(datetime(2000, 1, 1, 0, 20), round_up=True) == 2
+
+
+def test_free_rooms_filters(rooms):
+    index = OccupancyIndex()
+    lesson = (MONDAY.replace(hour=8), MONDAY.replace(hour=9))
+    assert index.free_rooms(*lesson) == ['Б-102', 'Б-103']
+    # Интервал [start, end) - касание концом пары не занятость
+    assert index.free_rooms(MONDAY.replace(hour=8, minute=40), MONDAY.replace(hour=10)) == ['Б-101', 'Б-102', 'Б-103']
+    assert index.free_rooms(*lesson, min_capacity=25) == ['Б-102']
+    assert index.free_rooms(MONDAY.replace(hour=12), MONDAY.replace(hour=13), equipment=['Маркерная']) == ['Б-101']
+
+
+def test_own_booking_is_applied_incrementally(rooms, monkeypatch):
+    index = OccupancyIndex()
+    start = MONDAY.replace(hour=12)
+    index.free_rooms(start, start + timedelta(hours=1))
+    version = index.version
+    monkeypatch.setitem(current_app.extensions, 'occupancy', index)
+    rooms.add(Booking(classroom_number='Б-102', date=start, duration=60))
+    rooms.commit()
+
+    assert index.version == version + 1
+    assert index.free_rooms(start, start + timedelta(hours=1)) == ['Б-101', 'Б-103']
+
+
+def test_changes_from_other_process_are_seen(rooms, other_process):
+    index = OccupancyIndex()
+    start = MONDAY.replace(hour=14)
+    assert index.free_rooms(start, start + timedelta(minutes=90)) == ['Б-101', 'Б-102', 'Б-103']
+
+    other_process("INSERT INTO bookings (classroom_number, date, duration) VALUES ('Б-103', :date, 90)",
+                  {'date': start})
+    assert index.free_rooms(start, start + timedelta(minutes=90)) == ['Б-101', 'Б-102']
+
+    other_process("DELETE FROM schedules")
+    assert index.free_rooms(MONDAY.replace(hour=8), MONDAY.replace(hour=9)) == ['Б-101', 'Б-102', 'Б-103']
+
+
+def test_empty_period_is_skipped(rooms):
+    rooms.add(Schedule(classroom_number='Б-102', lesson='пр Рисунок',
+                       date=MONDAY.replace(hour=10), end_date=MONDAY.replace(hour=10)))
+    rooms.commit()
+    assert OccupancyIndex().free_rooms(MONDAY.replace(hour=10), MONDAY.replace(hour=11)) == \
+        ['Б-101', 'Б-102', 'Б-103']
+
+
+@pytest.mark.parametrize('start, end', [
+    ('2025-10-20T07:10:00Z', '2025-10-20T08:00:00Z'),
+    ('2025-10-20T10:10:00+03:00', '2025-10-20T11:00:00+03:00'),
+])
+def test_free_rooms_endpoint_accepts_offsets(app, rooms, start, end):
+    response = app.test_client().get('/classrooms/free', query_string={'start': start, 'end': end})
+    assert response.status_code == 200
+    assert [room['number'] for room in response.get_json()['classrooms']] == ['Б-102', 'Б-103']
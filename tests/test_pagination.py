@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import Booking, Classroom
+from pagination import decode_cursor, encode_cursor
+
+MONDAY = datetime(2025, 10, 20, 7, 10)
+
+
+def test_cursor_round_trip(app):
+    with app.test_request_context():
+        for key in [(MONDAY, 1), (MONDAY.replace(microsecond=123456), 2 ** 40)]:
+            cursor = encode_cursor(key)
+            assert '=' not in cursor
+            assert decode_cursor(cursor) == key
+
+
+@pytest.mark.parametrize('cursor', ['мусор', 'e30', encode_cursor(('вчера', 1)), encode_cursor((MONDAY, 'x'))])
+def test_invalid_cursor(app, db_session, cursor):
+    assert app.test_client().get('/bookings', query_string={'cursor': cursor}).status_code == 400
+
+
+@pytest.fixture
+def bookings(db_session):
+    db_session.add_all([Classroom(number='Б-101'), Classroom(number='Б-102')])
+    # Два бронирования на каждое время - порядок внутри времени задает id
+    db_session.add_all([
+        Booking(classroom_number=number, date=MONDAY + timedelta(hours=hour), duration=30)
+        for hour in range(5) for number in ('Б-101', 'Б-102')
+    ])
+    db_session.commit()
+    return [booking.id for booking in Booking.query.order_by(Booking.date, Booking.id)]
+
+
+def test_pages_cover_all_rows_once(app, bookings):
+    client, seen, cursor = app.test_client(), [], None
+    while True:
+        query = {'limit': 3, **({'cursor': cursor} if cursor else {})}
+        page = client.get('/bookings', query_string=query).get_json()
+        assert len(page['bookings']) <= 3
+        seen += [booking['id'] for booking in page['bookings']]
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert seen == bookings
+
+
+def test_last_full_page_has_no_cursor(app, bookings):
+    page = app.test_client().get('/bookings', query_string={'limit': len(bookings)}).get_json()
+    assert page['next_cursor'] is None
+    assert len(page['bookings']) == len(bookings)
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+
+from schedule_diff import Lesson, diff_snapshots, is_empty
+
+MONDAY = datetime(2025, 10, 20, 7, 10)
+
+
+def lesson(start=MONDAY, classroom='Б-305', group='21-ДИбо-5', name='лек Живопись', teacher='Еремин В.Е.'):
+    return Lesson(group, classroom, start, start + timedelta(minutes=90), name, teacher, lesson_type='лек')
+
+
+def test_same_snapshot_is_empty():
+    snapshot = [lesson(), lesson(MONDAY + timedelta(days=1))]
+    assert is_empty(diff_snapshots(snapshot, list(reversed(snapshot))))
+
+
+def test_added_removed_changed():
+    old = [lesson(), lesson(group='21-ДИбо-6'), lesson(name='пр Рисунок', group='22-ИСбо-1')]
+    new = [lesson(), lesson(group='21-ДИбо-6', teacher='Иванов А.Б.'), lesson(group='23-ПИбо-1')]
+    diff = diff_snapshots(old, new)
+    assert diff.added == [lesson(group='23-ПИбо-1')]
+    assert diff.removed == [lesson(name='пр Рисунок', group='22-ИСбо-1')]
+    assert diff.changed == [(lesson(group='21-ДИбо-6'), lesson(group='21-ДИбо-6', teacher='Иванов А.Б.'))]
+    assert diff.moved == []
+
+
+def test_moves_within_window():
+    old = [lesson(), lesson(MONDAY + timedelta(days=1))]
+    new = [lesson(classroom='Б-101'), lesson(MONDAY + timedelta(days=9))]
+    diff = diff_snapshots(old, new)
+    assert diff.moved == [(lesson(), lesson(classroom='Б-101'))]
+    # Перенос дальше MOVE_WINDOW - удаление и добавление
+    assert diff.removed == [lesson(MONDAY + timedelta(days=1))]
+    assert diff.added == [lesson(MONDAY + timedelta(days=9))]
+
+
+def test_moves_pick_nearest_candidate():
+    old = [lesson(MONDAY - timedelta(days=3)), lesson(MONDAY + timedelta(hours=2))]
+    new = [lesson(MONDAY + timedelta(hours=3))]
+    assert diff_snapshots(old, new).moved == [(lesson(MONDAY + timedelta(hours=2)), lesson(MONDAY + timedelta(hours=3)))]
+
+
+def test_subgroups_under_one_key_are_stable():
+    old = [lesson(teacher='Еремин В.Е.'), lesson(teacher='Иванов А.Б.')]
+    assert is_empty(diff_snapshots(old, list(reversed(old))))
+    diff = diff_snapshots(old, old[:1])
+    assert diff.removed == [old[1]]
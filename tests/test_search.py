@@ -0,0 +1,50 @@
+from search import TrigramIndex, normalize, trigrams
+
+ENTRIES = [
+    ('classroom', 'Б-305'), ('classroom', 'Б-301'), ('classroom', 'А-305'),
+    ('teacher', 'Ерёмин В.Е.'), ('teacher', 'Еремеев А.А.'), ('teacher', 'Иванов П.С.'),
+    ('group', '21-ДИбо-5'), ('subject', 'Живопись'), ('subject', 'История искусств'),
+    ('subject', '  '),
+]
+
+
+def names(results):
+    return [name for _, name, _ in results]
+
+
+def test_trigrams_and_normalize():
+    assert trigrams('Ёж') == {'  е', ' еж', 'еж '}
+    assert trigrams('Ёж', partial=True) == {'  е', ' еж'}
+    assert normalize('Б-305') == normalize('б 305') == 'б 305'
+
+
+def test_empty_entries_and_queries():
+    index = TrigramIndex(ENTRIES)
+    assert len(index) == len(ENTRIES) - 1
+    assert index.search('') == []
+    assert index.search('--') == []
+
+
+def test_prefix_while_typing():
+    index = TrigramIndex(ENTRIES)
+    # При равной оценке короче - выше
+    assert names(index.search('ерем'))[:2] == ['Ерёмин В.Е.', 'Еремеев А.А.']
+    assert names(index.search('ерёми'))[0] == 'Ерёмин В.Е.'
+    assert names(index.search('жив')) == ['Живопись']
+
+
+def test_typos_and_separators():
+    index = TrigramIndex(ENTRIES)
+    assert names(index.search('Живопсь')) == ['Живопись']
+    assert names(index.search('б 305'))[0] == 'Б-305'
+    assert names(index.search('305'))[:2] == ['А-305', 'Б-305']
+
+
+def test_kinds_limit_and_order():
+    index = TrigramIndex(ENTRIES)
+    assert {kind for kind, _, _ in index.search('б', kinds={'classroom'})} == {'classroom'}
+    assert index.search('зззз') == []
+    results = index.search('305', limit=1)
+    assert len(results) == 1
+    scores = [score for _, _, score in index.search('ер')]
+    assert scores == sorted(scores, reverse=True)